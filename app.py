@@ -5,11 +5,17 @@
 提供职位数据的可视化展示和搜索功能
 """
 
-import json
 import os
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify
-from collections import Counter
+from flask import Flask, Response, render_template, request, jsonify, send_file
+
+from change_log import ChangeLog
+from excel_export import LazyExcel, write_tracker_workbook
+from http_cache import ResponseCache
+from job_export import EXPORT_FORMATS, OrderedJobs, export_fields, iter_export
+from job_query import DEFAULT_PAGE_SIZE, DEFAULT_SORT, SORT_KEYS, QueryIndexCache
+from job_stats import StatsCache, job_cities
+from job_store import get_job_store
 
 app = Flask(__name__)
 
@@ -17,73 +23,49 @@ app = Flask(__name__)
 DATA_DIR = os.getenv('DATA_DIR', os.path.join(os.path.dirname(__file__), 'data'))
 CACHE_FILE = os.path.join(DATA_DIR, 'bytedance_jobs_cache.json')
 EXCEL_FILE = os.path.join(DATA_DIR, 'bytedance_jobs_tracker.xlsx')
+CHANGE_LOG_FILE = os.path.join(DATA_DIR, 'job_changes.ndjson')
+STATS_FILE = os.path.join(DATA_DIR, 'bytedance_jobs_stats.json')
 
 # 确保数据目录存在
 os.makedirs(DATA_DIR, exist_ok=True)
 
+# 统计结果缓存，数据版本或日期变化时才重新读取快照
+stats_cache = StatsCache(STATS_FILE)
+# 职位列表页的查询索引缓存，数据版本变化时重建
+query_index_cache = QueryIndexCache()
+# JSON接口响应缓存：按数据版本生成ETag，并保留压缩后的响应体
+response_cache = ResponseCache()
+# Excel追踪表在首次下载时生成，数据版本不变时直接复用
+tracker_excel = LazyExcel(EXCEL_FILE, write_tracker_workbook)
+SORT_OPTIONS = {'is_new': '新职位优先', 'publish_time': '最新发布', 'title': '职位名称'}
+
+# 模板中统一解析城市列表（兼容逗号拼接的字符串和旧版字典列表）
+app.add_template_filter(job_cities, 'job_cities')
+
 # Flask配置
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
 app.config['DEBUG'] = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
 
-def load_job_data():
-    """加载职位数据"""
-    # 确保数据目录存在
-    os.makedirs(DATA_DIR, exist_ok=True)
-    
-    if not os.path.exists(CACHE_FILE):
-        print(f"数据文件不存在: {CACHE_FILE}")
-        return {'campus': [], 'intern': [], 'experienced': []}
-    
+# 刷新数据时在进程内复用常驻浏览器池，关闭后退回到每次启动 by.py 子进程
+USE_BROWSER_POOL = os.getenv('USE_BROWSER_POOL', 'True').lower() == 'true'
+REFRESH_TIMEOUT = 300  # 5分钟超时
+# 精简导航：抓取时拦截图片、字体、样式和第三方请求
+LEAN_NAVIGATION = os.getenv('LEAN_NAVIGATION', 'False').lower() == 'true'
+# 抓取模式：browser为每次用浏览器抓取，hybrid为优先用缓存的会话凭据直接重放接口
+FETCH_MODE = os.getenv('FETCH_MODE', 'browser').lower()
+
+def load_jobs_of_type(job_type):
+    """加载单个类型的职位（只读取该工作表，进程内缓存，数据版本变化时才重新读取）"""
+    store = get_job_store(CACHE_FILE)
     try:
-        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            print(f"成功加载数据: {sum(len(jobs) for jobs in data.values())} 个职位")
-            return data
+        return store.get_jobs(job_type)
     except Exception as e:
         print(f"加载数据失败: {e}")
-        return {'campus': [], 'intern': [], 'experienced': []}
-
-def get_statistics(data):
-    """获取数据统计信息"""
-    stats = {
-        'total': sum(len(jobs) for jobs in data.values()),
-        'by_type': {k: len(v) for k, v in data.items()},
-        'recent_jobs': 0,
-        'cities': Counter(),
-        'departments': Counter()
-    }
-    
-    # 统计最近发布的职位（7天内）
-    from datetime import datetime, timedelta
-    week_ago = datetime.now() - timedelta(days=7)
-    
-    for job_type, jobs in data.items():
-        for job in jobs:
-            # 统计最近职位
-            try:
-                pub_time = datetime.strptime(job.get('publish_time', ''), '%Y-%m-%d')
-                if pub_time >= week_ago:
-                    stats['recent_jobs'] += 1
-            except:
-                pass
-            
-            # 统计城市分布
-            city_list = job.get('city_list', [])
-            if isinstance(city_list, list):
-                for city in city_list:
-                    if isinstance(city, dict) and 'name' in city:
-                        stats['cities'][city['name']] += 1
-            
-            # 统计部门分布
-            department = job.get('department', '')
-            if department:
-                stats['departments'][department] += 1
-    
-    # 添加排序后的热门城市和部门
-    stats['top_cities'] = stats['cities'].most_common(10)
-    stats['top_departments'] = stats['departments'].most_common(10)
-    
-    return stats
+        return []
+
+def get_statistics():
+    """获取数据统计信息（优先读取监控脚本生成的统计快照）"""
+    return stats_cache.get(get_job_store(CACHE_FILE))
 
 @app.route('/health')
 def health_check():
@@ -93,8 +75,7 @@ def health_check():
 @app.route('/')
 def index():
     """首页"""
-    data = load_job_data()
-    stats = get_statistics(data)
+    stats = get_statistics()
     return render_template('index.html', stats=stats)
 
 @app.route('/jobs/<job_type>')
@@ -103,42 +84,26 @@ def jobs(job_type):
     if job_type not in ['campus', 'intern', 'experienced']:
         return "Invalid job type", 404
     
-    data = load_job_data()
-    jobs = data.get(job_type, [])
+    query_index = query_index_cache.get(get_job_store(CACHE_FILE), job_type)
+    jobs = query_index.jobs
     
     # 获取搜索参数
     search = request.args.get('search', '').strip()
     city = request.args.get('city', '').strip()
     department = request.args.get('department', '').strip()
     
-    # 过滤职位
-    filtered_jobs = jobs
-    if search:
-        filtered_jobs = [job for job in filtered_jobs 
-                        if search.lower() in job.get('title', '').lower() 
-                        or search.lower() in job.get('description', '').lower()]
-    
-    if city:
-        filtered_jobs = [job for job in filtered_jobs 
-                        if any(c.get('name', '') == city for c in job.get('city_list', []))]
-    
-    if department:
-        filtered_jobs = [job for job in filtered_jobs 
-                        if department in job.get('department', '')]
+    # 分页和排序参数
+    sort = request.args.get('sort', DEFAULT_SORT)
+    if sort not in SORT_KEYS:
+        sort = DEFAULT_SORT
+    page = max(request.args.get('page', 1, type=int) or 1, 1)
+    page_size = request.args.get('page_size', DEFAULT_PAGE_SIZE, type=int) or DEFAULT_PAGE_SIZE
     
-    # 获取可用的城市和部门选项
-    all_cities = set()
-    all_departments = set()
-    for job in jobs:
-        city_list = job.get('city_list', [])
-        if isinstance(city_list, list):
-            for c in city_list:
-                if isinstance(c, dict) and 'name' in c:
-                    all_cities.add(c['name'])
-        
-        dept = job.get('department', '')
-        if dept:
-            all_departments.add(dept)
+    # 过滤职位：关键词走倒排索引，城市和部门走分面位图；无筛选时positions为None，直接切片排好的顺序
+    result = query_index.query(search=search, city=city, department=department)
+    paged = query_index.page(result['positions'], sort=sort, page=page, page_size=page_size)
+    page_jobs = [jobs[position] for position in paged['positions']]
+    total_pages = max((paged['total'] + paged['page_size'] - 1) // paged['page_size'], 1)
     
     job_type_names = {
         'campus': '校园招聘',
@@ -147,11 +112,17 @@ def jobs(job_type):
     }
     
     return render_template('jobs.html', 
-                         jobs=filtered_jobs,
+                         jobs=page_jobs,
+                         total_jobs=paged['total'],
+                         page=page,
+                         page_size=paged['page_size'],
+                         total_pages=total_pages,
+                         current_sort=sort,
+                         sort_options=SORT_OPTIONS,
                          job_type=job_type,
                          job_type_name=job_type_names[job_type],
-                         all_cities=sorted(all_cities),
-                         all_departments=sorted(all_departments),
+                         city_counts=result['city_counts'],
+                         department_counts=result['department_counts'],
                          current_search=search,
                          current_city=city,
                          current_department=department)
@@ -162,30 +133,137 @@ def api_jobs(job_type):
     if job_type not in ['campus', 'intern', 'experienced']:
         return jsonify({'error': 'Invalid job type'}), 404
     
-    data = load_job_data()
-    return jsonify(data.get(job_type, []))
+    store = get_job_store(CACHE_FILE)
+    # 未传分页参数时保持原有行为，返回完整列表
+    if not any(name in request.args for name in ('page', 'page_size', 'sort', 'cursor')):
+        return response_cache.respond(('jobs', job_type), store.signature(),
+                                      lambda: load_jobs_of_type(job_type))
+    
+    sort = request.args.get('sort', DEFAULT_SORT)
+    page = request.args.get('page', 1, type=int) or 1
+    page_size = request.args.get('page_size', DEFAULT_PAGE_SIZE, type=int) or DEFAULT_PAGE_SIZE
+    cursor = request.args.get('cursor')
+    
+    def build_page():
+        query_index = query_index_cache.get(store, job_type)
+        paged = query_index.page(sort=sort, page=page, page_size=page_size, cursor=cursor)
+        return {
+            'jobs': [query_index.jobs[position] for position in paged['positions']],
+            'total': paged['total'],
+            'page_size': paged['page_size'],
+            'next_cursor': paged['next_cursor']
+        }
+    
+    try:
+        return response_cache.respond(('jobs', job_type, sort, page, page_size, cursor),
+                                      store.signature(), build_page)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
 @app.route('/api/stats')
 def api_stats():
     """API接口：获取统计数据"""
-    data = load_job_data()
-    stats = get_statistics(data)
-    return jsonify(stats)
+    # 最近职位数与日期有关，版本中包含当天日期
+    store = get_job_store(CACHE_FILE)
+    signature = store.signature()
+    return response_cache.respond('stats', signature and (signature, datetime.now().date()),
+                                  get_statistics)
+
+@app.route('/api/changes')
+def api_changes():
+    """API接口：获取指定运行之后的职位变更（新增、下线、修改）"""
+    since = request.args.get('since', 0, type=int)
+    limit = request.args.get('limit', 1000, type=int)
+    change_log = ChangeLog(CHANGE_LOG_FILE)
+    oldest = change_log.oldest_run_id
+    return jsonify({
+        'since': since,
+        'last_run_id': change_log.last_run_id,
+        # since之后的部分运行已被压缩，客户端需要重新加载全量数据
+        'truncated': oldest is not None and since + 1 < oldest,
+        'events': change_log.since(since, limit=limit)
+    })
+
+@app.route('/api/download')
+def download_excel():
+    """下载Excel追踪表（按数据版本懒生成）"""
+    try:
+        excel_path = tracker_excel.get(get_job_store(CACHE_FILE))
+    except Exception as e:
+        return jsonify({'error': f'生成Excel失败: {e}'}), 500
+    if excel_path is None:
+        return jsonify({'error': '暂无数据，请先刷新'}), 404
+    return send_file(
+        excel_path,
+        as_attachment=True,
+        download_name=f'bytedance_jobs_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
+    )
+
+@app.route('/api/export')
+def export_jobs():
+    """API接口：按CSV、NDJSON或XLSX格式流式导出职位，筛选条件与职位列表页相同"""
+    job_type = request.args.get('job_type', 'campus')
+    if job_type not in ['campus', 'intern', 'experienced']:
+        return jsonify({'error': 'Invalid job type'}), 404
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'不支持的导出格式: {export_format}'}), 400
+    
+    search = request.args.get('search', '').strip()
+    city = request.args.get('city', '').strip()
+    department = request.args.get('department', '').strip()
+    sort = request.args.get('sort', DEFAULT_SORT)
+    if sort not in SORT_KEYS:
+        sort = DEFAULT_SORT
+    
+    # 职位记录直接取自查询索引持有的数据，按筛选结果的下标顺序逐行输出，不复制整份数据
+    query_index = query_index_cache.get(get_job_store(CACHE_FILE), job_type)
+    filtered = query_index.query(search=search, city=city, department=department)['positions']
+    jobs = OrderedJobs(query_index.jobs, query_index.ordered(filtered, sort=sort))
+    fields = export_fields(jobs, request.args.get('fields', ''))
+    
+    filename = f'bytedance_{job_type}_jobs_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{export_format}'
+    return Response(
+        iter_export(export_format, jobs, fields, sheet_name=job_type),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
 
 @app.route('/api/refresh', methods=['POST'])
 def refresh_data():
     """API接口：刷新数据"""
+    import subprocess
+    import sys
+    from concurrent.futures import TimeoutError as FutureTimeoutError
+    
     try:
-        import subprocess
-        import sys
+        if USE_BROWSER_POOL:
+            from browser_pool import get_browser_service
+            from by import JobMonitor, TASK_CONFIGS, OUTPUT_FILENAME
+            
+            # 在常驻浏览器中执行抓取，跳过Chromium冷启动
+            monitor = JobMonitor(tasks=TASK_CONFIGS, filename=OUTPUT_FILENAME, headless=True,
+                                 lean_navigation=LEAN_NAVIGATION, fetch_mode=FETCH_MODE)
+            get_browser_service().run(
+                lambda pool: monitor.run_async(silent_mode=True, browser_pool=pool),
+                timeout=REFRESH_TIMEOUT
+            )
+            return jsonify({
+                'success': True,
+                'message': '数据刷新成功',
+                'timestamp': datetime.now().isoformat()
+            })
         
         # 在后台运行数据抓取脚本
         result = subprocess.run(
-            [sys.executable, 'by.py'],
+            # Excel在下载时按需生成，刷新时不必等待
+            [sys.executable, 'by.py', '--no-excel']
+            + (['--lean'] if LEAN_NAVIGATION else [])
+            + (['--hybrid'] if FETCH_MODE == 'hybrid' else []),
             cwd=os.path.dirname(__file__),
             capture_output=True,
             text=True,
-            timeout=300  # 5分钟超时
+            timeout=REFRESH_TIMEOUT
         )
         
         if result.returncode == 0:
@@ -201,7 +279,7 @@ def refresh_data():
                 'timestamp': datetime.now().isoformat()
             }), 500
             
-    except subprocess.TimeoutExpired:
+    except (subprocess.TimeoutExpired, FutureTimeoutError):
         return jsonify({
             'success': False,
             'message': '数据刷新超时，请稍后再试',
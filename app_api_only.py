@@ -11,12 +11,14 @@ import logging
 import time
 import random
 from datetime import datetime
-from flask import Flask, render_template, jsonify
+from flask import Flask, render_template, jsonify, send_file
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-import openpyxl
-from openpyxl import Workbook
+
+from excel_export import LazyExcel, StreamingWorkbook
+from job_schema import API_JOB_SCHEMA
+from job_store import get_job_store
 
 # 配置日志
 logging.basicConfig(
@@ -137,17 +139,11 @@ def fetch_jobs_api():
                             if job_data and len(job_data) > 0:
                                 logger.info(f"找到 {len(job_data)} 个职位")
                                 
+                                update_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                                 for item in job_data[:20]:  # 限制20个
                                     try:
-                                        job = {
-                                            'title': item.get('title', item.get('job_title', item.get('name', '未知职位'))),
-                                            'location': item.get('location', item.get('city', item.get('work_location', '未知地点'))),
-                                            'department': item.get('department', item.get('team', item.get('category', '未知部门'))),
-                                            'update_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                                            'source': 'api_direct',
-                                            'job_id': item.get('id', item.get('job_id', '')),
-                                            'description': item.get('description', item.get('requirement', ''))[:200]  # 限制长度
-                                        }
+                                        job = API_JOB_SCHEMA.normalize(item)
+                                        job['update_time'] = update_time
                                         
                                         if job['title'] and job['title'] != '未知职位':
                                             jobs.append(job)
@@ -253,57 +249,38 @@ def save_to_cache(jobs):
             'version': 'api_only'
         }
         
-        with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
+        # 经存储层分块写入，不再先把整个缓存编码成一个字符串
+        get_job_store(CACHE_FILE, backend='json').save(cache_data)
         
         logger.info(f"缓存已更新，共 {len(jobs)} 个职位")
     except Exception as e:
         logger.error(f"保存缓存失败: {e}")
 
 def load_from_cache():
-    """从缓存加载数据"""
+    """从缓存加载数据（进程内缓存，文件修改时间或大小变化时才重新读取）"""
     try:
-        if os.path.exists(CACHE_FILE):
-            with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
+        return get_job_store(CACHE_FILE, backend='json').cached() or None
     except Exception as e:
         logger.error(f"加载缓存失败: {e}")
     return None
 
-def save_to_excel(jobs):
-    """保存到Excel文件"""
-    try:
-        if os.path.exists(EXCEL_FILE):
-            wb = openpyxl.load_workbook(EXCEL_FILE)
-            ws = wb.active
-        else:
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "字节跳动招聘信息"
-            # 添加表头
-            headers = ['职位名称', '工作地点', '部门', '更新时间', '数据源', '职位ID', '职位描述']
-            for col, header in enumerate(headers, 1):
-                ws.cell(row=1, column=col, value=header)
-        
-        # 清除旧数据（保留表头）
-        for row in ws.iter_rows(min_row=2):
-            for cell in row:
-                cell.value = None
-        
-        # 添加新数据
-        for row_idx, job in enumerate(jobs, 2):
-            ws.cell(row=row_idx, column=1, value=job.get('title', ''))
-            ws.cell(row=row_idx, column=2, value=job.get('location', ''))
-            ws.cell(row=row_idx, column=3, value=job.get('department', ''))
-            ws.cell(row=row_idx, column=4, value=job.get('update_time', ''))
-            ws.cell(row=row_idx, column=5, value=job.get('source', ''))
-            ws.cell(row=row_idx, column=6, value=job.get('job_id', ''))
-            ws.cell(row=row_idx, column=7, value=job.get('description', ''))
-        
-        wb.save(EXCEL_FILE)
-        logger.info(f"Excel文件已更新，共 {len(jobs)} 个职位")
-    except Exception as e:
-        logger.error(f"保存Excel失败: {e}")
+EXCEL_HEADERS = ['职位名称', '工作地点', '部门', '更新时间', '数据源', '职位ID', '职位描述']
+EXCEL_FIELDS = ['title', 'location', 'department', 'update_time', 'source', 'job_id', 'description']
+
+def write_excel(filename, cache_data):
+    """把缓存中的职位写入Excel文件"""
+    jobs = cache_data.get('jobs', [])
+    workbook = StreamingWorkbook()
+    workbook.write_sheet(
+        "字节跳动招聘信息",
+        EXCEL_HEADERS,
+        ([job.get(field, '') for field in EXCEL_FIELDS] for job in jobs)
+    )
+    workbook.save(filename)
+    logger.info(f"Excel文件已生成，共 {len(jobs)} 个职位")
+
+# Excel在首次下载时按缓存版本生成，刷新数据时不再生成
+excel_file = LazyExcel(EXCEL_FILE, write_excel)
 
 @app.route('/')
 def index():
@@ -332,7 +309,6 @@ def get_jobs():
             jobs = fetch_jobs_api()
             if jobs:
                 save_to_cache(jobs)
-                save_to_excel(jobs)
                 cache_data = {
                     'jobs': jobs,
                     'last_update': datetime.now().isoformat(),
@@ -381,7 +357,6 @@ def refresh_jobs():
         
         if jobs:
             save_to_cache(jobs)
-            save_to_excel(jobs)
             return jsonify({
                 'success': True,
                 'message': f'成功刷新 {len(jobs)} 个职位信息',
@@ -407,6 +382,22 @@ def refresh_jobs():
             'message': '刷新过程遇到错误'
         }), 500
 
+@app.route('/api/download')
+def download_excel():
+    """下载Excel文件（按缓存版本懒生成）"""
+    try:
+        excel_path = excel_file.get(get_job_store(CACHE_FILE, backend='json'))
+        if excel_path is None:
+            return jsonify({'success': False, 'error': 'Excel文件不存在，请先刷新职位信息'}), 404
+        return send_file(
+            excel_path,
+            as_attachment=True,
+            download_name=f'bytedance_jobs_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
+        )
+    except Exception as e:
+        logger.error(f"下载Excel失败: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/health')
 def health_check():
     """健康检查"""
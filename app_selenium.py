@@ -6,10 +6,9 @@
 """
 
 import os
-import json
 import logging
 from datetime import datetime
-from flask import Flask, render_template, jsonify
+from flask import Flask, render_template, jsonify, send_file
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
@@ -17,8 +16,9 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 import requests
-import openpyxl
-from openpyxl import Workbook
+
+from excel_export import LazyExcel, StreamingWorkbook
+from job_store import get_job_store
 
 # 配置日志
 logging.basicConfig(
@@ -175,55 +175,38 @@ def save_to_cache(jobs):
             'total_count': len(jobs)
         }
         
-        with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
+        # 经存储层分块写入，不再先把整个缓存编码成一个字符串
+        get_job_store(CACHE_FILE, backend='json').save(cache_data)
         
         logger.info(f"缓存已更新，共 {len(jobs)} 个职位")
     except Exception as e:
         logger.error(f"保存缓存失败: {e}")
 
 def load_from_cache():
-    """从缓存加载数据"""
+    """从缓存加载数据（进程内缓存，文件修改时间或大小变化时才重新读取）"""
     try:
-        if os.path.exists(CACHE_FILE):
-            with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
+        return get_job_store(CACHE_FILE, backend='json').cached() or None
     except Exception as e:
         logger.error(f"加载缓存失败: {e}")
     return None
 
-def save_to_excel(jobs):
-    """保存到Excel文件"""
-    try:
-        if os.path.exists(EXCEL_FILE):
-            wb = openpyxl.load_workbook(EXCEL_FILE)
-            ws = wb.active
-        else:
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "字节跳动招聘信息"
-            # 添加表头
-            headers = ['职位名称', '工作地点', '部门', '更新时间', '数据源']
-            for col, header in enumerate(headers, 1):
-                ws.cell(row=1, column=col, value=header)
-        
-        # 清除旧数据（保留表头）
-        for row in ws.iter_rows(min_row=2):
-            for cell in row:
-                cell.value = None
-        
-        # 添加新数据
-        for row_idx, job in enumerate(jobs, 2):
-            ws.cell(row=row_idx, column=1, value=job.get('title', ''))
-            ws.cell(row=row_idx, column=2, value=job.get('location', ''))
-            ws.cell(row=row_idx, column=3, value=job.get('department', ''))
-            ws.cell(row=row_idx, column=4, value=job.get('update_time', ''))
-            ws.cell(row=row_idx, column=5, value=job.get('source', ''))
-        
-        wb.save(EXCEL_FILE)
-        logger.info(f"Excel文件已更新，共 {len(jobs)} 个职位")
-    except Exception as e:
-        logger.error(f"保存Excel失败: {e}")
+EXCEL_HEADERS = ['职位名称', '工作地点', '部门', '更新时间', '数据源']
+EXCEL_FIELDS = ['title', 'location', 'department', 'update_time', 'source']
+
+def write_excel(filename, cache_data):
+    """把缓存中的职位写入Excel文件"""
+    jobs = cache_data.get('jobs', [])
+    workbook = StreamingWorkbook()
+    workbook.write_sheet(
+        "字节跳动招聘信息",
+        EXCEL_HEADERS,
+        ([job.get(field, '') for field in EXCEL_FIELDS] for job in jobs)
+    )
+    workbook.save(filename)
+    logger.info(f"Excel文件已生成，共 {len(jobs)} 个职位")
+
+# Excel在首次下载时按缓存版本生成，刷新数据时不再生成
+excel_file = LazyExcel(EXCEL_FILE, write_excel)
 
 @app.route('/')
 def index():
@@ -252,7 +235,6 @@ def get_jobs():
             jobs = fetch_jobs_selenium()
             if jobs:
                 save_to_cache(jobs)
-                save_to_excel(jobs)
                 cache_data = {
                     'jobs': jobs,
                     'last_update': datetime.now().isoformat(),
@@ -291,7 +273,6 @@ def refresh_jobs():
         
         if jobs:
             save_to_cache(jobs)
-            save_to_excel(jobs)
             return jsonify({
                 'success': True,
                 'message': f'成功刷新 {len(jobs)} 个职位信息',
@@ -310,6 +291,22 @@ def refresh_jobs():
             'error': str(e)
         }), 500
 
+@app.route('/api/download')
+def download_excel():
+    """下载Excel文件（按缓存版本懒生成）"""
+    try:
+        excel_path = excel_file.get(get_job_store(CACHE_FILE, backend='json'))
+        if excel_path is None:
+            return jsonify({'success': False, 'error': 'Excel文件不存在，请先刷新职位信息'}), 404
+        return send_file(
+            excel_path,
+            as_attachment=True,
+            download_name=f'bytedance_jobs_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
+        )
+    except Exception as e:
+        logger.error(f"下载Excel失败: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/health')
 def health_check():
     """健康检查"""
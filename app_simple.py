@@ -5,7 +5,7 @@
 不依赖Playwright，使用requests直接调用API
 """
 
-import json
+import asyncio
 import logging
 import os
 import threading
@@ -13,7 +13,10 @@ import time
 from datetime import datetime
 from pathlib import Path
 from flask import Flask, render_template, jsonify, request, send_file
-from by_simple import SimpleJobMonitor, TASK_CONFIGS, OUTPUT_FILENAME, JSON_CACHE_FILENAME
+from by_simple import SimpleJobMonitor, TASK_CONFIGS, OUTPUT_FILENAME, JSON_CACHE_FILENAME, PAGE_SIZE
+from excel_export import LazyExcel
+from http_cache import ResponseCache
+from job_store import get_job_store
 
 # 配置日志
 logging.basicConfig(
@@ -25,6 +28,16 @@ logging.basicConfig(
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'bytedance-jobs-monitor-simple')
 
+# 监控引擎配置：sync为逐个任务顺序抓取，async为所有任务共享连接池并发抓取
+MONITOR_ENGINE = os.environ.get('MONITOR_ENGINE', 'sync').lower()
+MONITOR_PAGED = os.environ.get('MONITOR_PAGED', 'False').lower() == 'true'
+MONITOR_INCREMENTAL = os.environ.get('MONITOR_INCREMENTAL', 'False').lower() == 'true'
+
+# /api/data 响应缓存：按数据版本生成ETag，并保留压缩后的响应体
+response_cache = ResponseCache()
+# Excel在首次下载时生成，数据版本不变时直接复用，监控任务不再生成
+excel_file = LazyExcel(OUTPUT_FILENAME, SimpleJobMonitor.write_excel)
+
 # 全局变量
 monitor_instance = None
 monitor_thread = None
@@ -37,11 +50,9 @@ monitor_status = {
 }
 
 def load_cached_data():
-    """加载缓存数据"""
+    """加载缓存数据（进程内缓存，数据变化时才重新读取）"""
     try:
-        if JSON_CACHE_FILENAME.exists():
-            with open(JSON_CACHE_FILENAME, 'r', encoding='utf-8') as f:
-                return json.load(f)
+        return get_job_store(JSON_CACHE_FILENAME).cached()
     except Exception as e:
         logging.error(f"加载缓存数据失败: {e}")
     return {}
@@ -56,8 +67,16 @@ def run_monitor_task():
         
         logging.info("开始执行监控任务...")
         
-        monitor = SimpleJobMonitor(tasks=TASK_CONFIGS, filename=OUTPUT_FILENAME)
-        result = monitor.run(silent_mode=True)
+        monitor = SimpleJobMonitor(
+            tasks=TASK_CONFIGS,
+            filename=OUTPUT_FILENAME,
+            page_size=PAGE_SIZE if MONITOR_PAGED else None,
+            incremental=MONITOR_INCREMENTAL
+        )
+        if MONITOR_ENGINE == 'async':
+            result = asyncio.run(monitor.run_async(silent_mode=True))
+        else:
+            result = monitor.run(silent_mode=True)
         
         monitor_status['last_run'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         monitor_status['total_jobs'] = result.get('total_jobs', 0)
@@ -85,7 +104,7 @@ def get_status():
 @app.route('/api/data')
 def get_data():
     """获取职位数据"""
-    try:
+    def build_payload():
         data = load_cached_data()
         
         # 统计信息
@@ -97,12 +116,18 @@ def get_data():
         for category, jobs in data.items():
             stats['categories'][category] = len(jobs)
         
-        return jsonify({
+        return {
             'success': True,
             'data': data,
             'stats': stats,
             'last_updated': monitor_status.get('last_run')
-        })
+        }
+    
+    try:
+        signature = get_job_store(JSON_CACHE_FILENAME).signature()
+        # last_updated 随监控运行变化，与数据签名一起组成版本
+        version = signature and (signature, monitor_status.get('last_run'))
+        return response_cache.respond('data', version, build_payload)
     
     except Exception as e:
         return jsonify({
@@ -139,11 +164,12 @@ def run_monitor():
 
 @app.route('/api/download')
 def download_excel():
-    """下载Excel文件"""
+    """下载Excel文件（按数据版本懒生成）"""
     try:
-        if OUTPUT_FILENAME.exists():
+        excel_path = excel_file.get(get_job_store(JSON_CACHE_FILENAME))
+        if excel_path is not None:
             return send_file(
-                OUTPUT_FILENAME,
+                excel_path,
                 as_attachment=True,
                 download_name=f'bytedance_jobs_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
             )
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+职位缓存格式基准测试
+对比原先的缩进JSON缓存（逐个单元格转换记录 + json.dump(indent=2)，读取后重建DataFrame）
+与列式 .npz 缓存的保存耗时、读取耗时和文件大小，并测试只读取部分列的耗时
+
+用法: python benchmarks/bench_cache_format.py
+"""
+
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from job_columns import load_frames, save_frames  # noqa: E402
+
+JOB_COUNTS = [10_000, 100_000]
+REPEAT = 3
+PROJECTED_COLUMNS = ['job_id', 'title', 'publish_time', 'is_new']
+
+
+def make_frame(size: int) -> pd.DataFrame:
+    random.seed(size)
+    rows = []
+    for job_id in range(size):
+        rows.append({
+            'job_id': str(7_000_000_000_000_000_000 + job_id),
+            'code': f"A{job_id:08d}",
+            'title': f"后端开发工程师-{random.choice(['抖音', '飞书', '火山引擎', '电商'])}-{job_id}",
+            'description': f"团队介绍：负责核心业务 {job_id}\n职位描述：1、参与系统设计；2、编写高质量代码" * 3,
+            'requirement': "1、计算机相关专业；2、熟悉至少一门编程语言；3、良好的沟通能力",
+            'city_list': random.choice(['北京', '上海', '北京,上海', '深圳,杭州']),
+            'department': random.choice(['技术', '产品', None]),
+            'publish_time': pd.Timestamp(1_600_000_000 + random.randint(0, 10_000_000), unit='s').strftime('%Y-%m-%d %H:%M:%S'),
+            'is_new': random.random() < 0.05,
+        })
+    df = pd.DataFrame(rows)
+    df['highlight_time'] = None
+    return df
+
+
+def legacy_save(path: Path, frames) -> None:
+    """改造前 JobMonitor._save_json_cache 的写法。"""
+    cache_data = {}
+    for sheet_name, df in frames.items():
+        records = df.to_dict('records')
+        for record in records:
+            for key, value in record.items():
+                if pd.isna(value):
+                    record[key] = None
+                elif isinstance(value, (pd.Timestamp, datetime)):
+                    record[key] = str(value)
+        cache_data[sheet_name] = records
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(cache_data, f, ensure_ascii=False, indent=2)
+
+
+def legacy_load(path: Path):
+    with open(path, 'r', encoding='utf-8') as f:
+        cache_data = json.load(f)
+    return {sheet_name: pd.DataFrame(records) for sheet_name, records in cache_data.items()}
+
+
+def best_of(func, *args, **kwargs) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    print(f"{'职位数':>8} {'格式':>8} {'保存(ms)':>10} {'读取(ms)':>10} {'读取4列(ms)':>12} {'大小(MB)':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in JOB_COUNTS:
+            frames = {'experienced': make_frame(size)}
+            json_path = Path(tmp) / 'cache.json'
+            npz_path = Path(tmp) / 'cache.npz'
+
+            save_json = best_of(legacy_save, json_path, frames)
+            load_json = best_of(legacy_load, json_path)
+            save_npz = best_of(save_frames, npz_path, frames)
+            load_npz = best_of(load_frames, npz_path)
+            load_projected = best_of(load_frames, npz_path, columns=PROJECTED_COLUMNS)
+
+            loaded = load_frames(npz_path)['experienced']
+            assert loaded.equals(frames['experienced']), "列式缓存往返结果不一致"
+
+            print(f"{size:>8} {'json':>8} {save_json * 1000:>10.1f} {load_json * 1000:>10.1f} {'-':>12} "
+                  f"{json_path.stat().st_size / 1e6:>10.2f}")
+            print(f"{size:>8} {'npz':>8} {save_npz * 1000:>10.1f} {load_npz * 1000:>10.1f} {load_projected * 1000:>12.1f} "
+                  f"{npz_path.stat().st_size / 1e6:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Excel导出基准测试
+对比原先的两遍写法（pd.ExcelWriter 写出 → openpyxl.load_workbook 读回 → iterrows 逐格上色 → 再次保存）
+与只写模式单遍流式导出的耗时和文件大小
+
+用法: python benchmarks/bench_excel_export.py
+"""
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import openpyxl
+import pandas as pd
+from openpyxl.styles import PatternFill
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from excel_export import write_frames  # noqa: E402
+
+ROW_COUNTS = [5_000, 50_000]
+NEW_RATIO = 0.05
+
+
+def make_frame(size: int) -> pd.DataFrame:
+    random.seed(size)
+    return pd.DataFrame({
+        '职位标题': [f"后端开发工程师-{i}" for i in range(size)],
+        '团队介绍': [f"负责核心业务 {i} 的系统设计与研发" for i in range(size)],
+        '岗位细节': ["1、参与系统设计；2、编写高质量代码；3、持续优化性能"] * size,
+        '职位要求': ["1、计算机相关专业；2、熟悉至少一门编程语言"] * size,
+        '发布时间': ['2024-06-01 10:00:00'] * size,
+        '职位编号': [f"A{i:08d}" for i in range(size)],
+        '职位链接': [f"https://jobs.bytedance.com/campus/position/{i}/detail" for i in range(size)],
+        '更新时间': ['2024-06-02 08:00:00' if random.random() < NEW_RATIO else None for _ in range(size)],
+    })
+
+
+def legacy_export(filename: Path, frames) -> None:
+    """改造前 JobMonitor._save_and_highlight 的写法。"""
+    with pd.ExcelWriter(filename, engine='openpyxl') as writer:
+        for sheet_name, df in frames.items():
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+    workbook = openpyxl.load_workbook(filename)
+    highlight_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
+    for sheet_name, df in frames.items():
+        worksheet = workbook[sheet_name]
+        for idx, row in df.iterrows():
+            if pd.notna(row.get('更新时间')):
+                for col in range(1, len(df.columns) + 1):
+                    worksheet.cell(row=idx + 2, column=col).fill = highlight_fill
+    workbook.save(filename)
+
+
+def timed(func, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    print(f"{'行数':>8} {'旧写法(s)':>10} {'流式(s)':>10} {'旧文件(MB)':>12} {'新文件(MB)':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in ROW_COUNTS:
+            frames = {'intern': make_frame(size)}
+            legacy_path = Path(tmp) / 'legacy.xlsx'
+            streaming_path = Path(tmp) / 'streaming.xlsx'
+
+            legacy = timed(legacy_export, legacy_path, frames)
+            streaming = timed(write_frames, streaming_path, frames, highlight_column='更新时间')
+
+            print(f"{size:>8} {legacy:>10.2f} {streaming:>10.2f} "
+                  f"{legacy_path.stat().st_size / 1e6:>12.2f} {streaming_path.stat().st_size / 1e6:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+职位记录规整基准测试
+对比 by.py 原先逐字段链式 get / isinstance 构造 job_info 的写法，
+与 job_schema 按字段表编译出的规整函数，在2000条 job_post_list 职位上的耗时，并校验两者输出一致
+
+用法: python benchmarks/bench_job_normalizer.py
+"""
+
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from job_schema import task_schema  # noqa: E402
+
+RECORD_COUNT = 2000
+REPEAT = 20
+EXTRA_FIELDS = ['location', 'department']
+CITIES = [('北京', 'CT_11'), ('上海', 'CT_125'), ('深圳', 'CT_128'), ('杭州', 'CT_52'), ('成都', 'CT_22')]
+
+
+def make_job_post_list(size: int) -> List[Dict[str, Any]]:
+    """按接口 job_post_list 的结构生成职位。"""
+    random.seed(size)
+    jobs = []
+    for i in range(size):
+        cities = random.sample(CITIES, random.randint(1, 3))
+        jobs.append({
+            'id': str(7000000000000000000 + i),
+            'title': f"后端开发工程师-{i}",
+            'sub_title': None,
+            'description': f"团队介绍：负责核心业务 {i}\n\n1、参与系统设计\n2、编写高质量代码",
+            'requirement': "1、计算机相关专业\n2、熟悉至少一门编程语言",
+            'publish_time': 1717200000000 + i * 60000,
+            'code': f"A{i:08d}",
+            'job_type': None,
+            'job_category': {'id': '6704215862603155720', 'name': '研发', 'parent': None},
+            'job_function': None,
+            'department_id': None,
+            'job_process_id': '6890840516938696967',
+            'recruit_type': {'id': '201', 'name': '实习', 'parent': {'id': '2', 'name': '校招'}},
+            'job_subject': {'id': '7194661644654577981', 'name': {'zh_cn': '日常实习', 'en_us': 'Intern'}},
+            'city_list': [{'code': code, 'name': name, 'location_type': None} for name, code in cities],
+            'address': None,
+            'degree': None,
+            'experience': None,
+            'min_salary': None,
+            'max_salary': None,
+            'currency': None,
+            'head_count': 0,
+            'job_hot_flag': None,
+            'is_urgent': random.random() < 0.1,
+            'job_active_status': 1,
+            'recommend_id': None,
+            'team_name': None,
+            'brand_name': None,
+            'ats_online_apply': True,
+            'pc_job_url': '',
+            'wap_job_url': '',
+            'storefront_mode': 2,
+            'process_type': 1,
+            'location': {'code': cities[0][1], 'name': cities[0][0]},
+            'department': None,
+        })
+    return jobs
+
+
+def legacy_parse(job_list: List[Dict[str, Any]], task_config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """改造前 JobMonitor._parse_job_list 的写法。"""
+    scraped_jobs: List[Dict[str, Any]] = []
+    
+    for job in job_list:
+        publish_time = datetime.fromtimestamp(job["publish_time"] / 1000)
+        
+        # 扩展job_info，包含更多API字段
+        job_info = {
+            # 基础信息
+            "title": job.get("title"),
+            "sub_title": job.get("sub_title"),
+            "description": job.get("description"),
+            "requirement": job.get("requirement"),
+            "publish_time": publish_time.strftime("%Y-%m-%d %H:%M:%S"),
+            "code": job.get("code"),
+            
+            # 职位基本信息
+            "job_id": job.get("id"),
+            "job_type": job.get("job_type"),
+            "job_category": job.get("job_category", {}).get("name") if isinstance(job.get("job_category"), dict) else job.get("job_category"),
+            "job_function": job.get("job_function", {}).get("name") if isinstance(job.get("job_function"), dict) else job.get("job_function"),
+            "department_id": job.get("department_id"),
+            "job_process_id": job.get("job_process_id"),
+            
+            # 招聘类型和项目信息
+            "recruit_type_name": job.get("recruit_type", {}).get("name") if isinstance(job.get("recruit_type"), dict) else None,
+            "recruit_type_parent": job.get("recruit_type", {}).get("parent", {}).get("name") if isinstance(job.get("recruit_type"), dict) and job.get("recruit_type", {}).get("parent") else None,
+            "job_subject_name": job.get("job_subject", {}).get("name", {}).get("zh_cn") if isinstance(job.get("job_subject"), dict) and isinstance(job.get("job_subject", {}).get("name"), dict) else job.get("job_subject", {}).get("name") if isinstance(job.get("job_subject"), dict) else None,
+            
+            # 地理位置信息
+            "city_list": ", ".join([city.get("name", "") for city in job.get("city_list", []) if isinstance(city, dict)]) if job.get("city_list") else None,
+            "city_codes": ", ".join([city.get("code", "") for city in job.get("city_list", []) if isinstance(city, dict)]) if job.get("city_list") else None,
+            "address": job.get("address"),
+            
+            # 职位要求
+            "degree": job.get("degree"),
+            "experience": job.get("experience"),
+            "min_salary": job.get("min_salary"),
+            "max_salary": job.get("max_salary"),
+            "currency": job.get("currency"),
+            "head_count": job.get("head_count"),
+            
+            # 职位状态和标识
+            "job_hot_flag": job.get("job_hot_flag"),
+            "is_urgent": job.get("is_urgent"),
+            "job_active_status": job.get("job_active_status"),
+            "recommend_id": job.get("recommend_id"),
+            
+            # 其他信息
+            "team_name": job.get("team_name"),
+            "brand_name": job.get("brand_name"),
+            "ats_online_apply": job.get("ats_online_apply"),
+            "pc_job_url": job.get("pc_job_url"),
+            "wap_job_url": job.get("wap_job_url"),
+            "storefront_mode": job.get("storefront_mode"),
+            "process_type": job.get("process_type"),
+        }
+        
+        # 处理配置中的额外字段
+        for field in task_config['extra_fields']:
+            value = job.get(field)
+            job_info[field] = value.get('name') if isinstance(value, dict) else value
+        
+        # 清理None值，保持数据整洁
+        job_info = {k: v for k, v in job_info.items() if v is not None and v != ''}
+        
+        scraped_jobs.append(job_info)
+    
+    
+    return scraped_jobs
+
+
+def compiled_parse(job_list: List[Dict[str, Any]], task_config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    normalize = task_schema(tuple(task_config['extra_fields'])).normalize
+    return [normalize(job) for job in job_list]
+
+
+def timed(func, *args) -> float:
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    job_list = make_job_post_list(RECORD_COUNT)
+    task_config = {'extra_fields': EXTRA_FIELDS}
+    if legacy_parse(job_list, task_config) != compiled_parse(job_list, task_config):
+        raise SystemExit("两种写法的输出不一致")
+
+    legacy = timed(legacy_parse, job_list, task_config)
+    compiled = timed(compiled_parse, job_list, task_config)
+    print(f"{RECORD_COUNT} 条职位（{REPEAT} 次取最快）")
+    print(f"{'链式get(ms)':>12} {'编译规整(ms)':>12} {'加速比':>8}")
+    print(f"{legacy * 1000:>12.2f} {compiled * 1000:>12.2f} {legacy / compiled:>8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
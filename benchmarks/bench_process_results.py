@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JobMonitor._process_results 增量合并基准测试
+对比旧实现（全量拼接、逐行重新哈希、去重、整体排序）与基于职位索引的有序插入，
+观察运行耗时随历史数据量和本次新增量的变化
+
+用法: python benchmarks/bench_process_results.py
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from by import JobMonitor, OUTPUT_FILENAME  # noqa: E402
+from job_index import compute_fingerprints  # noqa: E402
+
+HISTORY_SIZES = [10_000, 50_000, 100_000]
+DELTA_SIZES = [10, 100, 1_000]
+REPEAT = 3
+
+
+def make_job(job_id: int, publish_seconds: int) -> dict:
+    return {
+        'job_id': str(job_id),
+        'code': f"A{job_id:08d}",
+        'title': f"后端开发工程师-{job_id}",
+        'description': f"团队介绍：负责核心业务 {job_id}\n职位描述：1、参与系统设计；2、编写高质量代码",
+        'requirement': "1、计算机相关专业；2、熟悉至少一门编程语言",
+        'publish_time': pd.Timestamp(1_600_000_000 + publish_seconds, unit='s').strftime('%Y-%m-%d %H:%M:%S'),
+        'city_list': '北京,上海',
+    }
+
+
+def make_history(size: int) -> pd.DataFrame:
+    df = pd.DataFrame([make_job(i, random.randint(0, 10_000_000)) for i in range(size)])
+    df['is_new'] = False
+    df['highlight_time'] = None
+    return df
+
+
+def make_delta(history_size: int, delta_size: int) -> list:
+    # 一半是新职位，一半是已存在职位（其中部分内容有变化）
+    jobs = [make_job(history_size + i, 10_000_000 + i) for i in range(delta_size // 2)]
+    for job_id in random.sample(range(history_size), delta_size - len(jobs)):
+        job = make_job(job_id, random.randint(0, 10_000_000))
+        if random.random() < 0.2:
+            job['requirement'] += '；有大型项目经验优先'
+        jobs.append(job)
+    return jobs
+
+
+def legacy_process(existing_df: pd.DataFrame, delta: list) -> pd.DataFrame:
+    """改造前的合并方式：每次运行都对全部历史数据逐行哈希并重新排序。"""
+    import hashlib
+
+    def job_hash(row):
+        content = f"{row.get('code', '')}{row.get('title', '')}{row.get('description', '')}{row.get('requirement', '')}"
+        return hashlib.md5(content.encode('utf-8')).hexdigest()
+
+    new_df = pd.DataFrame(delta)
+    existing_hashes = set(existing_df.apply(job_hash, axis=1))
+    new_df['is_new'] = ~new_df.apply(job_hash, axis=1).isin(existing_hashes)
+    combined_df = pd.concat([existing_df, new_df], ignore_index=True)
+    combined_df['job_hash'] = combined_df.apply(job_hash, axis=1)
+    combined_df = combined_df.drop_duplicates(subset=['job_hash'], keep='last').drop(columns=['job_hash'])
+    return combined_df.sort_values(by=['is_new', 'publish_time'], ascending=[False, False])
+
+
+def indexed_process(monitor: JobMonitor, existing_df, index, delta: list) -> pd.DataFrame:
+    monitor.results = [('intern', '实习招聘', delta)]
+    return monitor._process_results({'intern': index}, {'intern': existing_df})['data_frames']['intern']
+
+
+def best_of(func, *args) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    random.seed(42)
+    monitor = JobMonitor(tasks=[], filename=OUTPUT_FILENAME)
+
+    print(f"{'历史职位':>10} {'新增':>6} {'旧实现(ms)':>12} {'索引合并(ms)':>14} {'其中哈希+插入(ms)':>18}")
+    for history_size in HISTORY_SIZES:
+        history = make_history(history_size)
+        existing_df, index = monitor._index_dataframe(history)
+        for delta_size in DELTA_SIZES:
+            delta = make_delta(history_size, delta_size)
+            delta_df = pd.DataFrame(delta)
+
+            legacy = best_of(legacy_process, history, delta)
+            indexed = best_of(indexed_process, monitor, existing_df, index, delta)
+            # 只统计与新增量相关的部分：新职位指纹计算和索引插入
+            core = best_of(lambda: index.splice(
+                index.lookup(compute_fingerprints(delta_df))[:0], compute_fingerprints(delta_df),
+                np.zeros(len(delta_df), dtype=np.int64)))
+
+            print(f"{history_size:>10} {delta_size:>6} {legacy * 1000:>12.1f} {indexed * 1000:>14.1f} {core * 1000:>18.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常驻Playwright浏览器池
+让多次监控运行复用同一个Chromium进程和按任务划分的BrowserContext，
+按运行次数或内存上限定期回收浏览器
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Playwright
+
+# 浏览器回收策略
+MAX_RUNS_PER_BROWSER = int(os.getenv('BROWSER_MAX_RUNS', 50))  # 运行多少次后重启浏览器
+MAX_BROWSER_MEMORY_MB = int(os.getenv('BROWSER_MAX_MEMORY_MB', 800))  # 浏览器进程树内存上限
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36"
+
+
+def _process_tree_rss_mb(marker: str) -> float:
+    """统计命令行包含marker的进程（本池启动的Chromium主进程）及其所有子孙进程的常驻内存，单位MB。
+
+    只统计浏览器自己的进程树，Web进程的其他子进程不计入。依赖/proc，非Linux平台返回0，此时只按运行次数回收。
+    """
+    proc = Path('/proc')
+    if not proc.exists():
+        return 0.0
+
+    children: Dict[int, list] = {}
+    rss_pages: Dict[int, int] = {}
+    roots = []
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / 'stat').read_text()
+            statm = (entry / 'statm').read_text()
+            cmdline = (entry / 'cmdline').read_bytes()
+        except OSError:
+            continue
+        pid = int(entry.name)
+        # comm字段可能包含空格，从最后一个')'之后开始解析
+        ppid = int(stat[stat.rfind(')') + 2:].split()[1])
+        children.setdefault(ppid, []).append(pid)
+        rss_pages[pid] = int(statm.split()[1])
+        if marker.encode() in cmdline.split(b'\0'):
+            roots.append(pid)
+
+    total_pages = 0
+    seen = set()
+    stack = roots
+    while stack:
+        pid = stack.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        total_pages += rss_pages.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+class BrowserPool:
+    """跨运行复用的浏览器及BrowserContext池。
+
+    每个任务（按sheet_name）独占一个BrowserContext，运行结束后只关闭页面，
+    上下文连同Cookie一起保留到下次运行。浏览器在运行次数达到max_runs
+    或进程树内存超过max_memory_mb后，于两次运行之间重启。
+    """
+
+    def __init__(self, headless: bool = True, max_runs: int = MAX_RUNS_PER_BROWSER,
+                 max_memory_mb: int = MAX_BROWSER_MEMORY_MB):
+        self.headless = headless
+        self.max_runs = max_runs
+        self.max_memory_mb = max_memory_mb
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._contexts: Dict[str, BrowserContext] = {}
+        self._runs = 0
+        self._lock: Optional[asyncio.Lock] = None
+        # Chromium会忽略不认识的命令行开关，用它在/proc中找出本池启动的浏览器进程
+        self._marker = f"--browser-pool-id={os.getpid()}-{id(self)}"
+
+    @property
+    def is_running(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    async def _ensure_browser(self) -> Browser:
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        if not self.is_running:
+            self._contexts.clear()
+            self._browser = await self._playwright.chromium.launch(headless=self.headless, args=[self._marker])
+            self._runs = 0
+            logging.info("🌐 浏览器池已启动新的Chromium实例")
+        return self._browser
+
+    async def acquire_context(self, key: str) -> BrowserContext:
+        """获取任务专用的BrowserContext，不存在时新建。"""
+        context = self._contexts.get(key)
+        if context is None:
+            browser = await self._ensure_browser()
+            context = await browser.new_context(user_agent=USER_AGENT)
+            self._contexts[key] = context
+        return context
+
+    async def release_context(self, key: str, context: BrowserContext) -> None:
+        """归还上下文：关闭其中的页面，保留上下文本身供下次运行复用。"""
+        try:
+            for page in list(context.pages):
+                await page.close()
+        except Exception as e:
+            # 上下文已失效，丢弃后下次重新创建
+            logging.warning(f"归还浏览器上下文 '{key}' 时出错: {e}")
+            self._contexts.pop(key, None)
+
+    @asynccontextmanager
+    async def session(self):
+        """包裹一次完整的监控运行：串行化并发运行，结束后按策略决定是否回收浏览器。"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            await self._ensure_browser()
+            try:
+                yield self
+            finally:
+                self._runs += 1
+                await self._recycle_if_needed()
+
+    async def _recycle_if_needed(self) -> None:
+        memory_mb = _process_tree_rss_mb(self._marker)
+        if self._runs >= self.max_runs:
+            logging.info(f"♻️ 浏览器已运行 {self._runs} 次，重启以释放资源")
+        elif self.max_memory_mb and memory_mb > self.max_memory_mb:
+            logging.info(f"♻️ 浏览器内存 {memory_mb:.0f}MB 超过上限 {self.max_memory_mb}MB，重启以释放资源")
+        else:
+            return
+        await self._close_browser()
+
+    async def _close_browser(self) -> None:
+        for context in self._contexts.values():
+            try:
+                await context.close()
+            except Exception:
+                pass
+        self._contexts.clear()
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+
+    async def close(self) -> None:
+        """关闭浏览器和Playwright驱动。"""
+        await self._close_browser()
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+class BrowserService:
+    """在后台线程的常驻事件循环中托管BrowserPool，供Flask等同步代码提交运行。"""
+
+    def __init__(self, headless: bool = True):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='browser-pool', daemon=True)
+        self._thread.start()
+        self.pool = BrowserPool(headless=headless)
+
+    def run(self, job: Callable[[BrowserPool], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """在浏览器池的事件循环中执行job(pool)并等待结果。超时抛出concurrent.futures.TimeoutError。"""
+        future = asyncio.run_coroutine_threadsafe(job(self.pool), self._loop)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            # 取消事件循环中仍在运行的任务，释放浏览器池的锁，避免后续运行一直排队
+            future.cancel()
+            raise
+
+    def shutdown(self) -> None:
+        asyncio.run_coroutine_threadsafe(self.pool.close(), self._loop).result(timeout=30)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+_service: Optional[BrowserService] = None
+_service_lock = threading.Lock()
+
+
+def get_browser_service() -> BrowserService:
+    """返回进程级共享的BrowserService，首次调用时创建。"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = BrowserService()
+        return _service
@@ -1,19 +1,32 @@
 # bytedance_job_monitor.py
 
 import asyncio
-import hashlib
 import json
 import logging
+import os
 import subprocess
 import sys
+from collections import Counter
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Set, Any
+from typing import Dict, List, Any, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
-import openpyxl
+import numpy as np
 import pandas as pd
-from openpyxl.styles import PatternFill
-from playwright.async_api import async_playwright, Browser
+from playwright.async_api import async_playwright, Browser, Page, Request, Response, Route
+
+from browser_pool import BrowserPool, USER_AGENT
+from change_log import ChangeLog, EVENT_ADDED, EVENT_MODIFIED, EVENT_REMOVED
+from crawl_state import NavigationStats, WatermarkStore
+from hybrid_fetcher import HybridFetcher
+from excel_export import LazyExcel, write_tracker_workbook
+from job_columns import frame_records
+from job_index import JobHashIndex, compute_fingerprints, compute_order_keys, load_indexes, save_indexes
+from job_stats import compute_statistics, save_stats
+from job_schema import task_schema
+from job_text import segment_frame
+from job_store import BINARY_BACKENDS, get_job_store
 
 # --- 1. 配置区 ---
 
@@ -31,6 +44,18 @@ DATA_PATH = PROJECT_PATH / "data"
 DATA_PATH.mkdir(exist_ok=True)  # 确保data目录存在
 OUTPUT_FILENAME = DATA_PATH / "bytedance_jobs_tracker.xlsx"
 JSON_CACHE_FILENAME = DATA_PATH / "bytedance_jobs_cache.json"
+HASH_INDEX_FILENAME = DATA_PATH / "bytedance_jobs_hashes.npz"
+WATERMARK_FILENAME = DATA_PATH / "crawl_watermarks.json"
+NAVIGATION_STATS_FILENAME = DATA_PATH / "navigation_stats.json"
+SESSION_CREDENTIALS_FILENAME = DATA_PATH / "session_credentials.json"
+CHANGE_LOG_FILENAME = DATA_PATH / "job_changes.ndjson"
+STATS_FILENAME = DATA_PATH / "bytedance_jobs_stats.json"
+
+# 使用列式存储或共享快照（JOB_STORE=columnar/snapshot）时，是否同时导出JSON缓存供其他程序读取
+JSON_EXPORT = os.getenv('JSON_EXPORT', 'True').lower() == 'true'
+
+# 增量抓取时首屏请求的职位数，稳态运行中新职位通常远少于此数
+INCREMENTAL_PAGE_SIZE = 100
 
 # 任务配置
 TASK_CONFIGS: List[Dict[str, Any]] = [
@@ -60,88 +85,186 @@ TASK_CONFIGS: List[Dict[str, Any]] = [
     }
 ]
 
+# 精简导航配置：只放行触发职位接口所需的文档、脚本和接口请求
+BLOCKED_RESOURCE_TYPES = {'image', 'font', 'stylesheet', 'media', 'manifest', 'texttrack', 'other'}
+FIRST_PARTY_HOST_SUFFIXES = ('bytedance.com', 'bytescm.com', 'pstatp.com', 'byteimg.com', 'bytecdn.cn')
+TRACKING_HOST_LABELS = {'mcs', 'mon', 'slardar', 'tea', 'log', 'analytics', 'tracker'}
+
 # --- 2. 核心逻辑区 ---
 
+class RequestInterceptor:
+    """统计页面加载的请求数和字节数；开启拦截时中止与职位接口无关的请求。
+
+    字节数取自每个完成请求的 request.sizes()（响应头+响应体的实际大小），
+    不依赖可能缺失的 content-length 头（分块传输、压缩响应通常没有）。
+    """
+
+    def __init__(self, api_url_mark: str, block: bool):
+        self.api_url_mark = api_url_mark
+        self.block = block
+        self.loaded_requests = 0
+        self.loaded_bytes = 0
+        self.blocked_requests = 0
+        self.blocked_by_type: Counter = Counter()
+        # 大小未能测得的请求数；不为0时本次统计不完整，不能作为或对比基线
+        self.unmeasured_requests = 0
+        # 本次运行截获职位接口的导航次数，以及精简导航是否因失败退回了完整页面
+        self.navigations = 0
+        self.fell_back = False
+        self._pending: set = set()
+
+    async def attach(self, page: Page) -> None:
+        page.on("requestfinished", self._on_request_finished)
+        if self.block:
+            await page.route("**/*", self._handle_route)
+
+    async def detach(self, page: Page) -> None:
+        """停止拦截，页面之后按完整模式加载。"""
+        if self.block:
+            await page.unroute("**/*", self._handle_route)
+            self.block = False
+            self.fell_back = True
+
+    def should_block(self, request: Request) -> bool:
+        if self.api_url_mark in request.url:
+            return False
+        if request.resource_type in BLOCKED_RESOURCE_TYPES:
+            return True
+        host = urlsplit(request.url).hostname or ''
+        if not any(host == suffix or host.endswith('.' + suffix) for suffix in FIRST_PARTY_HOST_SUFFIXES):
+            return True
+        return any(label in TRACKING_HOST_LABELS for label in host.split('.'))
+
+    async def _handle_route(self, route: Route) -> None:
+        request = route.request
+        if self.should_block(request):
+            self.blocked_requests += 1
+            self.blocked_by_type[request.resource_type] += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def _on_request_finished(self, request: Request) -> None:
+        self.loaded_requests += 1
+        task = asyncio.ensure_future(self._measure(request))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _measure(self, request: Request) -> None:
+        try:
+            sizes = await request.sizes()
+            self.loaded_bytes += sizes['responseHeadersSize'] + sizes['responseBodySize']
+        except Exception:
+            self.unmeasured_requests += 1
+
+    async def settle(self) -> None:
+        """等待已完成请求的大小统计全部返回。"""
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+    @property
+    def is_comparable(self) -> bool:
+        """统计是否可以作为或对比完整导航基线：只导航一次任务页面、没有退回完整模式且所有请求都测得了大小。"""
+        return self.navigations == 1 and not self.fell_back and self.unmeasured_requests == 0
+
+
 class JobMonitor:
     """字节跳动职位监控器（异步版），封装了抓取、数据处理、保存和通知的全部逻辑。"""
 
-    def __init__(self, tasks: List[Dict[str, Any]], filename: Path, headless: bool = True):
+    def __init__(self, tasks: List[Dict[str, Any]], filename: Path, headless: bool = True, incremental: bool = False,
+                 lean_navigation: bool = False, fetch_mode: str = 'browser', build_excel: bool = False):
         self.tasks = tasks
         self.filename = filename
+        # 运行结束时是否立即生成Excel；Web应用在下载时按需生成，命令行运行默认生成
+        self.build_excel = build_excel
         self.json_cache_filename = JSON_CACHE_FILENAME
+        # 数据存储后端由环境变量 JOB_STORE 选择（json 或 sqlite）
+        self.store = get_job_store(JSON_CACHE_FILENAME)
         self.headless = headless
+        # 增量模式：只请求最新一页，遇到上次见过的职位即停止，新增部分与已有数据合并
+        self.incremental = incremental
+        self.watermarks = WatermarkStore(WATERMARK_FILENAME)
+        # 精简导航：拦截图片、字体、样式和第三方请求，只保留触发职位接口所需的资源
+        self.lean_navigation = lean_navigation
+        self.navigation_stats = NavigationStats(NAVIGATION_STATS_FILENAME)
+        # 混合模式：优先用缓存的会话凭据直接重放接口，凭据失效的任务才启动浏览器
+        self.hybrid = HybridFetcher(SESSION_CREDENTIALS_FILENAME) if fetch_mode == 'hybrid' else None
         self.results: List[tuple[str, str, List[Dict[str, Any]]]] = []
+        # 合并后各工作表的职位索引，与最终数据框的行顺序一一对应
+        self.job_indexes: Dict[str, JobHashIndex] = {}
+        # 本次只抓到增量的工作表，无法据此判断哪些职位已下线
+        self.partial_sheets: set = set()
+        # 职位新增、下线、修改事件日志
+        self.change_log = ChangeLog(CHANGE_LOG_FILENAME)
 
-    @staticmethod
-    def _generate_job_hash(job_data: Dict[str, Any]) -> str:
-        """为职位数据生成唯一的MD5哈希值，用于识别重复职位。"""
-        key_fields = ['code', 'title', 'description', 'requirement']
-        hash_string = ''.join(str(job_data.get(field, '')) for field in key_fields)
-        return hashlib.md5(hash_string.encode('utf-8')).hexdigest()
-    
-    def _save_json_cache(self, data_frames: Dict[str, pd.DataFrame]) -> None:
-        """将数据保存为JSON缓存文件。"""
+    def _save_json_cache(self, data_frames: Dict[str, pd.DataFrame]) -> bool:
+        """将数据保存到职位存储（JSON缓存文件、SQLite数据库或列式缓存文件），返回职位存储是否保存成功。"""
         try:
-            cache_data = {}
-            for sheet_name, df in data_frames.items():
-                # 将DataFrame转换为字典列表，处理时间格式
-                records = df.to_dict('records')
-                for record in records:
-                    # 确保所有值都是JSON可序列化的
-                    for key, value in record.items():
-                        if pd.isna(value):
-                            record[key] = None
-                        elif isinstance(value, (pd.Timestamp, datetime)):
-                            record[key] = str(value)
-                cache_data[sheet_name] = records
+            # 空值转为None、时间转为字符串，按列批量处理
+            cache_data = {sheet_name: frame_records(df) for sheet_name, df in data_frames.items()}
             
-            with open(self.json_cache_filename, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
-            
-            logging.info(f"💾 JSON缓存已保存至: {self.json_cache_filename}")
+            if hasattr(self.store, 'save_frames'):
+                # 列式存储直接保存DataFrame
+                self.store.save_frames(data_frames)
+            else:
+                self.store.save(cache_data)
+            logging.info(f"💾 职位数据已保存至{self.store.backend}存储: {self.store.path}")
         except Exception as e:
             logging.error(f"⚠️ 保存JSON缓存时出错: {e}")
+            return False
+        
+        try:
+            if JSON_EXPORT and self.store.backend in BINARY_BACKENDS:
+                # JSON缓存作为附带导出
+                get_job_store(JSON_CACHE_FILENAME, backend='json').save(cache_data)
+            
+            signature = self.store.signature()
+            
+            # 统计快照供Web应用直接读取，不必每次请求遍历全部职位
+            save_stats(STATS_FILENAME, compute_statistics(cache_data), signature)
+            
+            # 指纹索引与缓存文件签名绑定，下次运行直接加载；合并时已维护的索引无需重新计算
+            indexes = {}
+            for sheet_name, df in data_frames.items():
+                index = self.job_indexes.get(sheet_name)
+                indexes[sheet_name] = index if index is not None and len(index) == len(df) else JobHashIndex.from_dataframe(df)
+            save_indexes(HASH_INDEX_FILENAME, indexes, signature)
+        except Exception as e:
+            # 统计快照和指纹索引是派生数据，出错时下次读取会按签名重新生成
+            logging.error(f"⚠️ 保存统计快照或指纹索引时出错: {e}")
+        return True
     
     def _load_json_cache(self) -> Dict[str, pd.DataFrame]:
-        """从JSON缓存文件加载数据。"""
+        """从职位存储（JSON缓存文件、SQLite数据库或列式缓存文件）加载数据。"""
         cache_dataframes: Dict[str, pd.DataFrame] = {}
         
-        if not self.json_cache_filename.exists():
-            logging.info(f"JSON缓存文件 {self.json_cache_filename} 不存在。")
+        if not self.store.exists():
+            logging.info(f"{self.store.backend}存储 {self.store.path} 中没有数据。")
             return cache_dataframes
         
         try:
-            with open(self.json_cache_filename, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
+            if hasattr(self.store, 'load_frames'):
+                # 列式存储直接还原DataFrame
+                frames = self.store.load_frames()
+            else:
+                frames = {sheet_name: pd.DataFrame(records) for sheet_name, records in self.store.load().items() if records}
             
-            for sheet_name, records in cache_data.items():
-                if records:
-                    df = pd.DataFrame(records)
+            for sheet_name, df in frames.items():
+                if len(df):
                     # 清空旧的高亮标记
                     if 'highlight_time' in df.columns:
                         df['highlight_time'] = None
                     cache_dataframes[sheet_name] = df
-                    logging.info(f"已从JSON缓存加载工作表 '{sheet_name}' 的 {len(records)} 条记录。")
+                    logging.info(f"已从{self.store.backend}存储加载工作表 '{sheet_name}' 的 {len(df)} 条记录。")
             
         except Exception as e:
-            logging.warning(f"读取JSON缓存文件 {self.json_cache_filename} 出错: {e}。将忽略缓存。")
+            logging.warning(f"读取{self.store.backend}存储 {self.store.path} 出错: {e}。将忽略缓存。")
         
         return cache_dataframes
     
-    @staticmethod
-    def _sort_jobs_dataframe(df: pd.DataFrame) -> pd.DataFrame:
-        """统一的岗位排序方法：新岗位(is_new=True)排在最前，然后按发布时间降序排列。"""
-        if 'is_new' in df.columns:
-            # 先按is_new降序(True在前)，再按publish_time降序
-            df = df.sort_values(by=['is_new', 'publish_time'], ascending=[False, False])
-        else:
-            # 如果没有is_new字段，只按发布时间排序
-            df = df.sort_values(by='publish_time', ascending=False)
-        return df
-
-    def _load_existing_hashes(self) -> tuple[Dict[str, Set[str]], Dict[str, pd.DataFrame]]:
-        """从JSON缓存或Excel文件中加载每个工作表的职位哈希值和数据框。"""
-        existing_hashes: Dict[str, Set[str]] = {}
+    def _load_existing_hashes(self) -> tuple[Dict[str, JobHashIndex], Dict[str, pd.DataFrame]]:
+        """从JSON缓存或Excel文件中加载每个工作表的职位指纹索引和数据框。"""
+        existing_hashes: Dict[str, JobHashIndex] = {}
         existing_dataframes: Dict[str, pd.DataFrame] = {}
         
         # 优先从JSON缓存加载
@@ -149,6 +272,13 @@ class JobMonitor:
         if cache_dataframes:
             logging.info("使用JSON缓存数据。")
             existing_dataframes = cache_dataframes
+            
+            persisted = load_indexes(HASH_INDEX_FILENAME, self.store.signature())
+            if persisted is not None and set(persisted) >= set(existing_dataframes):
+                for sheet_name in existing_dataframes:
+                    existing_hashes[sheet_name] = persisted[sheet_name]
+                    logging.info(f"已加载工作表 '{sheet_name}' 的 {len(persisted[sheet_name])} 个职位指纹。")
+                return existing_hashes, existing_dataframes
         elif self.filename.exists():
             logging.info("JSON缓存不存在，从Excel文件加载数据。")
             try:
@@ -167,342 +297,325 @@ class JobMonitor:
         else:
             logging.info(f"Excel文件 {self.filename} 和JSON缓存都不存在，将创建新文件。")
         
-        # 为所有数据框生成哈希值
+        # 为所有数据框按列计算指纹，并保证数据按排序键排列
         for sheet_name, df in existing_dataframes.items():
-            hashes = {self._generate_job_hash(row.to_dict()) for _, row in df.iterrows()}
-            existing_hashes[sheet_name] = hashes
-            logging.info(f"已为工作表 '{sheet_name}' 生成 {len(hashes)} 个职位哈希。")
+            existing_dataframes[sheet_name], existing_hashes[sheet_name] = self._index_dataframe(df)
+            logging.info(f"已为工作表 '{sheet_name}' 生成 {len(existing_hashes[sheet_name])} 个职位指纹。")
         
         return existing_hashes, existing_dataframes
 
-    async def _run_single_task_async(self, task_config: Dict[str, Any], browser: Browser) -> None:
-        """在独立的浏览器上下文中异步运行单个抓取任务。"""
+    @staticmethod
+    def _index_dataframe(df: pd.DataFrame) -> Tuple[pd.DataFrame, JobHashIndex]:
+        """为数据框建立职位索引；数据未按排序键排列时先排序一次，之后的合并只做有序插入。"""
+        index = JobHashIndex.from_dataframe(df)
+        if index.is_sorted:
+            return df.reset_index(drop=True), index
+        order = np.argsort(index.order_keys, kind='stable')
+        df = df.take(order).reset_index(drop=True)
+        return df, JobHashIndex(index.row_fingerprints[order], index.order_keys[order])
+
+    @staticmethod
+    def _with_query_params(url: str, **params: Any) -> str:
+        """返回替换了指定查询参数的URL。"""
+        parts = urlsplit(url)
+        query = dict(parse_qsl(parts.query, keep_blank_values=True))
+        query.update({key: str(value) for key, value in params.items()})
+        return urlunsplit(parts._replace(query=urlencode(query)))
+
+    @staticmethod
+    async def _capture_job_list(page: Page, url: str,
+                                task_config: Dict[str, Any]) -> Tuple[Optional[List[Dict[str, Any]]], Response]:
+        """打开职位页面并截获职位接口的响应，返回 (原始职位列表, 响应)；响应异常时职位列表为None。"""
+        async with page.expect_response(lambda r: task_config['api_url_mark'] in r.url, timeout=30000) as response_info:
+            await page.goto(url, wait_until="domcontentloaded")
+        
+        response = await response_info.value
+        if response.status != 200:
+            logging.error(f"❌ 任务 '{task_config['name']}' API 响应状态码: {response.status}")
+            return None, response
+        
+        data = await response.json()
+        return data.get("data", {}).get("job_post_list", []), response
+
+    async def _navigate(self, page: Page, url: str, task_config: Dict[str, Any],
+                        interceptor: RequestInterceptor) -> Tuple[Optional[List[Dict[str, Any]]], Response]:
+        """截获职位接口响应；精简导航失败时取消拦截并用完整页面重试一次。"""
+        interceptor.navigations += 1
+        try:
+            return await self._capture_job_list(page, url, task_config)
+        except Exception as e:
+            if not interceptor.block:
+                raise
+            logging.warning(f"⚠️ 任务 '{task_config['name']}' 精简导航失败 ({e})，改用完整页面重试")
+            await interceptor.detach(page)
+            return await self._capture_job_list(page, url, task_config)
+
+    async def _report_navigation(self, task_config: Dict[str, Any], interceptor: RequestInterceptor) -> None:
+        """输出本任务的导航开销；完整导航的结果记为基线，精简导航与基线对比得出节省量。
+
+        只有单次导航任务页面且测得全部请求大小的统计才会记为基线或参与对比，
+        增量抓取（先请求最新一页）和精简导航退回完整页面的运行只输出本次加载量。
+        """
+        task_name = task_config['name']
+        sheet_name = task_config['sheet_name']
+        await interceptor.settle()
+        loaded_kb = interceptor.loaded_bytes / 1024
+        loaded = f"{interceptor.loaded_requests} 个请求 ({loaded_kb:.1f} KB)"
+        if interceptor.unmeasured_requests:
+            loaded += f"，其中 {interceptor.unmeasured_requests} 个未能测得大小"
+        
+        if not self.lean_navigation:
+            if interceptor.is_comparable:
+                self.navigation_stats.record_baseline(sheet_name, interceptor.loaded_requests, interceptor.loaded_bytes)
+            logging.info(f"📶 任务 '{task_name}' 完整导航: {loaded}")
+            return
+        
+        blocked_types = ", ".join(f"{kind}={count}" for kind, count in interceptor.blocked_by_type.most_common())
+        baseline = self.navigation_stats.baseline(sheet_name)
+        if baseline and interceptor.is_comparable:
+            saved_requests = baseline['requests'] - interceptor.loaded_requests
+            saved_kb = (baseline['bytes'] - interceptor.loaded_bytes) / 1024
+            logging.info(
+                f"📶 任务 '{task_name}' 精简导航: 加载 {loaded}, "
+                f"拦截 {interceptor.blocked_requests} 个 ({blocked_types}); "
+                f"相比完整导航节省 {saved_requests} 个请求, {saved_kb:.1f} KB"
+            )
+        else:
+            reason = "暂无完整导航基线" if not baseline else "本次导航与基线不可比"
+            logging.info(
+                f"📶 任务 '{task_name}' 精简导航: 加载 {loaded}, "
+                f"拦截 {interceptor.blocked_requests} 个 ({blocked_types}); {reason}，无法计算节省的字节数"
+            )
+
+    @staticmethod
+    def _parse_job_list(job_list: List[Dict[str, Any]], task_config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """把接口返回的原始职位转换为缓存使用的记录格式。"""
+        # 调试：打印第一个职位的完整数据结构
+        if job_list and logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(f"API返回的第一个职位完整数据: {json.dumps(job_list[0], ensure_ascii=False, indent=2)}")
+        
+        # 按字段表编译的规整函数转换，额外字段组合相同的任务共用编译结果
+        normalize = task_schema(tuple(task_config['extra_fields'])).normalize
+        return [normalize(job) for job in job_list]
+
+    async def _run_single_task_async(self, task_config: Dict[str, Any], browser: Optional[Browser] = None,
+                                     browser_pool: Optional[BrowserPool] = None) -> None:
+        """在独立的浏览器上下文中异步运行单个抓取任务。
+        传入browser_pool时复用池中该任务的上下文，否则在browser上新建上下文。"""
         task_name = task_config['name']
         sheet_name = task_config['sheet_name']
         scraped_jobs: List[Dict[str, Any]] = []
         context = None
         
         try:
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36"
-            )
+            if browser_pool is not None:
+                context = await browser_pool.acquire_context(sheet_name)
+            else:
+                context = await browser.new_context(user_agent=USER_AGENT)
             page = await context.new_page()
+            interceptor = RequestInterceptor(task_config['api_url_mark'], block=self.lean_navigation)
+            await interceptor.attach(page)
             logging.info(f"🚀 开始任务: {task_name}")
 
-            async with page.expect_response(lambda r: task_config['api_url_mark'] in r.url, timeout=30000) as response_info:
-                await page.goto(task_config['url'], wait_until="domcontentloaded")
+            job_list = None
+            if self.incremental and self.watermarks.get(sheet_name):
+                # 先只请求最新的一页，遇到已知职位说明之后的都已抓取过
+                latest_url = self._with_query_params(task_config['url'], current=1, limit=INCREMENTAL_PAGE_SIZE)
+                latest, _ = await self._navigate(page, latest_url, task_config, interceptor)
+                if latest is not None and self.watermarks.is_newest_first(latest):
+                    job_list = self.watermarks.take_until_known(sheet_name, latest)
+                if job_list is not None:
+                    self.partial_sheets.add(sheet_name)
+                    logging.info(f"📈 任务 '{task_name}' 增量抓取: 新增 {len(job_list)} 个职位")
+                else:
+                    logging.info(f"任务 '{task_name}' 首页未遇到已知职位，改为全量抓取")
             
-            response = await response_info.value
-            if response.status == 200:
-                data = await response.json()
-                job_list = data.get("data", {}).get("job_post_list", [])
-                
-                # 调试：打印第一个职位的完整数据结构
-                if job_list and logging.getLogger().isEnabledFor(logging.DEBUG):
-                    logging.debug(f"API返回的第一个职位完整数据: {json.dumps(job_list[0], ensure_ascii=False, indent=2)}")
-                
-                for job in job_list:
-                    publish_time = datetime.fromtimestamp(job["publish_time"] / 1000)
-                    
-                    # 扩展job_info，包含更多API字段
-                    job_info = {
-                        # 基础信息
-                        "title": job.get("title"),
-                        "sub_title": job.get("sub_title"),
-                        "description": job.get("description"),
-                        "requirement": job.get("requirement"),
-                        "publish_time": publish_time.strftime("%Y-%m-%d %H:%M:%S"),
-                        "code": job.get("code"),
-                        
-                        # 职位基本信息
-                        "job_id": job.get("id"),
-                        "job_type": job.get("job_type"),
-                        "job_category": job.get("job_category", {}).get("name") if isinstance(job.get("job_category"), dict) else job.get("job_category"),
-                        "job_function": job.get("job_function", {}).get("name") if isinstance(job.get("job_function"), dict) else job.get("job_function"),
-                        "department_id": job.get("department_id"),
-                        "job_process_id": job.get("job_process_id"),
-                        
-                        # 招聘类型和项目信息
-                        "recruit_type_name": job.get("recruit_type", {}).get("name") if isinstance(job.get("recruit_type"), dict) else None,
-                        "recruit_type_parent": job.get("recruit_type", {}).get("parent", {}).get("name") if isinstance(job.get("recruit_type"), dict) and job.get("recruit_type", {}).get("parent") else None,
-                        "job_subject_name": job.get("job_subject", {}).get("name", {}).get("zh_cn") if isinstance(job.get("job_subject"), dict) and isinstance(job.get("job_subject", {}).get("name"), dict) else job.get("job_subject", {}).get("name") if isinstance(job.get("job_subject"), dict) else None,
-                        
-                        # 地理位置信息
-                        "city_list": ", ".join([city.get("name", "") for city in job.get("city_list", []) if isinstance(city, dict)]) if job.get("city_list") else None,
-                        "city_codes": ", ".join([city.get("code", "") for city in job.get("city_list", []) if isinstance(city, dict)]) if job.get("city_list") else None,
-                        "address": job.get("address"),
-                        
-                        # 职位要求
-                        "degree": job.get("degree"),
-                        "experience": job.get("experience"),
-                        "min_salary": job.get("min_salary"),
-                        "max_salary": job.get("max_salary"),
-                        "currency": job.get("currency"),
-                        "head_count": job.get("head_count"),
-                        
-                        # 职位状态和标识
-                        "job_hot_flag": job.get("job_hot_flag"),
-                        "is_urgent": job.get("is_urgent"),
-                        "job_active_status": job.get("job_active_status"),
-                        "recommend_id": job.get("recommend_id"),
-                        
-                        # 其他信息
-                        "team_name": job.get("team_name"),
-                        "brand_name": job.get("brand_name"),
-                        "ats_online_apply": job.get("ats_online_apply"),
-                        "pc_job_url": job.get("pc_job_url"),
-                        "wap_job_url": job.get("wap_job_url"),
-                        "storefront_mode": job.get("storefront_mode"),
-                        "process_type": job.get("process_type"),
-                    }
-                    
-                    # 处理配置中的额外字段
-                    for field in task_config['extra_fields']:
-                        value = job.get(field)
-                        job_info[field] = value.get('name') if isinstance(value, dict) else value
-                    
-                    # 清理None值，保持数据整洁
-                    job_info = {k: v for k, v in job_info.items() if v is not None and v != ''}
-                    
-                    scraped_jobs.append(job_info)
-                
+            if job_list is None:
+                job_list, response = await self._navigate(page, task_config['url'], task_config, interceptor)
+                if job_list is not None and self.hybrid is not None:
+                    # 只从完整请求中采集凭据，之后的运行直接重放
+                    await self.hybrid.harvest(sheet_name, response.request, context)
+            
+            await self._report_navigation(task_config, interceptor)
+            
+            if job_list is not None:
+                self.watermarks.stage(sheet_name, job_list)
+                scraped_jobs = self._parse_job_list(job_list, task_config)
                 logging.info(f"✅ 任务 '{task_name}' 成功获取 {len(scraped_jobs)} 个职位。")
-            else:
-                logging.error(f"❌ 任务 '{task_name}' API 响应状态码: {response.status}")
 
         except Exception as e:
             logging.error(f"❌ 任务 '{task_name}' 执行失败: {e}", exc_info=False)
         finally:
-            if context:
+            if context and browser_pool is not None:
+                await browser_pool.release_context(sheet_name, context)
+            elif context:
                 await context.close()
             self.results.append((sheet_name, task_name, scraped_jobs))
 
-    def _process_results(self, existing_hashes: Dict[str, Set[str]], existing_dataframes: Dict[str, pd.DataFrame]) -> Dict:
-        """处理所有任务结果，合并数据并识别新职位。"""
+    async def _run_replayed_task_async(self, task_config: Dict[str, Any]) -> bool:
+        """混合模式下用缓存凭据重放职位接口。成功返回True；凭据缺失或被拒绝返回False，由浏览器接手。"""
+        sheet_name = task_config['sheet_name']
+        job_list = await asyncio.to_thread(self.hybrid.replay, sheet_name)
+        if job_list is None:
+            return False
+        
+        if self.incremental and self.watermarks.get(sheet_name) and self.watermarks.is_newest_first(job_list):
+            delta = self.watermarks.take_until_known(sheet_name, job_list)
+            if delta is not None:
+                logging.info(f"📈 任务 '{task_config['name']}' 增量抓取: 新增 {len(delta)} 个职位")
+                job_list = delta
+                self.partial_sheets.add(sheet_name)
+        
+        self.watermarks.stage(sheet_name, job_list)
+        scraped_jobs = self._parse_job_list(job_list, task_config)
+        logging.info(f"✅ 任务 '{task_config['name']}' 成功获取 {len(scraped_jobs)} 个职位。")
+        self.results.append((sheet_name, task_config['name'], scraped_jobs))
+        return True
+
+    def _process_results(self, existing_hashes: Dict[str, JobHashIndex], existing_dataframes: Dict[str, pd.DataFrame]) -> Dict:
+        """处理所有任务结果，合并数据并识别新职位。
+        只对本次抓取的职位计算指纹和排序键，再按索引插入到已排好序的历史数据中。"""
         final_data_frames: Dict[str, pd.DataFrame] = {}
         summary_info: List[Dict[str, Any]] = []
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
         for sheet_name, task_name, new_jobs_data in self.results:
-            previous_hashes = existing_hashes.get(sheet_name, set())
             existing_df = existing_dataframes.get(sheet_name, pd.DataFrame())
+            previous_index = existing_hashes.get(sheet_name)
+            if previous_index is None or len(previous_index) != len(existing_df):
+                existing_df, previous_index = self._index_dataframe(existing_df)
             
             if not new_jobs_data:
-                # 如果没有新数据，但有旧数据，则保留旧数据
+                # 如果没有新数据，但有旧数据，则保留旧数据（已按排序键排列）
                 if not existing_df.empty:
-                    final_data_frames[sheet_name] = self._sort_jobs_dataframe(existing_df)
+                    final_data_frames[sheet_name] = existing_df
+                    self.job_indexes[sheet_name] = previous_index
                 summary_info.append({'task_name': task_name, 'new_count': 0, 'total_count': len(existing_df)})
                 continue
             
-            # 处理新抓取的数据
-            for job in new_jobs_data:
-                job_hash = self._generate_job_hash(job)
-                is_new = job_hash not in previous_hashes
-                job['is_new'] = is_new
-                # 为新岗位添加高亮时间标记
-                job['highlight_time'] = current_time if is_new else None
-            
+            # 处理新抓取的数据，同一批次内指纹重复时保留最后一条
             new_df = pd.DataFrame(new_jobs_data)
+            fingerprints = compute_fingerprints(new_df)
+            _, last_positions = np.unique(fingerprints[::-1], return_index=True)
+            keep = np.sort(len(fingerprints) - 1 - last_positions)
+            new_df = new_df.iloc[keep].reset_index(drop=True)
+            fingerprints = fingerprints[keep]
+            # 拆分职位描述并保存在记录中，描述与已有数据相同的职位沿用之前的拆分结果
+            new_df = segment_frame(new_df, existing_df)
             
-            # 合并新旧数据
+            matched_rows = previous_index.lookup(fingerprints)
+            is_new = matched_rows < 0
+            new_df['is_new'] = is_new
+            # 为新岗位添加高亮时间标记
+            new_df['highlight_time'] = np.where(is_new, current_time, None)
+            
+            removed_count = self._stage_changes(sheet_name, new_df, existing_df)
+            
+            # 已存在的职位用本次抓取的记录替换：删除旧行，与新职位一起按排序键插入
+            order, final_index = previous_index.splice(
+                matched_rows[~is_new], fingerprints, compute_order_keys(new_df)
+            )
             if not existing_df.empty:
                 # 确保旧数据有必要的字段
                 if 'is_new' not in existing_df.columns:
                     existing_df['is_new'] = False
                 if 'highlight_time' not in existing_df.columns:
                     existing_df['highlight_time'] = None
-                
-                # 合并数据并去重（基于哈希值）
-                combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-                # 根据职位哈希去重，保留最新的记录
-                combined_df['job_hash'] = combined_df.apply(lambda row: self._generate_job_hash(row.to_dict()), axis=1)
-                combined_df = combined_df.drop_duplicates(subset=['job_hash'], keep='last')
-                combined_df = combined_df.drop(columns=['job_hash'])
-                final_df = combined_df
+                final_df = pd.concat([existing_df, new_df], ignore_index=True)
             else:
                 final_df = new_df
+            final_df = final_df.take(order).reset_index(drop=True)
             
-            final_df = self._sort_jobs_dataframe(final_df)
             final_data_frames[sheet_name] = final_df
+            self.job_indexes[sheet_name] = final_index
             
             new_count = final_df['is_new'].sum() if 'is_new' in final_df.columns else 0
             summary_info.append({
                 'task_name': task_name,
                 'new_count': new_count,
+                'removed_count': removed_count,
                 'total_count': len(final_df)
             })
         
         return {"data_frames": final_data_frames, "summary": summary_info}
 
-    @staticmethod
-    def _extract_team_intro(description: str) -> str:
-        """从description中提取团队介绍部分。"""
-        if not description:
-            return ""
-        
-        # 查找团队介绍的结束位置
-        text = description.strip()
-        
-        import re
-        
-        # 如果直接以数字编号开始，说明没有团队介绍
-        if re.match(r'^[1-9]、', text):
-            return "暂无团队介绍"
-        
-        # 寻找团队介绍的结束标志
-        patterns = [
-            r'团队介绍[：:][^\n]*\n\n',  # 团队介绍：...\n\n
-            r'团队介绍[：:][^1-9]*(?=[1-9]、)',  # 团队介绍：...直到数字编号开始
-            r'^[^1-9]*?(?=[1-9]、)',  # 从开头到第一个数字编号
-            r'^.*?(?=\n\n[1-9])',  # 从开头到双换行+数字
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.MULTILINE | re.DOTALL)
-            if match:
-                result = match.group(0).strip()
-                return result if result else "暂无团队介绍"
-        
-        # 如果没有找到明确的分割点，取前面的部分
-        lines = text.split('\n')
-        if len(lines) > 3:
-            # 寻找第一个以数字开头的行
-            for i, line in enumerate(lines):
-                if re.match(r'^[1-9]、', line.strip()):
-                    intro = '\n'.join(lines[:i]).strip()
-                    return intro if intro else "暂无团队介绍"
-        
-        # 默认返回前200个字符
-        if len(text) > 200:
-            return text[:200] + '...'
+    def _stage_changes(self, sheet_name: str, new_df: pd.DataFrame, existing_df: pd.DataFrame) -> int:
+        """根据本次抓取结果生成变更事件并暂存到变更日志，返回下线职位数。
+
+        指纹未命中的职位，job_id之前在线则为修改，否则为新增；
+        只有全量抓取才能确定下线职位：上次在线、本次未出现的job_id。
+        """
+        if 'job_id' not in new_df.columns:
+            return 0
+        
+        job_ids = new_df['job_id'].astype(str)
+        known_ids = self.change_log.live_ids(sheet_name)
+        if known_ids is None:
+            # 首次记录变更日志，以已有数据作为在线职位，此时不判断下线
+            known_ids = set(existing_df['job_id'].dropna().astype(str)) if 'job_id' in existing_df.columns else set()
+            previous_live = None
         else:
-            return text if text else "暂无团队介绍"
-    
-    @staticmethod
-    def _extract_job_details(description: str) -> str:
-        """从description中提取岗位细节部分。"""
-        if not description:
-            return ""
-        
-        text = description.strip()
-        
-        # 寻找岗位细节的开始位置
-        import re
-        patterns = [
-            r'([1-9]、.*)',  # 从第一个数字编号开始
-            r'(职责[：:].*)',  # 从职责开始
-            r'(工作内容[：:].*)',  # 从工作内容开始
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.MULTILINE | re.DOTALL)
-            if match:
-                return match.group(1).strip()
-        
-        # 如果没有找到明确的开始点，尝试从团队介绍后开始
-        team_intro = JobMonitor._extract_team_intro(description)
-        if team_intro and len(team_intro) < len(text):
-            remaining = text[len(team_intro):].strip()
-            return remaining if remaining else text
-        
-        # 默认返回后面的部分
-        return text[200:] if len(text) > 200 else text
+            previous_live = known_ids
+        
+        events = []
+        for job in new_df.loc[new_df['is_new']].reindex(columns=['job_id', 'title', 'publish_time']).to_dict('records'):
+            job_id = str(job['job_id'])
+            events.append({
+                'type': EVENT_MODIFIED if job_id in known_ids else EVENT_ADDED,
+                'job_id': job_id,
+                'title': job['title'],
+                'publish_time': job['publish_time'],
+            })
+        
+        current_ids = set(job_ids)
+        removed_ids: set = set()
+        if sheet_name in self.partial_sheets:
+            live_ids = known_ids | current_ids
+        else:
+            live_ids = current_ids
+            if previous_live is not None:
+                removed_ids = previous_live - current_ids
+        events.extend({'type': EVENT_REMOVED, 'job_id': job_id} for job_id in sorted(removed_ids))
+        
+        self.change_log.stage(sheet_name, events, live_ids)
+        return len(removed_ids)
 
     def _save_and_highlight(self, data_frames: Dict[str, pd.DataFrame]) -> None:
-        """将数据保存到Excel和JSON缓存，并为新职位行应用高亮。
-        Excel只保存指定字段，JSON保留全部字段。"""
+        """将数据保存到职位存储；开启 build_excel 时再生成带高亮的Excel追踪表。
+        Excel是派生文件，Web应用在下载时按数据版本懒生成，监控运行默认不再生成。"""
         if not data_frames:
             logging.info("没有数据需要保存。")
             return
-            
+        
+        # 保存JSON缓存（保留全部字段）
+        saved = self._save_json_cache(data_frames)
+        
+        if not self.build_excel:
+            return
+        if not saved:
+            # 职位存储仍是旧数据，不能把它的签名记录到新工作簿上
+            logging.warning("⚠️ 职位存储未保存成功，跳过生成Excel")
+            return
         try:
-            # 为Excel创建简化的数据框
-            excel_data_frames = {}
-            for sheet_name, df in data_frames.items():
-                # 创建Excel专用的数据框，只包含指定字段
-                excel_df = df.copy()
-                
-                # 拆分description字段为团队介绍和岗位细节
-                excel_df['团队介绍'] = excel_df['description'].apply(self._extract_team_intro)
-                excel_df['岗位细节'] = excel_df['description'].apply(self._extract_job_details)
-                
-                # 添加职位链接
-                excel_df['职位链接'] = excel_df['job_id'].apply(
-                    lambda x: f"https://jobs.bytedance.com/campus/position/{x}/detail" if pd.notna(x) else ""
-                )
-                
-                # 选择Excel需要的字段
-                excel_columns = [
-                    'title', '团队介绍', '岗位细节', 'requirement', 
-                    'publish_time', 'code', '职位链接', 'highlight_time'
-                ]
-                
-                # 只保留存在的列
-                available_columns = [col for col in excel_columns if col in excel_df.columns]
-                excel_df = excel_df[available_columns]
-                
-                # 重命名列为中文
-                column_mapping = {
-                    'title': '职位标题',
-                    'requirement': '职位要求', 
-                    'publish_time': '发布时间',
-                    'code': '职位编号',
-                    'highlight_time': '更新时间'
-                }
-                excel_df = excel_df.rename(columns=column_mapping)
-                
-                excel_data_frames[sheet_name] = excel_df
-            
-            # 保存Excel文件
-            with pd.ExcelWriter(self.filename, engine='openpyxl') as writer:
-                for sheet_name, df in excel_data_frames.items():
-                    df.to_excel(writer, sheet_name=sheet_name, index=False)
-            
-            # 应用Excel高亮
-            workbook = openpyxl.load_workbook(self.filename)
-            highlight_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-            
-            highlight_stats = {}
-            for sheet_name, df in excel_data_frames.items():
-                if sheet_name in workbook.sheetnames:
-                    worksheet = workbook[sheet_name]
-                    new_count = 0
-                    
-                    # 高亮新增职位（更新时间不为空的行）
-                    for idx, row in df.iterrows():
-                        if pd.notna(row.get('更新时间')):
-                            excel_row = idx + 2  # Excel行号从1开始，加上表头
-                            for col in range(1, len(df.columns) + 1):
-                                worksheet.cell(row=excel_row, column=col).fill = highlight_fill
-                            new_count += 1
-                    
-                    highlight_stats[sheet_name] = new_count
-            
-            workbook.save(self.filename)
+            # 单遍写出，新职位行在写入时直接高亮；记录数据签名，Web应用下载时无需重新生成
+            highlight_stats = LazyExcel(self.filename, write_tracker_workbook).build(self.store.signature(), data_frames)
             logging.info(f"💾 Excel数据已保存并高亮至: {self.filename}")
             
             # 记录高亮统计信息
             for sheet_name, count in highlight_stats.items():
                 if count > 0:
                     logging.info(f"   📌 工作表 '{sheet_name}' 高亮了 {count} 个新职位")
-            
-            # 保存JSON缓存（保留全部字段）
-            self._save_json_cache(data_frames)
-
         except Exception as e:
             logging.error(f"⚠️ 保存Excel文件时出错: {e}")
-            # 即使Excel保存失败，也尝试保存JSON缓存
-            try:
-                self._save_json_cache(data_frames)
-            except Exception as cache_error:
-                logging.error(f"⚠️ 保存JSON缓存时出错: {cache_error}")
 
     @staticmethod
     def _send_notification(summary: List[Dict[str, Any]]) -> None:
         """根据操作系统发送桌面通知，增强了稳定性和错误排查能力。"""
         total_new = sum(info.get('new_count', 0) for info in summary)
         total_count = sum(info.get('total_count', 0) for info in summary)
+        total_removed = sum(info.get('removed_count', 0) for info in summary)
         current_time = datetime.now().strftime("%H:%M")
+        removed_line = f"\\n下线: {total_removed} 个丝瓜" if total_removed > 0 else ""
 
         if total_new > 0:
             title = "🎉 发现新职位!"
@@ -510,13 +623,13 @@ class JobMonitor:
                 f"   • {info['task_name']}: +{info['new_count']} 个"
                 for info in summary if info.get('new_count', 0) > 0
             )
-            message = f"发现 {total_new} 个新丝瓜！\\n总计: {total_count} 个丝瓜\\n时间: {current_time}\\n\\n详情:\\n{details}"
+            message = f"发现 {total_new} 个新丝瓜！{removed_line}\\n总计: {total_count} 个丝瓜\\n时间: {current_time}\\n\\n详情:\\n{details}"
             buttons = '{"稍后查看", "立即查看"}'
             default_button = '"立即查看"'
             action_script = f'do shell script "open \\"{OUTPUT_FILENAME}\\""'
         else:
             title = "✅ 监控完成"
-            message = f"本次未发现新丝瓜。\\n总计: {total_count} 个丝瓜\\n时间: {current_time}"
+            message = f"本次未发现新丝瓜。{removed_line}\\n总计: {total_count} 个丝瓜\\n时间: {current_time}"
             buttons = '{"确定"}'
             default_button = '"确定"'
             action_script = ""
@@ -554,8 +667,9 @@ class JobMonitor:
             logging.info(message.replace("\\n", "\n"))
             logging.info("-------------------------")
 
-    async def run_async(self, silent_mode: bool = False):
-        """执行一次完整的职位监控流程（异步版）。"""
+    async def run_async(self, silent_mode: bool = False, browser_pool: Optional[BrowserPool] = None):
+        """执行一次完整的职位监控流程（异步版）。
+        传入browser_pool时复用常驻浏览器，跳过Chromium冷启动。"""
         start_time = datetime.now()
         logging.info(f"--- 开始监控 {start_time.strftime('%Y-%m-%d %H:%M:%S')} ---")
         
@@ -564,26 +678,44 @@ class JobMonitor:
         
         existing_hashes, existing_dataframes = self._load_existing_hashes()
         
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=self.headless)
-            tasks_to_run = [self._run_single_task_async(task, browser) for task in self.tasks]
-            await asyncio.gather(*tasks_to_run)
-            await browser.close()
+        browser_tasks = self.tasks
+        if self.hybrid is not None:
+            replayed = await asyncio.gather(*(self._run_replayed_task_async(task) for task in self.tasks))
+            browser_tasks = [task for task, ok in zip(self.tasks, replayed) if not ok]
+            if not browser_tasks:
+                logging.info("⚡ 所有任务均通过HTTP重放完成，跳过浏览器启动")
+        
+        if browser_tasks and browser_pool is not None:
+            async with browser_pool.session():
+                tasks_to_run = [self._run_single_task_async(task, browser_pool=browser_pool) for task in browser_tasks]
+                await asyncio.gather(*tasks_to_run)
+        elif browser_tasks:
+            async with async_playwright() as p:
+                browser = await p.chromium.launch(headless=self.headless)
+                tasks_to_run = [self._run_single_task_async(task, browser) for task in browser_tasks]
+                await asyncio.gather(*tasks_to_run)
+                await browser.close()
 
         results = self._process_results(existing_hashes, existing_dataframes)
         data_frames = results["data_frames"]
         summary = results["summary"]
         
         self._save_and_highlight(data_frames)
+        self.watermarks.save()
+        self.navigation_stats.save()
+        self.change_log.commit()
         
         total_new = sum(info.get('new_count', 0) for info in summary)
         if not silent_mode or total_new > 0:
             logging.info("--- 监控结果 ---")
             for info in summary:
-                logging.info(f"  - {info['task_name']}: 发现 {info.get('new_count', 0)} 个新丝瓜，共 {info.get('total_count', 0)} 个。")
+                logging.info(f"  - {info['task_name']}: 发现 {info.get('new_count', 0)} 个新丝瓜，"
+                             f"下线 {info.get('removed_count', 0)} 个，共 {info.get('total_count', 0)} 个。")
             logging.info(f"总计新增: {total_new} 个")
         
-        self._send_notification(summary)
+        if not silent_mode or total_new > 0:
+            # osascript对话框最长阻塞120秒，放到工作线程里执行，不占用浏览器池的事件循环
+            await asyncio.to_thread(self._send_notification, summary)
         
         end_time = datetime.now()
         logging.info(f"--- 监控结束, 耗时: {(end_time - start_time).total_seconds():.2f} 秒 ---")
@@ -592,7 +724,15 @@ class JobMonitor:
 if __name__ == "__main__":
     try:
         is_silent = "--auto" in sys.argv
-        monitor = JobMonitor(tasks=TASK_CONFIGS, filename=OUTPUT_FILENAME, headless=True)
+        monitor = JobMonitor(
+            tasks=TASK_CONFIGS,
+            filename=OUTPUT_FILENAME,
+            headless=True,
+            incremental="--incremental" in sys.argv,
+            lean_navigation="--lean" in sys.argv,
+            fetch_mode='hybrid' if "--hybrid" in sys.argv else 'browser',
+            build_excel="--no-excel" not in sys.argv
+        )
         asyncio.run(monitor.run_async(silent_mode=is_silent))
         
     except KeyboardInterrupt:
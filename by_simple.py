@@ -5,18 +5,36 @@
 适用于云平台部署，使用requests + 模拟请求方式
 """
 
+import asyncio
 import json
 import logging
+import math
 import requests
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Callable, Dict, Iterator, List, Any, Optional, Tuple
 import pandas as pd
 import openpyxl
+from requests.adapters import HTTPAdapter
 from openpyxl.styles import PatternFill
 
+from crawl_state import WatermarkStore
+from excel_export import LazyExcel, column_widths, write_frames
+from job_schema import SIMPLE_JOB_SCHEMA
+from job_store import get_job_store
+
+try:
+    import aiohttp
+except ImportError:  # 异步引擎为可选功能，未安装aiohttp时只能使用同步模式
+    aiohttp = None
+
+# 同步（requests）和异步（aiohttp）引擎中请求超时、连接错误对应的异常
+TIMEOUT_ERRORS = (requests.exceptions.Timeout, asyncio.TimeoutError)
+CONNECTION_ERRORS = (requests.exceptions.ConnectionError,) + ((aiohttp.ClientConnectionError,) if aiohttp else ())
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -30,6 +48,20 @@ DATA_PATH = PROJECT_PATH / "data"
 DATA_PATH.mkdir(exist_ok=True)
 OUTPUT_FILENAME = DATA_PATH / "bytedance_jobs_tracker.xlsx"
 JSON_CACHE_FILENAME = DATA_PATH / "bytedance_jobs_cache.json"
+WATERMARK_FILENAME = DATA_PATH / "crawl_watermarks.json"
+
+# 分页抓取配置
+PAGE_SIZE = 200  # 分页模式下每页条数
+MAX_PAGE_WORKERS = 4  # 同时在途的分页请求数上限
+INCREMENTAL_PAGE_SIZE = 50  # 增量模式下每页条数，稳态运行通常第一页就能遇到已知职位
+
+# 请求重试配置
+REQUEST_BACKOFF = (0, 2, 4)  # 每次尝试前等待的秒数，元素个数即最多尝试次数
+RATE_LIMIT_DELAY = 10  # 遇到429频率限制时，下次尝试额外等待的秒数
+
+# 异步引擎配置
+MAX_CONNECTIONS_PER_HOST = 6  # 共享连接池中每个主机的并发连接上限
+KEEPALIVE_TIMEOUT = 30  # 空闲连接保活时间（秒）
 
 # 任务配置 - 直接使用API接口
 TASK_CONFIGS: List[Dict[str, Any]] = [
@@ -92,11 +124,29 @@ TASK_CONFIGS: List[Dict[str, Any]] = [
 class SimpleJobMonitor:
     """简化版职位监控器 - 不依赖Playwright"""
     
-    def __init__(self, tasks: List[Dict[str, Any]], filename: Path):
+    def __init__(self, tasks: List[Dict[str, Any]], filename: Path,
+                 page_size: Optional[int] = None, max_workers: int = MAX_PAGE_WORKERS,
+                 incremental: bool = False, build_excel: bool = False):
         self.tasks = tasks
         self.filename = filename
+        # 运行结束时是否立即生成Excel；Web应用在下载时按需生成，命令行运行默认生成
+        self.build_excel = build_excel
+        # page_size为None时沿用单次请求拉取全部职位；否则按页并发抓取
+        self.page_size = page_size
+        self.max_workers = max_workers
+        # 增量模式下遇到上次见过的职位即停止翻页，只把新增部分合并进已有缓存
+        self.incremental = incremental
+        self.watermarks = WatermarkStore(WATERMARK_FILENAME)
+        # 本次有请求重试后仍失败的工作表，保存时保留已有缓存中的职位，不用不完整的结果覆盖
+        self.partial_sheets: set = set()
+        # 数据存储后端由环境变量 JOB_STORE 选择（json 或 sqlite）
+        self.store = get_job_store(JSON_CACHE_FILENAME)
         self.session = requests.Session()
         
+        # 连接池大小与并发页数保持一致，避免分页请求排队等待连接
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(max_workers, 10))
+        self.session.mount('https://', adapter)
+        
         # 设置请求头，模拟浏览器
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -113,171 +163,506 @@ class SimpleJobMonitor:
     
     def fetch_jobs(self, task_config: Dict[str, Any]) -> List[Dict[str, Any]]:
         """获取职位数据 - 带重试机制"""
-        max_retries = 3
-        retry_delay = 2
+        if self.page_size:
+            pages = sorted(self.iter_job_pages(task_config), key=lambda page: page[0])
+            return [job for _, jobs in pages for job in jobs]
         
-        for attempt in range(max_retries):
-            try:
-                if attempt > 0:
-                    logging.info(f"重试获取 {task_config['name']} 数据 (第{attempt+1}次)...")
-                else:
-                    logging.info(f"正在获取 {task_config['name']} 数据...")
-                
-                # 添加随机延迟避免请求过于频繁
-                if attempt > 0:
-                    import time
-                    time.sleep(retry_delay * attempt)
-                
-                # 调试：打印请求信息
-                full_url = f"{task_config['api_url']}?{'&'.join([f'{k}={v}' for k, v in task_config['params'].items()])}"
-                logging.info(f"请求URL: {full_url}")
-                
-                response = self.session.get(
-                    task_config['api_url'],
-                    params=task_config['params'],
-                    timeout=30
-                )
-                
-                # 调试：打印响应信息
-                logging.info(f"响应状态码: {response.status_code}")
-                logging.info(f"响应头: {dict(response.headers)}")
-                logging.info(f"响应内容前200字符: {response.text[:200]}")
-                
-                if response.status_code == 200:
-                    try:
-                        data = response.json()
-                        
-                        if 'data' in data and 'job_post_list' in data['data']:
-                            jobs = data['data']['job_post_list']
-                            logging.info(f"✅ {task_config['name']} 获取成功: {len(jobs)} 个职位")
-                            return jobs
-                        elif 'data' in data and isinstance(data['data'], list):
-                            # 兼容不同的API响应格式
-                            jobs = data['data']
-                            logging.info(f"✅ {task_config['name']} 获取成功: {len(jobs)} 个职位")
-                            return jobs
-                        else:
-                            logging.warning(f"⚠️ {task_config['name']} 数据格式异常: {list(data.keys()) if isinstance(data, dict) else type(data)}")
-                            if attempt == max_retries - 1:
-                                return []
-                            continue
-                    except json.JSONDecodeError as e:
-                        logging.error(f"❌ {task_config['name']} JSON解析失败: {e}")
-                        if attempt == max_retries - 1:
-                            return []
-                        continue
-                        
-                elif response.status_code == 429:
-                    # 请求频率限制
-                    logging.warning(f"⚠️ {task_config['name']} 请求频率限制，等待重试...")
-                    if attempt < max_retries - 1:
-                        import time
-                        time.sleep(10)  # 等待更长时间
-                        continue
-                    else:
-                        logging.error(f"❌ {task_config['name']} 请求频率限制，重试失败")
-                        return []
-                        
-                elif response.status_code in [403, 404]:
-                    # 权限或资源不存在错误，不重试
-                    logging.error(f"❌ {task_config['name']} 请求失败: {response.status_code} - {response.text[:200]}")
-                    return []
-                    
-                else:
-                    logging.error(f"❌ {task_config['name']} 请求失败: {response.status_code}")
-                    if attempt == max_retries - 1:
-                        return []
+        result = self._request_jobs(task_config, task_config['params'], task_config['name'])
+        if result is None:
+            self.partial_sheets.add(task_config['sheet_name'])
+            return []
+        return result[0]
+    
+    def iter_job_pages(self, task_config: Dict[str, Any]) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """分页并发获取职位数据，每页到达后立即产出 (页码, 职位列表)。
+        
+        先请求第1页以获得职位总数，再把剩余页并发提交；某一页失败只重试该页，
+        不影响其他页，重试后仍失败的页会把工作表记入 partial_sheets。
+        产出顺序为到达顺序，需要原始顺序时按页码排序。
+        """
+        page_size = self.page_size
+        
+        first = self._request_jobs(task_config, self._page_params(task_config, 1, page_size), f"{task_config['name']} 第1页")
+        if first is None:
+            self.partial_sheets.add(task_config['sheet_name'])
+            return
+        jobs, total = first
+        yield 1, jobs
+        
+        plan = self._plan_pages(task_config, total)
+        if plan is None:
+            # 接口未返回总数时只能顺序翻页，直到遇到不满一页的结果
+            page, fetched = 1, len(jobs)
+            while self._has_next_page(task_config, jobs, fetched):
+                page += 1
+                result = self._request_jobs(task_config, self._page_params(task_config, page, page_size), f"{task_config['name']} 第{page}页")
+                if result is None:
+                    self.partial_sheets.add(task_config['sheet_name'])
+                    return
+                jobs = result[0]
+                fetched += len(jobs)
+                yield page, jobs
+            return
+        total, remaining = plan
+        if not remaining:
+            return
+        
+        logging.info(f"{task_config['name']} 共 {total} 个职位，分 {remaining[-1]} 页并发获取 (并发数: {self.max_workers})")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(
+                    self._request_jobs, task_config,
+                    self._page_params(task_config, page, page_size),
+                    f"{task_config['name']} 第{page}页"
+                ): page
+                for page in remaining
+            }
+            for future in as_completed(futures):
+                page = futures[future]
+                result = future.result()
+                if result is None:
+                    logging.error(f"❌ {task_config['name']} 第{page}页获取失败，该工作表保留已有缓存")
+                    self.partial_sheets.add(task_config['sheet_name'])
                     continue
-                    
-            except requests.exceptions.Timeout:
-                logging.warning(f"⚠️ {task_config['name']} 请求超时")
-                if attempt == max_retries - 1:
-                    logging.error(f"❌ {task_config['name']} 多次超时，获取失败")
-                    return []
-                continue
-                
-            except requests.exceptions.ConnectionError:
-                logging.warning(f"⚠️ {task_config['name']} 连接错误")
-                if attempt == max_retries - 1:
-                    logging.error(f"❌ {task_config['name']} 连接失败")
-                    return []
-                continue
-                
+                yield page, result[0]
+    
+    @staticmethod
+    def _task_limit(task_config: Dict[str, Any]) -> int:
+        """任务参数中的职位数上限，0表示不限。"""
+        return int(task_config['params'].get('limit') or 0)
+    
+    def _plan_pages(self, task_config: Dict[str, Any], total: Optional[int]) -> Optional[Tuple[int, range]]:
+        """分页抓取的页码规划，同步和异步引擎共用：根据第1页返回的职位总数得出 (应抓取的总数, 还需请求的页码)。
+        
+        总数按任务上限截断，页数向上取整；接口未返回总数时返回None，调用方改为顺序翻页（见 _has_next_page）。
+        """
+        if total is None:
+            return None
+        max_total = self._task_limit(task_config)
+        if max_total:
+            total = min(total, max_total)
+        return total, range(2, math.ceil(total / self.page_size) + 1)
+    
+    def _has_next_page(self, task_config: Dict[str, Any], jobs: List[Dict[str, Any]], fetched: int) -> bool:
+        """顺序翻页时是否还需要请求下一页：上一页是满页且尚未达到任务上限。"""
+        max_total = self._task_limit(task_config)
+        return len(jobs) == self.page_size and (not max_total or fetched < max_total)
+    
+    @staticmethod
+    def _page_params(task_config: Dict[str, Any], page: int, page_size: int) -> Dict[str, Any]:
+        """基于任务参数生成指定页的请求参数。"""
+        params = dict(task_config['params'])
+        params['current'] = page
+        params['limit'] = page_size
+        return params
+    
+    @staticmethod
+    def _take_until_known(pages: List[Optional[List[Dict[str, Any]]]], is_known: Callable[[Dict[str, Any]], bool],
+                          page_size: int, max_total: int = 0) -> Tuple[Optional[List[Dict[str, Any]]], bool]:
+        """增量抓取的判定逻辑，同步和异步引擎共用：从已请求的各页（按页码顺序，请求失败为None）中取出新增职位。
+        
+        返回 (新增职位, 是否结束)。遇到第一个已知职位时返回其之前的所有职位；
+        有页请求失败、结果不是按发布时间倒序、翻到最后一页或超过任务上限仍未遇到已知职位时返回 (None, True)，
+        调用方应改为全量抓取；都不满足时返回 (None, False)，调用方继续请求下一页。
+        """
+        delta: List[Dict[str, Any]] = []
+        for jobs in pages:
+            if jobs is None or not WatermarkStore.is_newest_first(jobs):
+                return None, True
+            for index, job in enumerate(jobs):
+                if is_known(job):
+                    return delta + jobs[:index], True
+            delta.extend(jobs)
+            if len(jobs) < page_size or (max_total and len(delta) >= max_total):
+                return None, True
+        return None, False
+    
+    def _incremental_scan(self, task_config: Dict[str, Any]) -> Optional[Tuple[int, int, Callable[[Dict[str, Any]], bool]]]:
+        """增量抓取的参数 (每页条数, 任务上限, 已知职位判断)；任务没有水位线时返回None。"""
+        sheet_name = task_config['sheet_name']
+        if not self.watermarks.get(sheet_name):
+            return None
+        page_size = self.page_size or INCREMENTAL_PAGE_SIZE
+        return page_size, self._task_limit(task_config), lambda job: self.watermarks.is_known(sheet_name, job)
+    
+    def _fetch_incremental(self, task_config: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """增量抓取：按发布时间倒序逐页请求，遇到已知职位即停止，返回新增的原始职位列表或None。"""
+        scan = self._incremental_scan(task_config)
+        if scan is None:
+            return None
+        page_size, max_total, is_known = scan
+        pages: List[Optional[List[Dict[str, Any]]]] = []
+        while True:
+            page = len(pages) + 1
+            result = self._request_jobs(task_config, self._page_params(task_config, page, page_size),
+                                        f"{task_config['name']} 增量第{page}页")
+            pages.append(result[0] if result else None)
+            delta, finished = self._take_until_known(pages, is_known, page_size, max_total)
+            if finished:
+                return self._log_incremental(task_config, delta, len(pages))
+    
+    @staticmethod
+    def _log_incremental(task_config: Dict[str, Any], delta: Optional[List[Dict[str, Any]]],
+                         page_count: int) -> Optional[List[Dict[str, Any]]]:
+        if delta is not None:
+            logging.info(f"✅ {task_config['name']} 增量抓取: 新增 {len(delta)} 个职位，共请求 {page_count} 页")
+        return delta
+    
+    def _apply_delta(self, task_config: Dict[str, Any], delta: List[Dict[str, Any]],
+                     cached: Dict[str, List[Dict[str, Any]]]) -> pd.DataFrame:
+        """暂存增量职位的水位线，并把增量合并进该工作表的已有缓存。"""
+        self.watermarks.stage(task_config['sheet_name'], delta)
+        return self._merge_delta(delta, cached.get(task_config['sheet_name'], []))
+    
+    def load_json_cache(self) -> Dict[str, List[Dict[str, Any]]]:
+        """读取已有JSON缓存，用于增量结果的合并"""
+        try:
+            return self.store.load()
+        except Exception as e:
+            logging.warning(f"读取JSON缓存失败: {e}")
+        return {}
+    
+    @staticmethod
+    def _merge_cached(df: pd.DataFrame, cached_records: List[Dict[str, Any]]) -> pd.DataFrame:
+        """把新抓取的职位放在已有缓存之前，并按职位ID去重（保留新抓取的记录）"""
+        merged = pd.concat([df, pd.DataFrame(cached_records)], ignore_index=True)
+        if '职位ID' in merged.columns:
+            merged = merged.drop_duplicates(subset=['职位ID'], keep='first').reset_index(drop=True)
+        return merged
+    
+    def _merge_delta(self, delta: List[Dict[str, Any]], cached_records: List[Dict[str, Any]]) -> pd.DataFrame:
+        """处理增量职位并合并进已有缓存"""
+        return self._merge_cached(self.process_job_data(delta) if delta else pd.DataFrame(), cached_records)
+    
+    def _keep_partial_sheets(self, data_frames: Dict[str, pd.DataFrame]) -> None:
+        """没有抓取完整的工作表并入已有缓存中的职位，避免缺页的结果覆盖完整缓存；其水位线也不推进。"""
+        cached = self.load_json_cache()
+        for sheet_name in sorted(self.partial_sheets):
+            records = cached.get(sheet_name, [])
+            logging.warning(f"⚠️ {sheet_name} 有请求获取失败，保留已有缓存中的 {len(records)} 个职位")
+            data_frames[sheet_name] = self._merge_cached(data_frames.get(sheet_name, pd.DataFrame()), records)
+            self.watermarks.discard(sheet_name)
+    
+    @staticmethod
+    def _parse_jobs_payload(data: Any, label: str) -> Optional[Tuple[List[Dict[str, Any]], Optional[int]]]:
+        """从接口响应中取出 (职位列表, 职位总数)，格式异常时返回None。"""
+        if 'data' in data and 'job_post_list' in data['data']:
+            jobs = data['data']['job_post_list']
+            total = data['data'].get('count')
+            logging.info(f"✅ {label} 获取成功: {len(jobs)} 个职位")
+            return jobs, (int(total) if total is not None else None)
+        elif 'data' in data and isinstance(data['data'], list):
+            # 兼容不同的API响应格式
+            jobs = data['data']
+            logging.info(f"✅ {label} 获取成功: {len(jobs)} 个职位")
+            return jobs, None
+        
+        logging.warning(f"⚠️ {label} 数据格式异常: {list(data.keys()) if isinstance(data, dict) else type(data)}")
+        return None
+    
+    @staticmethod
+    def _log_attempt(label: str, attempt: int) -> None:
+        if attempt > 0:
+            logging.info(f"重试获取 {label} 数据 (第{attempt+1}次)...")
+        else:
+            logging.info(f"正在获取 {label} 数据...")
+    
+    @staticmethod
+    def _log_request_error(label: str, error: Exception, last_attempt: bool) -> None:
+        """记录请求抛出的异常，之后继续下一次尝试。"""
+        if isinstance(error, TIMEOUT_ERRORS):
+            logging.warning(f"⚠️ {label} 请求超时")
+            if last_attempt:
+                logging.error(f"❌ {label} 多次超时，获取失败")
+        elif isinstance(error, CONNECTION_ERRORS):
+            logging.warning(f"⚠️ {label} 连接错误")
+            if last_attempt:
+                logging.error(f"❌ {label} 连接失败")
+        else:
+            logging.error(f"❌ {label} 获取失败: {error}")
+    
+    def _check_response(self, label: str, status: int, text: str,
+                        last_attempt: bool) -> Tuple[str, Optional[Tuple[List[Dict[str, Any]], Optional[int]]]]:
+        """判断一次响应的处理方式，同步和异步引擎共用。
+        
+        返回 (结论, 结果)：'ok' 表示成功，结果为 (职位列表, 职位总数)；'retry' 继续下一次尝试；
+        'rate_limited' 下次尝试前额外等待 RATE_LIMIT_DELAY 秒；'give_up' 不再重试。
+        """
+        logging.info(f"{label} 响应状态码: {status}")
+        if status == 200:
+            try:
+                result = self._parse_jobs_payload(json.loads(text), label)
+            except json.JSONDecodeError as e:
+                logging.error(f"❌ {label} JSON解析失败: {e}")
+                return 'retry', None
             except Exception as e:
-                logging.error(f"❌ {task_config['name']} 获取失败: {e}")
-                if attempt == max_retries - 1:
-                    return []
+                logging.error(f"❌ {label} 获取失败: {e}")
+                return 'retry', None
+            return ('ok', result) if result is not None else ('retry', None)
+        
+        if status == 429:
+            # 请求频率限制
+            logging.warning(f"⚠️ {label} 请求频率限制，等待重试...")
+            if last_attempt:
+                logging.error(f"❌ {label} 请求频率限制，重试失败")
+                return 'give_up', None
+            return 'rate_limited', None
+        
+        if status in [403, 404]:
+            # 权限或资源不存在错误，不重试
+            logging.error(f"❌ {label} 请求失败: {status} - {text[:200]}")
+            return 'give_up', None
+        
+        logging.error(f"❌ {label} 请求失败: {status}")
+        return 'retry', None
+    
+    def _with_retries(self, label: str, attempt: Callable[[], Tuple[int, str]],
+                      backoff: Tuple[float, ...] = REQUEST_BACKOFF) -> Optional[Tuple[List[Dict[str, Any]], Optional[int]]]:
+        """按退避时间表重试 attempt()（返回 (状态码, 响应文本)），成功返回 (职位列表, 职位总数)，失败返回None。"""
+        extra_delay = 0
+        for index, delay in enumerate(backoff):
+            last_attempt = index == len(backoff) - 1
+            self._log_attempt(label, index)
+            # 添加延迟避免请求过于频繁
+            if delay + extra_delay:
+                time.sleep(delay + extra_delay)
+            try:
+                status, text = attempt()
+            except Exception as e:
+                self._log_request_error(label, e, last_attempt)
                 continue
+            verdict, result = self._check_response(label, status, text, last_attempt)
+            if verdict in ('ok', 'give_up'):
+                return result
+            extra_delay = RATE_LIMIT_DELAY if verdict == 'rate_limited' else 0
+        return None
+    
+    def _request_jobs(self, task_config: Dict[str, Any], params: Dict[str, Any],
+                      label: str) -> Optional[Tuple[List[Dict[str, Any]], Optional[int]]]:
+        """发送单个请求并带重试，成功返回 (职位列表, 职位总数)，失败返回None。"""
+        def attempt() -> Tuple[int, str]:
+            # 调试：打印请求信息
+            full_url = f"{task_config['api_url']}?{'&'.join([f'{k}={v}' for k, v in params.items()])}"
+            logging.info(f"请求URL: {full_url}")
+            
+            response = self.session.get(
+                task_config['api_url'],
+                params=params,
+                timeout=30
+            )
+            
+            # 调试：打印响应信息
+            logging.info(f"响应头: {dict(response.headers)}")
+            logging.info(f"响应内容前200字符: {response.text[:200]}")
+            return response.status_code, response.text
         
-        return []
+        return self._with_retries(label, attempt)
     
     def process_job_data(self, jobs: List[Dict[str, Any]]) -> pd.DataFrame:
-        """处理职位数据"""
+        """处理职位数据（字段来源见 job_schema.SIMPLE_JOB_SCHEMA）"""
+        normalize = SIMPLE_JOB_SCHEMA.normalize
         processed_jobs = []
         
         for job in jobs:
             try:
-                processed_job = {
-                    '职位名称': job.get('title', ''),
-                    '部门': job.get('department', ''),
-                    '工作地点': job.get('city_info', {}).get('city_name', ''),
-                    '发布时间': job.get('publish_time', ''),
-                    '更新时间': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    '职位ID': job.get('id', ''),
-                    '职位链接': f"https://jobs.bytedance.com/campus/position/{job.get('id', '')}",
-                    '工作性质': job.get('job_type', {}).get('name', ''),
-                    '学历要求': job.get('requirement', ''),
-                    '职位描述': job.get('description', '')[:500] + '...' if len(job.get('description', '')) > 500 else job.get('description', '')
-                }
-                processed_jobs.append(processed_job)
+                processed_jobs.append(normalize(job))
             except Exception as e:
                 logging.warning(f"处理职位数据时出错: {e}")
                 continue
         
-        return pd.DataFrame(processed_jobs)
+        if not processed_jobs:
+            return pd.DataFrame()
+        df = pd.DataFrame(processed_jobs)
+        df['更新时间'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        return df
+    
+    @staticmethod
+    def write_excel(filename: Path, data: Dict[str, Any]) -> None:
+        """把各工作表的数据框或记录列表写入Excel文件，列宽按内容自动调整。"""
+        frames = {
+            sheet_name: records if isinstance(records, pd.DataFrame) else pd.DataFrame(list(records))
+            for sheet_name, records in data.items()
+        }
+        frames = {sheet_name: df for sheet_name, df in frames.items() if not df.empty}
+        write_frames(filename, frames, column_widths={
+            sheet_name: column_widths(df) for sheet_name, df in frames.items()
+        })
     
     def save_to_excel(self, data_frames: Dict[str, pd.DataFrame]):
-        """保存到Excel文件"""
+        """保存到Excel文件，并记录对应的数据签名供Web应用直接复用"""
         try:
-            with pd.ExcelWriter(self.filename, engine='openpyxl') as writer:
-                for sheet_name, df in data_frames.items():
-                    if not df.empty:
-                        df.to_excel(writer, sheet_name=sheet_name, index=False)
-                        
-                        # 设置列宽
-                        worksheet = writer.sheets[sheet_name]
-                        for column in worksheet.columns:
-                            max_length = 0
-                            column_letter = column[0].column_letter
-                            for cell in column:
-                                try:
-                                    if len(str(cell.value)) > max_length:
-                                        max_length = len(str(cell.value))
-                                except:
-                                    pass
-                            adjusted_width = min(max_length + 2, 50)
-                            worksheet.column_dimensions[column_letter].width = adjusted_width
-            
+            LazyExcel(self.filename, self.write_excel).build(self.store.signature(), data_frames)
             logging.info(f"✅ 数据已保存到: {self.filename}")
             
         except Exception as e:
             logging.error(f"❌ 保存Excel文件失败: {e}")
     
-    def save_json_cache(self, data_frames: Dict[str, pd.DataFrame]):
-        """保存JSON缓存"""
+    def save_json_cache(self, data_frames: Dict[str, pd.DataFrame]) -> bool:
+        """保存JSON缓存，返回是否保存成功"""
         try:
             cache_data = {}
             for sheet_name, df in data_frames.items():
                 if not df.empty:
                     cache_data[sheet_name] = df.to_dict('records')
             
-            with open(JSON_CACHE_FILENAME, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
+            self.store.save(cache_data)
             
-            logging.info(f"✅ JSON缓存已保存到: {JSON_CACHE_FILENAME}")
+            logging.info(f"✅ 职位数据已保存到{self.store.backend}存储: {self.store.path}")
+            return True
             
         except Exception as e:
             logging.error(f"❌ 保存JSON缓存失败: {e}")
+            return False
+    
+    def _fetch_and_process_pages(self, task_config: Dict[str, Any]) -> Tuple[pd.DataFrame, int]:
+        """分页模式：每页到达后立即处理，最后按页码顺序拼接。"""
+        page_frames: Dict[int, pd.DataFrame] = {}
+        job_count = 0
+        
+        for page, jobs in self.iter_job_pages(task_config):
+            if jobs:
+                page_frames[page] = self.process_job_data(jobs)
+                self.watermarks.stage(task_config['sheet_name'], jobs)
+                job_count += len(jobs)
+        
+        if not page_frames:
+            return pd.DataFrame(), 0
+        
+        df = pd.concat([page_frames[page] for page in sorted(page_frames)], ignore_index=True)
+        logging.info(f"✅ {task_config['name']} 分页获取完成: {job_count} 个职位")
+        return df, job_count
+    
+    async def _request_jobs_async(self, client: "aiohttp.ClientSession", task_config: Dict[str, Any],
+                                  params: Dict[str, Any], label: str,
+                                  backoff: Tuple[float, ...] = REQUEST_BACKOFF) -> Optional[Tuple[List[Dict[str, Any]], Optional[int]]]:
+        """_request_jobs的异步版本（重试规则同 _with_retries），退避等待使用asyncio.sleep，不阻塞其他任务。"""
+        extra_delay = 0
+        for index, delay in enumerate(backoff):
+            last_attempt = index == len(backoff) - 1
+            self._log_attempt(label, index)
+            if delay + extra_delay:
+                await asyncio.sleep(delay + extra_delay)
+            try:
+                async with client.get(task_config['api_url'], params=params) as response:
+                    status, text = response.status, await response.text()
+            except Exception as e:
+                self._log_request_error(label, e, last_attempt)
+                continue
+            verdict, result = self._check_response(label, status, text, last_attempt)
+            if verdict in ('ok', 'give_up'):
+                return result
+            extra_delay = RATE_LIMIT_DELAY if verdict == 'rate_limited' else 0
+        return None
+    
+    async def _fetch_incremental_async(self, client: "aiohttp.ClientSession",
+                                       task_config: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """_fetch_incremental的异步版本。"""
+        scan = self._incremental_scan(task_config)
+        if scan is None:
+            return None
+        page_size, max_total, is_known = scan
+        pages: List[Optional[List[Dict[str, Any]]]] = []
+        while True:
+            page = len(pages) + 1
+            result = await self._request_jobs_async(client, task_config, self._page_params(task_config, page, page_size),
+                                                    f"{task_config['name']} 增量第{page}页")
+            pages.append(result[0] if result else None)
+            delta, finished = self._take_until_known(pages, is_known, page_size, max_total)
+            if finished:
+                return self._log_incremental(task_config, delta, len(pages))
+    
+    async def _fetch_task_async(self, client: "aiohttp.ClientSession", task_config: Dict[str, Any],
+                                cached: Dict[str, List[Dict[str, Any]]]) -> Tuple[pd.DataFrame, int]:
+        """异步获取并处理单个任务；开启分页时各页并发请求，到达即处理。"""
+        if self.incremental:
+            delta = await self._fetch_incremental_async(client, task_config)
+            if delta is not None:
+                # 合并后的数据框包含已有缓存，本次获取的只有增量部分
+                return self._apply_delta(task_config, delta, cached), len(delta)
+        
+        if not self.page_size:
+            result = await self._request_jobs_async(client, task_config, task_config['params'], task_config['name'])
+            if result is None:
+                self.partial_sheets.add(task_config['sheet_name'])
+            jobs = result[0] if result else []
+            self.watermarks.stage(task_config['sheet_name'], jobs)
+            return (self.process_job_data(jobs), len(jobs)) if jobs else (pd.DataFrame(), 0)
+        
+        page_size = self.page_size
+        first = await self._request_jobs_async(client, task_config, self._page_params(task_config, 1, page_size), f"{task_config['name']} 第1页")
+        if first is None:
+            self.partial_sheets.add(task_config['sheet_name'])
+            return pd.DataFrame(), 0
+        
+        jobs, total = first
+        page_frames: Dict[int, pd.DataFrame] = {}
+        job_count = len(jobs)
+        if jobs:
+            page_frames[1] = self.process_job_data(jobs)
+            self.watermarks.stage(task_config['sheet_name'], jobs)
+        
+        plan = self._plan_pages(task_config, total)
+        if plan is None:
+            # 接口未返回总数时只能顺序翻页
+            page = 1
+            while self._has_next_page(task_config, jobs, job_count):
+                page += 1
+                result = await self._request_jobs_async(client, task_config, self._page_params(task_config, page, page_size), f"{task_config['name']} 第{page}页")
+                if result is None:
+                    self.partial_sheets.add(task_config['sheet_name'])
+                    break
+                jobs = result[0]
+                job_count += len(jobs)
+                if jobs:
+                    page_frames[page] = self.process_job_data(jobs)
+                    self.watermarks.stage(task_config['sheet_name'], jobs)
+        else:
+            async def fetch_page(page: int):
+                label = f"{task_config['name']} 第{page}页"
+                return page, await self._request_jobs_async(client, task_config, self._page_params(task_config, page, page_size), label)
+            
+            pending = [fetch_page(page) for page in plan[1]]
+            for next_done in asyncio.as_completed(pending):
+                page, result = await next_done
+                if result is None:
+                    logging.error(f"❌ {task_config['name']} 第{page}页获取失败，该工作表保留已有缓存")
+                    self.partial_sheets.add(task_config['sheet_name'])
+                    continue
+                if result[0]:
+                    page_frames[page] = self.process_job_data(result[0])
+                    self.watermarks.stage(task_config['sheet_name'], result[0])
+                    job_count += len(result[0])
+        
+        if not page_frames:
+            return pd.DataFrame(), 0
+        df = pd.concat([page_frames[page] for page in sorted(page_frames)], ignore_index=True)
+        logging.info(f"✅ {task_config['name']} 获取完成: {job_count} 个职位")
+        return df, job_count
+    
+    async def run_async(self, silent_mode: bool = False):
+        """异步运行监控任务：所有任务共享一个保活连接池并发抓取，返回值与run()一致。"""
+        if aiohttp is None:
+            raise RuntimeError("异步引擎需要安装aiohttp: pip install aiohttp")
+        
+        logging.info("🚀 开始执行字节跳动职位监控任务 - 简化版本（异步引擎）")
+        
+        headers = dict(self.session.headers)
+        # aiohttp仅在安装Brotli时才能解码br，这里只声明通用压缩格式
+        headers['Accept-Encoding'] = 'gzip, deflate'
+        connector = aiohttp.TCPConnector(limit_per_host=MAX_CONNECTIONS_PER_HOST, keepalive_timeout=KEEPALIVE_TIMEOUT)
+        timeout = aiohttp.ClientTimeout(total=30)
+        
+        cached = self.load_json_cache() if self.incremental else {}
+        async with aiohttp.ClientSession(connector=connector, headers=headers, timeout=timeout) as client:
+            results = await asyncio.gather(*(self._fetch_task_async(client, task_config, cached) for task_config in self.tasks))
+        
+        data_frames = {}
+        total_jobs = 0
+        for task_config, (df, job_count) in zip(self.tasks, results):
+            data_frames[task_config['sheet_name']] = df
+            total_jobs += job_count
+        
+        return self._finish_run(data_frames, total_jobs, silent_mode)
     
     def run(self, silent_mode: bool = False):
         """运行监控任务"""
@@ -286,8 +671,26 @@ class SimpleJobMonitor:
         data_frames = {}
         total_jobs = 0
         
+        cached = self.load_json_cache() if self.incremental else {}
+        
         for task_config in self.tasks:
+            if self.incremental:
+                delta = self._fetch_incremental(task_config)
+                if delta is not None:
+                    df = self._apply_delta(task_config, delta, cached)
+                    data_frames[task_config['sheet_name']] = df
+                    total_jobs += len(delta)
+                    continue
+                logging.info(f"{task_config['name']} 无法增量抓取，改为全量抓取")
+            
+            if self.page_size:
+                df, job_count = self._fetch_and_process_pages(task_config)
+                data_frames[task_config['sheet_name']] = df
+                total_jobs += job_count
+                continue
+            
             jobs = self.fetch_jobs(task_config)
+            self.watermarks.stage(task_config['sheet_name'], jobs)
             
             if jobs:
                 df = self.process_job_data(jobs)
@@ -297,9 +700,18 @@ class SimpleJobMonitor:
                 # 创建空的DataFrame
                 data_frames[task_config['sheet_name']] = pd.DataFrame()
         
+        return self._finish_run(data_frames, total_jobs, silent_mode)
+    
+    def _finish_run(self, data_frames: Dict[str, pd.DataFrame], total_jobs: int, silent_mode: bool) -> Dict[str, Any]:
+        """保存结果、发送通知并生成运行摘要，同步与异步引擎共用。"""
         if data_frames:
-            self.save_to_excel(data_frames)
-            self.save_json_cache(data_frames)
+            if self.partial_sheets:
+                self._keep_partial_sheets(data_frames)
+            saved = self.save_json_cache(data_frames)
+            # 存储保存失败时其签名仍对应旧数据，不能记录到新工作簿上
+            if self.build_excel and saved:
+                self.save_to_excel(data_frames)
+            self.watermarks.save()
         
         logging.info(f"✅ 任务完成! 共获取 {total_jobs} 个职位")
         
@@ -318,14 +730,25 @@ class SimpleJobMonitor:
             'success': True,
             'total_jobs': total_jobs,
             'tasks_completed': len(self.tasks),
+            'partial_sheets': sorted(self.partial_sheets),
             'message': f'成功获取 {total_jobs} 个职位'
         }
 
 if __name__ == "__main__":
     try:
         is_silent = "--auto" in sys.argv
-        monitor = SimpleJobMonitor(tasks=TASK_CONFIGS, filename=OUTPUT_FILENAME)
-        result = monitor.run(silent_mode=is_silent)
+        page_size = PAGE_SIZE if "--paged" in sys.argv else None
+        monitor = SimpleJobMonitor(
+            tasks=TASK_CONFIGS,
+            filename=OUTPUT_FILENAME,
+            page_size=page_size,
+            incremental="--incremental" in sys.argv,
+            build_excel="--no-excel" not in sys.argv
+        )
+        if "--async" in sys.argv:
+            result = asyncio.run(monitor.run_async(silent_mode=is_silent))
+        else:
+            result = monitor.run(silent_mode=is_silent)
         
         if result['success']:
             logging.info("🎉 程序执行成功!")
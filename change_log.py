@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+职位变更日志
+每次监控运行把新增、下线、修改的职位作为事件追加到NDJSON文件，
+索引文件记录每次运行在日志中的起始偏移，读取"某次运行之后的变更"时直接定位，
+耗时只与变更数量有关；超过保留次数的旧运行会被定期压缩掉
+"""
+
+import bisect
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from versioned_files import publish_text
+
+# 日志中保留的运行次数，超出25%后触发一次压缩
+CHANGE_LOG_RETENTION_RUNS = int(os.getenv('CHANGE_LOG_RETENTION_RUNS', 500))
+
+EVENT_ADDED = 'added'
+EVENT_REMOVED = 'removed'
+EVENT_MODIFIED = 'modified'
+
+
+class ChangeLog:
+    """追加写入的职位变更日志。
+
+    日志文件每行一个事件：{run_id, timestamp, sheet, type, job_id, title, publish_time}。
+    索引文件（同名 .index.json）保存每次运行的 [run_id, 起始偏移, 事件数, 时间]、
+    日志有效长度、日志文件的inode，以及每个工作表上次运行时在线的职位ID，用于识别下线职位。
+    索引原子发布；压缩会替换日志文件，读取方按inode判断索引与日志是否对应。
+    与 WatermarkStore 相同，运行中先 stage()，数据保存成功后再 commit()。
+    """
+
+    def __init__(self, path: Path, retention_runs: int = CHANGE_LOG_RETENTION_RUNS):
+        self.path = Path(path)
+        self.index_path = self.path.with_suffix('.index.json')
+        self.retention_runs = retention_runs
+        self._index = self._load_index()
+        self._pending_events: List[Dict[str, Any]] = []
+        self._pending_live: Dict[str, List[str]] = {}
+
+    def _load_index(self) -> Dict[str, Any]:
+        index = {'last_run_id': 0, 'end': 0, 'runs': [], 'live': {}}
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    index.update(json.load(f))
+                return index
+            except Exception as e:
+                logging.warning(f"读取变更日志索引 {self.index_path} 出错: {e}。将从日志重建索引。")
+        if self.path.exists():
+            index.update(self._scan_runs())
+        return index
+
+    def _scan_runs(self) -> Dict[str, Any]:
+        """扫描日志重建运行列表和有效长度；在线职位ID无法重建，下次运行不判断下线。"""
+        runs: List[List[Any]] = []
+        end = 0
+        with open(self.path, 'rb') as f:
+            offset = 0
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # 末尾写了一半的行不属于任何运行
+                    break
+                if not runs or runs[-1][0] != event['run_id']:
+                    runs.append([event['run_id'], offset, 0, event.get('timestamp')])
+                runs[-1][2] += 1
+                offset += len(line)
+                end = offset
+            inode = os.fstat(f.fileno()).st_ino
+        return {'last_run_id': runs[-1][0] if runs else 0, 'end': end, 'runs': runs, 'inode': inode}
+
+    def _save_index(self) -> None:
+        # 原子发布，读取方不会读到写了一半的索引
+        with publish_text(self.index_path) as f:
+            json.dump(self._index, f, ensure_ascii=False)
+
+    @property
+    def last_run_id(self) -> int:
+        return self._index['last_run_id']
+
+    @property
+    def oldest_run_id(self) -> Optional[int]:
+        """日志中仍保留的最早运行ID，更早的运行已被压缩。"""
+        runs = self._index['runs']
+        return runs[0][0] if runs else None
+
+    def live_ids(self, sheet_name: str) -> Optional[Set[str]]:
+        """上次运行结束时该工作表在线的职位ID；从未记录过时返回None。"""
+        live = self._index['live'].get(sheet_name)
+        return set(live) if live is not None else None
+
+    def stage(self, sheet_name: str, events: List[Dict[str, Any]], live_ids: Set[str]) -> None:
+        """暂存一个工作表本次运行的变更事件及在线职位ID，commit() 时写入。"""
+        for event in events:
+            self._pending_events.append({'sheet': sheet_name, **event})
+        self._pending_live[sheet_name] = sorted(live_ids)
+
+    def commit(self) -> Optional[int]:
+        """把暂存的事件作为一次运行追加到日志，返回运行ID；没有暂存内容时返回None。"""
+        if not self._pending_events and not self._pending_live:
+            return None
+
+        run_id = self.last_run_id + 1
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            with open(self.path, 'ab') as f:
+                # 丢弃上次写入后未登记到索引的残留内容
+                f.truncate(self._index['end'])
+                offset = self._index['end']
+                for event in self._pending_events:
+                    line = json.dumps({'run_id': run_id, 'timestamp': timestamp, **event}, ensure_ascii=False)
+                    f.write(line.encode('utf-8') + b'\n')
+                end = f.tell()
+                inode = os.fstat(f.fileno()).st_ino
+
+            self._index['runs'].append([run_id, offset, len(self._pending_events), timestamp])
+            self._index['end'] = end
+            self._index['inode'] = inode
+            self._index['last_run_id'] = run_id
+            self._index['live'].update(self._pending_live)
+            self._save_index()
+            logging.info(f"📝 变更日志已记录运行 #{run_id}: {len(self._pending_events)} 个事件")
+        except Exception as e:
+            logging.error(f"⚠️ 写入变更日志时出错: {e}")
+            return None
+        finally:
+            self._pending_events = []
+            self._pending_live = {}
+
+        if len(self._index['runs']) > self.retention_runs + self.retention_runs // 4:
+            self.compact(self.retention_runs)
+        return run_id
+
+    def since(self, run_id: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """返回run_id之后（不含）所有运行的事件，按写入顺序排列。
+
+        日志在读取索引之后被压缩替换时重新读取索引；仍对应不上（压缩正在进行）时从头扫描日志。
+        偏移落在行中间时跳过不完整的行，从下一个换行处继续。
+        """
+        if not self.path.exists():
+            return []
+
+        events: List[Dict[str, Any]] = []
+        with open(self.path, 'rb') as f:
+            inode = os.fstat(f.fileno()).st_ino
+            if self._index.get('inode') not in (None, inode):
+                self._index = self._load_index()
+            runs = self._index['runs']
+            position = bisect.bisect_right([run[0] for run in runs], run_id)
+            if position >= len(runs):
+                return []
+            if self._index.get('inode') in (None, inode):
+                f.seek(runs[position][1])
+                end = self._index['end']
+            else:
+                end = None
+            last_run_id = self.last_run_id
+
+            for line in f:
+                if (end is not None and f.tell() > end) or (limit is not None and len(events) >= limit):
+                    break
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    logging.warning(f"变更日志 {self.path} 中有不完整的行，已跳过")
+                    continue
+                if run_id < event.get('run_id', 0) <= last_run_id:
+                    events.append(event)
+        return events
+
+    def compact(self, keep_runs: int) -> None:
+        """只保留最近keep_runs次运行的事件，把日志尾部拷贝到新文件后替换。"""
+        runs = self._index['runs']
+        if len(runs) <= keep_runs:
+            return
+
+        kept = runs[-keep_runs:] if keep_runs > 0 else []
+        start = kept[0][1] if kept else self._index['end']
+        temp_path = self.path.with_suffix('.compact.tmp')
+        try:
+            with open(self.path, 'rb') as src, open(temp_path, 'wb') as dst:
+                src.seek(start)
+                remaining = self._index['end'] - start
+                while remaining > 0:
+                    chunk = src.read(min(remaining, 1 << 20))
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    remaining -= len(chunk)
+            os.replace(temp_path, self.path)
+
+            # 索引紧接着发布；此前读取到旧索引的请求会因inode不一致而重新读取
+            self._index['runs'] = [[run_id, offset - start, count, ts] for run_id, offset, count, ts in kept]
+            self._index['end'] -= start
+            self._index['inode'] = self.path.stat().st_ino
+            self._save_index()
+            logging.info(f"🗜️ 变更日志已压缩: 移除 {len(runs) - len(kept)} 次运行，保留 {len(kept)} 次")
+        except Exception as e:
+            logging.error(f"⚠️ 压缩变更日志时出错: {e}")
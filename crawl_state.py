@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抓取状态持久化
+保存每个任务的增量抓取水位线和导航统计，供 by.py 和 by_simple.py 共用
+"""
+
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from versioned_files import publish_text
+
+# 每个任务保留的最近职位ID数量，足以覆盖两次运行之间的新增量
+MAX_WATERMARK_IDS = 500
+# 导航基线字节数的统计口径：每个完成请求 request.sizes() 的响应头与响应体大小之和
+NAVIGATION_MEASURE = 'request_sizes'
+
+
+class WatermarkStore:
+    """按任务保存增量抓取水位线：最新的publish_time以及最近见过的职位ID集合。
+
+    接口按发布时间倒序返回职位，后续运行只需从第一页往后翻，
+    遇到第一个已知职位即可停止，其后的职位都已经在缓存里。
+    """
+
+    def __init__(self, path: Path, max_ids: int = MAX_WATERMARK_IDS):
+        self.path = Path(path)
+        self.max_ids = max_ids
+        self._watermarks: Dict[str, Dict[str, Any]] = self._load()
+        self._known_ids: Dict[str, set] = {
+            sheet: set(mark.get('job_ids', [])) for sheet, mark in self._watermarks.items()
+        }
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logging.warning(f"读取水位线文件 {self.path} 出错: {e}。将执行全量抓取。")
+            return {}
+
+    def get(self, sheet_name: str) -> Optional[Dict[str, Any]]:
+        """返回任务的水位线，不存在时返回None。"""
+        return self._watermarks.get(sheet_name)
+
+    def is_known(self, sheet_name: str, job: Dict[str, Any]) -> bool:
+        """判断接口返回的原始职位是否已在上次运行中见过。"""
+        mark = self._watermarks.get(sheet_name)
+        if not mark:
+            return False
+        if str(job.get('id')) in self._known_ids[sheet_name]:
+            return True
+        publish_time = job.get('publish_time')
+        return isinstance(publish_time, (int, float)) and publish_time < mark.get('publish_time', 0)
+
+    @staticmethod
+    def is_newest_first(jobs: List[Dict[str, Any]]) -> bool:
+        """检查接口结果是否按发布时间倒序，只有倒序结果才能在遇到已知职位时提前停止。"""
+        publish_times = [job.get('publish_time') or 0 for job in jobs]
+        return all(earlier >= later for earlier, later in zip(publish_times, publish_times[1:]))
+
+    def take_until_known(self, sheet_name: str, jobs: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """返回第一个已知职位之前的新职位；本页没有遇到已知职位时返回None。"""
+        for index, job in enumerate(jobs):
+            if self.is_known(sheet_name, job):
+                return jobs[:index]
+        return None
+
+    def stage(self, sheet_name: str, jobs: List[Dict[str, Any]]) -> None:
+        """暂存本次运行看到的原始职位，save() 时并入水位线。"""
+        if jobs:
+            self._pending.setdefault(sheet_name, []).extend(jobs)
+
+    def discard(self, sheet_name: str) -> None:
+        """丢弃任务本次暂存的职位，水位线保持上次的状态（用于没有抓取完整的任务）。"""
+        self._pending.pop(sheet_name, None)
+
+    def save(self) -> None:
+        """把暂存的职位合并进水位线并写入磁盘，应在数据成功保存之后调用。"""
+        if not self._pending:
+            return
+
+        for sheet_name, jobs in self._pending.items():
+            previous = self._watermarks.get(sheet_name, {})
+            newest = sorted(jobs, key=lambda job: job.get('publish_time') or 0, reverse=True)
+            job_ids = [str(job.get('id')) for job in newest if job.get('id') is not None]
+            # 新ID在前，旧ID补足剩余名额
+            seen = set(job_ids)
+            job_ids += [job_id for job_id in previous.get('job_ids', []) if job_id not in seen]
+            job_ids = job_ids[:self.max_ids]
+
+            self._watermarks[sheet_name] = {
+                'publish_time': max([newest[0].get('publish_time') or 0, previous.get('publish_time', 0)]),
+                'job_ids': job_ids,
+                'updated_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            self._known_ids[sheet_name] = set(job_ids)
+        self._pending.clear()
+
+        try:
+            # 原子替换，写入中途退出不会留下截断的文件
+            with publish_text(self.path) as f:
+                json.dump(self._watermarks, f, ensure_ascii=False)
+            logging.info(f"💾 增量抓取水位线已保存至: {self.path}")
+        except Exception as e:
+            logging.error(f"⚠️ 保存水位线文件时出错: {e}")
+
+
+class NavigationStats:
+    """记录每个任务完整页面导航的请求数和字节数，作为精简导航节省量的对比基线。"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._baselines: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._baselines = json.load(f)
+            except Exception as e:
+                logging.warning(f"读取导航统计文件 {self.path} 出错: {e}")
+        self._dirty = False
+
+    def baseline(self, sheet_name: str) -> Optional[Dict[str, Any]]:
+        """返回最近一次完整导航的统计，不存在时返回None。
+
+        按 content-length 头统计的旧基线字节数偏小，视为不存在，等下次完整导航重新记录。
+        """
+        baseline = self._baselines.get(sheet_name)
+        if baseline is None or baseline.get('measure') != NAVIGATION_MEASURE:
+            return None
+        return baseline
+
+    def record_baseline(self, sheet_name: str, requests: int, bytes_loaded: int) -> None:
+        self._baselines[sheet_name] = {
+            'requests': requests,
+            'bytes': bytes_loaded,
+            'measure': NAVIGATION_MEASURE,
+            'updated_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        self._dirty = True
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        try:
+            with publish_text(self.path) as f:
+                json.dump(self._baselines, f, ensure_ascii=False)
+            self._dirty = False
+        except Exception as e:
+            logging.error(f"⚠️ 保存导航统计文件时出错: {e}")
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+单遍流式Excel导出
+使用 openpyxl 的只写模式逐行写出工作表，新职位行在写入时直接套用共享的高亮样式，
+不再先用 pandas 写出整个工作簿、再整体读回逐格上色并二次保存；
+内存占用与行数无关，所有高亮单元格引用同一个样式。
+Excel是由职位数据派生的文件：LazyExcel 在首次下载时生成，并按数据签名缓存，
+监控运行不再为生成工作簿付出时间
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import pandas as pd
+except ImportError:  # 纯API版本不安装pandas，只能使用 StreamingWorkbook.write_sheet
+    pd = None
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+from job_text import JOB_DETAILS_FIELD, TEAM_INTRO_FIELD, segment_frame
+from versioned_files import publish_file, publish_text
+
+HEADER_STYLE_NAME = 'job_header'
+HIGHLIGHT_STYLE_NAME = 'job_highlight'
+HIGHLIGHT_COLOR = 'FFFF00'
+# 自动列宽的上限
+MAX_COLUMN_WIDTH = 50
+# 估算列宽时抽样的行数
+COLUMN_WIDTH_SAMPLE = 1000
+
+# 职位追踪表（by.py 数据）导出的字段及中文列名
+TRACKER_COLUMNS = ['title', TEAM_INTRO_FIELD, JOB_DETAILS_FIELD, 'requirement', 'publish_time', 'code', '职位链接', 'highlight_time']
+TRACKER_COLUMN_NAMES = {
+    'title': '职位标题',
+    TEAM_INTRO_FIELD: '团队介绍',
+    JOB_DETAILS_FIELD: '岗位细节',
+    'requirement': '职位要求',
+    'publish_time': '发布时间',
+    'code': '职位编号',
+    'highlight_time': '更新时间'
+}
+TRACKER_HIGHLIGHT_COLUMN = '更新时间'
+
+
+def _header_style() -> NamedStyle:
+    # 与 pandas.to_excel 的表头样式一致：加粗、居中、细边框
+    style = NamedStyle(name=HEADER_STYLE_NAME)
+    style.font = Font(bold=True)
+    style.alignment = Alignment(horizontal='center', vertical='top')
+    thin = Side(style='thin')
+    style.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    return style
+
+
+def _highlight_style() -> NamedStyle:
+    style = NamedStyle(name=HIGHLIGHT_STYLE_NAME)
+    style.fill = PatternFill(start_color=HIGHLIGHT_COLOR, end_color=HIGHLIGHT_COLOR, fill_type='solid')
+    return style
+
+
+def frame_rows(df: 'pd.DataFrame') -> Iterable[tuple]:
+    """按行生成单元格值，空值转为None（写出为空单元格）。"""
+    return df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
+
+class StreamingWorkbook:
+    """只写模式的工作簿，按工作表逐行写入。"""
+
+    def __init__(self):
+        self.workbook = Workbook(write_only=True)
+        self.workbook.add_named_style(_header_style())
+        self.workbook.add_named_style(_highlight_style())
+
+    @staticmethod
+    def _styled_cell(worksheet, value: Any, style_name: str) -> WriteOnlyCell:
+        # 命名样式在工作簿中只登记一次，单元格只保存对它的引用
+        cell = WriteOnlyCell(worksheet, value=value)
+        cell.style = style_name
+        return cell
+
+    def write_sheet(self, sheet_name: str, columns: Sequence[str], rows: Iterable[Sequence[Any]],
+                    highlight: Optional[Iterable[bool]] = None,
+                    column_widths: Optional[Sequence[float]] = None) -> int:
+        """写入一个工作表，highlight 与 rows 一一对应，为True的行整行高亮；返回高亮的行数。"""
+        worksheet = self.workbook.create_sheet(title=sheet_name)
+        # 只写模式下列宽必须在写入第一行之前设置
+        for position, width in enumerate(column_widths or []):
+            worksheet.column_dimensions[get_column_letter(position + 1)].width = width
+
+        worksheet.append([self._styled_cell(worksheet, column, HEADER_STYLE_NAME) for column in columns])
+        highlighted = 0
+        flags = iter(highlight) if highlight is not None else None
+        for row in rows:
+            if flags is not None and next(flags):
+                worksheet.append([self._styled_cell(worksheet, value, HIGHLIGHT_STYLE_NAME) for value in row])
+                highlighted += 1
+            else:
+                worksheet.append(row)
+        return highlighted
+
+    def write_frame(self, sheet_name: str, df: 'pd.DataFrame', highlight_column: Optional[str] = None,
+                    column_widths: Optional[Sequence[float]] = None) -> int:
+        """写入DataFrame；highlight_column 不为空的行高亮。"""
+        highlight = None
+        if highlight_column is not None and highlight_column in df.columns:
+            highlight = df[highlight_column].notna().tolist()
+        return self.write_sheet(sheet_name, [str(column) for column in df.columns], frame_rows(df),
+                                highlight=highlight, column_widths=column_widths)
+
+    def save(self, filename: Path) -> None:
+        self.workbook.save(filename)
+
+
+def write_frames(filename: Path, frames: Dict[str, 'pd.DataFrame'], highlight_column: Optional[str] = None,
+                 column_widths: Optional[Dict[str, List[float]]] = None) -> Dict[str, int]:
+    """把多个DataFrame各写为一个工作表并保存，返回各工作表高亮的行数。"""
+    workbook = StreamingWorkbook()
+    highlight_stats = {}
+    for sheet_name, df in frames.items():
+        highlight_stats[sheet_name] = workbook.write_frame(
+            sheet_name, df, highlight_column=highlight_column,
+            column_widths=(column_widths or {}).get(sheet_name)
+        )
+    workbook.save(filename)
+    return highlight_stats
+
+
+def sample_positions(total: int, sample_size: int = COLUMN_WIDTH_SAMPLE) -> range:
+    """在 0..total-1 中等间隔取不超过 sample_size 个下标。"""
+    step = max(total // max(sample_size, 1), 1)
+    return range(0, total, step)[:sample_size]
+
+
+def column_widths(df: 'pd.DataFrame', sample_size: int = COLUMN_WIDTH_SAMPLE) -> List[float]:
+    """按表头和抽样行文本的最大长度估算列宽（不超过 MAX_COLUMN_WIDTH）。
+
+    列宽只是显示用的估计值，行数超过 sample_size 时等间隔抽样，耗时与总行数无关。
+    """
+    if len(df) > sample_size:
+        df = df.iloc[sample_positions(len(df), sample_size)]
+    widths = []
+    for column in df.columns:
+        lengths = df[column].astype(str).str.len()
+        longest = max(len(str(column)), int(lengths.max()) if len(lengths) else 0)
+        widths.append(min(longest + 2, MAX_COLUMN_WIDTH))
+    return widths
+
+
+def tracker_frame(df: 'pd.DataFrame') -> 'pd.DataFrame':
+    """把 by.py 的职位数据框转换为追踪表：读取拆分好的职位描述、添加职位链接、只保留指定字段并改为中文列名。"""
+    # 团队介绍和岗位细节在入库时已拆分保存，只有旧数据中缺少的行才在这里补拆
+    excel_df = segment_frame(df, df)
+    if 'job_id' in excel_df.columns:
+        excel_df = excel_df.assign(职位链接=excel_df['job_id'].apply(
+            lambda x: f"https://jobs.bytedance.com/campus/position/{x}/detail" if pd.notna(x) else ""
+        ))
+    available_columns = [col for col in TRACKER_COLUMNS if col in excel_df.columns]
+    return excel_df[available_columns].rename(columns=TRACKER_COLUMN_NAMES)
+
+
+def write_tracker_workbook(filename: Path, data: Dict[str, Any]) -> Dict[str, int]:
+    """写出职位追踪表，data为各工作表的数据框或记录列表；新职位行高亮。"""
+    frames = {
+        sheet_name: tracker_frame(records if isinstance(records, pd.DataFrame) else pd.DataFrame(list(records)))
+        for sheet_name, records in data.items()
+    }
+    return write_frames(filename, frames, highlight_column=TRACKER_HIGHLIGHT_COLUMN)
+
+
+class LazyExcel:
+    """按数据签名缓存的Excel文件。
+
+    get() 在数据签名与上次生成时不同时才调用 write(临时路径, 数据) 重新生成，
+    生成结果经 publish_file 原子替换；签名记录在同名的 .signature.json 中，多个进程共用。
+    """
+
+    def __init__(self, path: Path, write: Callable[[Path, Dict[str, Any]], Any]):
+        self.path = Path(path)
+        self.signature_path = self.path.with_name(f"{self.path.stem}.signature.json")
+        self.write = write
+        self._lock = threading.Lock()
+
+    def _built_signature(self) -> Optional[Tuple]:
+        if not self.path.exists():
+            return None
+        try:
+            with open(self.signature_path, 'r', encoding='utf-8') as f:
+                return tuple(json.load(f)['signature'])
+        except Exception:
+            return None
+
+    def build(self, signature: Optional[Tuple], data: Dict[str, Any]) -> Any:
+        """用给定数据生成Excel，并记录其对应的数据签名；返回write()的结果。"""
+        with publish_file(self.path) as temp_path:
+            result = self.write(temp_path, data)
+        if signature is not None:
+            # 签名文件同样原子发布，其他进程的 get() 不会读到写了一半的内容
+            with publish_text(self.signature_path) as f:
+                json.dump({'signature': list(signature)}, f)
+        logging.info(f"📗 Excel文件已生成: {self.path}")
+        return result
+
+    def get(self, store) -> Optional[Path]:
+        """返回与存储中当前数据一致的Excel文件路径；没有数据时返回None。"""
+        signature = store.signature()
+        if signature is None:
+            return self.path if self.path.exists() else None
+        with self._lock:
+            if self._built_signature() != tuple(signature):
+                self.build(signature, store.cached())
+        return self.path
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON接口的条件请求与预压缩响应缓存
+ETag由接口键和数据版本推导，客户端带 If-None-Match 轮询且数据未变时直接返回304，
+无需读取数据；较小的响应体只序列化一次，gzip/brotli压缩结果按版本缓存，所有缓存的响应体共用一个字节预算。
+响应体超过单个缓存上限时改为分块流式输出（可边编码边gzip压缩），单个请求的内存占用不超过该上限
+"""
+
+import gzip
+import hashlib
+import itertools
+import logging
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional
+
+from flask import Response, current_app, request
+
+from json_stream import iter_json_bytes
+
+try:
+    import brotli  # 可选依赖，未安装时只提供gzip
+except ImportError:
+    brotli = None
+
+# 所有缓存响应体（含压缩版本）的总字节数上限，超出后淘汰最久未使用的
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+# 单个响应体的缓存上限，也是生成响应时缓冲的上限；超出的响应每次流式生成
+RESPONSE_CACHE_MAX_BODY = int(os.getenv('RESPONSE_CACHE_MAX_BODY', 1024 * 1024))
+# 每个缓存项在字节预算中额外计入的开销，只记录“流式输出”的缓存项也占用预算
+ENTRY_OVERHEAD = 256
+# 小于该字节数的响应不压缩
+COMPRESS_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _gzip_stream(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """边生成边gzip压缩，用于不缓存的大响应。"""
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+class _CachedBody:
+    """某个数据版本的一份响应：原始JSON字节及按需生成的压缩版本。
+
+    bodies为None表示响应体超过缓存上限，该版本的每次请求都流式生成。
+    """
+
+    def __init__(self, version: Hashable, etag: str, body: Optional[bytes]):
+        self.version = version
+        self.etag = etag
+        self.bodies: Optional[Dict[str, bytes]] = {'identity': body} if body is not None else None
+
+    @property
+    def size(self) -> int:
+        return ENTRY_OVERHEAD + sum(len(body) for body in (self.bodies or {}).values())
+
+
+class ResponseCache:
+    """按 (接口键, 数据版本) 缓存JSON响应。
+
+    每种内容编码使用不同的强ETag（"<摘要>"、"<摘要>-gzip"、"<摘要>-br"），
+    判断 If-None-Match 时任一编码的ETag都视为同一版本。
+    """
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Hashable, _CachedBody]' = OrderedDict()
+        self._bytes = 0
+
+    @staticmethod
+    def _etag(key: Hashable, version: Hashable) -> str:
+        return hashlib.blake2b(repr((key, version)).encode('utf-8'), digest_size=12).hexdigest()
+
+    @staticmethod
+    def _encoding_etag(etag: str, encoding: str) -> str:
+        return etag if encoding == 'identity' else f"{etag}-{encoding}"
+
+    @staticmethod
+    def _negotiate(size: int) -> str:
+        if size < COMPRESS_MIN_SIZE:
+            return 'identity'
+        offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+        return request.accept_encodings.best_match(offered) or 'identity'
+
+    def _not_modified(self, etag: str) -> bool:
+        if_none_match = request.if_none_match
+        if not if_none_match:
+            return False
+        return if_none_match.star_tag or any(
+            if_none_match.contains(self._encoding_etag(etag, encoding))
+            for encoding in ('identity', 'gzip', 'br')
+        )
+
+    def _evict(self) -> None:
+        # 调用方持有锁
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+
+    def _store(self, key: Hashable, entry: _CachedBody) -> None:
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self._evict()
+
+    def _add_encoding(self, key: Hashable, entry: _CachedBody, encoding: str, body: bytes) -> None:
+        """把压缩后的响应体加入缓存项，并计入字节预算。"""
+        with self._lock:
+            if encoding in entry.bodies:
+                return
+            entry.bodies[encoding] = body
+            # 缓存项已被淘汰或替换时只保留在本次请求持有的对象上，不计入预算
+            if self._entries.get(key) is entry:
+                self._bytes += len(body)
+                self._evict()
+
+    @staticmethod
+    def _finish(response: Response, etag: str, encoding: str) -> Response:
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def _stream(self, etag: str, chunks: Iterator[bytes]) -> Response:
+        encoding = 'gzip' if request.accept_encodings['gzip'] else 'identity'
+        if encoding == 'gzip':
+            chunks = _gzip_stream(chunks)
+        response = current_app.response_class(chunks, mimetype='application/json')
+        return self._finish(response, self._encoding_etag(etag, encoding), encoding)
+
+    def respond(self, key: Hashable, version: Optional[Hashable], build: Callable[[], Any]) -> Response:
+        """返回key对应接口在version数据版本下的响应，build()生成要序列化的数据。
+
+        version为None（无数据）时不使用缓存，每次调用build()。
+        """
+        if version is None:
+            response = current_app.response_class(iter_json_bytes(build()), mimetype='application/json')
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        etag = self._etag(key, version)
+        if self._not_modified(etag):
+            return self._finish(current_app.response_class(status=304), etag, 'identity')
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(key)
+            else:
+                entry = None
+
+        if entry is None:
+            # 序列化在锁外进行，并发的首次请求最多重复构建一次
+            chunks = iter_json_bytes(build())
+            buffered = []
+            size = 0
+            for chunk in chunks:
+                buffered.append(chunk)
+                size += len(chunk)
+                if size > RESPONSE_CACHE_MAX_BODY:
+                    # 响应体过大：记下该版本不缓存，已编码部分与剩余部分一起流式输出
+                    self._store(key, _CachedBody(version, etag, None))
+                    logging.info(f"🌊 接口响应 {key} 超过缓存上限，改为流式输出")
+                    return self._stream(etag, itertools.chain(buffered, chunks))
+            entry = _CachedBody(version, etag, b''.join(buffered))
+            self._store(key, entry)
+            logging.info(f"🗜️ 已缓存接口响应 {key}: {size} 字节")
+        elif entry.bodies is None:
+            return self._stream(etag, iter_json_bytes(build()))
+
+        encoding = self._negotiate(len(entry.bodies['identity']))
+        body = entry.bodies.get(encoding)
+        if body is None:
+            # 并发请求可能重复压缩，结果相同，只保留先加入的一份
+            body = _compress(entry.bodies['identity'], encoding)
+            self._add_encoding(key, entry, encoding, body)
+
+        response = current_app.response_class(body, mimetype='application/json')
+        return self._finish(response, self._encoding_etag(entry.etag, encoding), encoding)
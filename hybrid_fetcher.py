@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+混合抓取：从一次Playwright会话中采集请求凭据，之后用普通HTTP请求重放职位接口
+凭据（Cookie、请求头、签名后的查询参数和请求体）按任务缓存在磁盘上并带有过期时间，
+重放被拒绝时作废凭据，由调用方回退到浏览器抓取
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import requests
+from playwright.async_api import BrowserContext, Request
+
+from versioned_files import publish_text
+
+# 凭据默认有效期（秒），Cookie自带的过期时间更早时以Cookie为准
+CREDENTIAL_TTL = int(os.getenv('HYBRID_CREDENTIAL_TTL', 6 * 3600))
+
+# 重放时不应原样转发的请求头
+_SKIPPED_HEADERS = {'host', 'content-length', 'connection', 'accept-encoding'}
+
+
+class HybridFetcher:
+    """按任务管理采集到的接口凭据，并用requests重放职位接口。
+
+    各任务的重放在不同线程中同时进行：凭据字典的读写和落盘由同一把锁保护，
+    每次重放使用独立的Session。
+    """
+
+    def __init__(self, cache_path: Path, ttl: int = CREDENTIAL_TTL):
+        self.cache_path = Path(cache_path)
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._credentials: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.cache_path.exists():
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logging.warning(f"读取会话凭据缓存 {self.cache_path} 出错: {e}")
+            return {}
+
+    def _save(self) -> None:
+        """原子写出凭据缓存；调用方须持有 self._lock，保证按修改顺序落盘。"""
+        try:
+            with publish_text(self.cache_path) as f:
+                json.dump(self._credentials, f, ensure_ascii=False)
+        except Exception as e:
+            logging.error(f"⚠️ 保存会话凭据缓存时出错: {e}")
+
+    def credentials(self, sheet_name: str) -> Optional[Dict[str, Any]]:
+        """返回任务未过期的凭据，不存在或已过期时返回None。"""
+        with self._lock:
+            creds = self._credentials.get(sheet_name)
+            if not creds:
+                return None
+            if creds.get('expires_at', 0) <= time.time():
+                logging.info(f"任务 '{sheet_name}' 的会话凭据已过期")
+                self.invalidate(sheet_name)
+                return None
+            return creds
+
+    def invalidate(self, sheet_name: str) -> None:
+        with self._lock:
+            if self._credentials.pop(sheet_name, None) is not None:
+                self._save()
+
+    async def harvest(self, sheet_name: str, request: Request, context: BrowserContext) -> None:
+        """从浏览器发出的职位接口请求中采集重放所需的全部信息。"""
+        headers = {
+            name: value for name, value in (await request.all_headers()).items()
+            if not name.startswith(':') and name.lower() not in _SKIPPED_HEADERS
+        }
+        cookies = await context.cookies(request.url)
+        if cookies and not any(name.lower() == 'cookie' for name in headers):
+            headers['cookie'] = '; '.join(f"{c['name']}={c['value']}" for c in cookies)
+
+        expires_at = time.time() + self.ttl
+        cookie_expiries = [c['expires'] for c in cookies if c.get('expires', -1) > 0]
+        if cookie_expiries:
+            expires_at = min(expires_at, min(cookie_expiries))
+
+        with self._lock:
+            self._credentials[sheet_name] = {
+                'method': request.method,
+                'url': request.url,
+                'headers': headers,
+                'post_data': request.post_data,
+                'captured_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'expires_at': expires_at,
+            }
+            self._save()
+        logging.info(f"🔑 已采集任务 '{sheet_name}' 的会话凭据，有效期至 "
+                     f"{datetime.fromtimestamp(expires_at).strftime('%Y-%m-%d %H:%M:%S')}")
+
+    def replay(self, sheet_name: str) -> Optional[List[Dict[str, Any]]]:
+        """用缓存的凭据重放职位接口，返回原始职位列表；凭据缺失或被拒绝时返回None。"""
+        creds = self.credentials(sheet_name)
+        if creds is None:
+            return None
+
+        try:
+            # requests.Session 不是线程安全的，每次重放单独创建
+            with requests.Session() as session:
+                response = session.request(
+                    creds['method'],
+                    creds['url'],
+                    headers=creds['headers'],
+                    data=creds['post_data'].encode('utf-8') if creds.get('post_data') else None,
+                    timeout=30,
+                )
+        except requests.exceptions.RequestException as e:
+            # 网络错误不代表凭据失效，本次回退浏览器但保留凭据
+            logging.warning(f"⚠️ 任务 '{sheet_name}' 重放请求失败: {e}")
+            return None
+
+        job_list = None
+        if response.status_code == 200:
+            try:
+                data = response.json()
+                if data.get('code', 0) == 0:
+                    job_list = (data.get('data') or {}).get('job_post_list')
+            except ValueError:
+                pass
+
+        if not isinstance(job_list, list):
+            logging.warning(f"⚠️ 任务 '{sheet_name}' 的重放被拒绝 (状态码 {response.status_code})，凭据作废")
+            self.invalidate(sheet_name)
+            return None
+
+        logging.info(f"⚡ 任务 '{sheet_name}' 通过HTTP重放获取 {len(job_list)} 个职位")
+        return job_list
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+职位数据的列式缓存格式
+每个工作表的每一列按类型保存为独立的numpy数组（字符串列为UTF-8文本加空值掩码），
+打包在一个不压缩的 .npz 文件中；DataFrame 直接往返，无需逐个单元格转换成字典，
+读取时可以只加载需要的工作表和列
+"""
+
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from versioned_files import publish_file
+
+# 字符串列中值之间的分隔符；值本身含有该字符时另存每个值的长度
+_SEPARATOR = '\x00'
+_META_KEY = '__meta__'
+
+# 列类型
+KIND_STR = 'str'  # 字符串（可含空值）
+KIND_BOOL = 'bool'
+KIND_INT = 'int'
+KIND_FLOAT = 'float'
+KIND_DATETIME = 'datetime'
+KIND_JSON = 'json'  # 混合类型，逐个值编码为JSON文本后按字符串列保存
+
+
+def frame_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """把DataFrame转换为可JSON序列化的记录列表：空值转为None，时间转为字符串。"""
+    out = df.astype(object)
+    for column in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[column]):
+            out[column] = df[column].astype(str)
+        elif df[column].dtype == object and 'datetime' in pd.api.types.infer_dtype(df[column], skipna=True):
+            out[column] = [str(value) if isinstance(value, datetime) else value for value in df[column]]
+    return out.where(df.notna(), None).to_dict('records')
+
+
+def _column_kind(series: pd.Series) -> str:
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return KIND_BOOL
+    if pd.api.types.is_integer_dtype(dtype):
+        return KIND_INT
+    if pd.api.types.is_float_dtype(dtype):
+        return KIND_FLOAT
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return KIND_DATETIME
+    inferred = pd.api.types.infer_dtype(series, skipna=True)
+    return KIND_STR if inferred in ('string', 'empty') else KIND_JSON
+
+
+def _encode_strings(values: List[Optional[str]], mask: np.ndarray, arrays: Dict[str, np.ndarray], prefix: str) -> None:
+    texts = [value if not null else '' for value, null in zip(values, mask.tolist())] if mask.any() else values
+    joined = _SEPARATOR.join(texts)
+    arrays[f"{prefix}.data"] = np.frombuffer(joined.encode('utf-8'), dtype=np.uint8)
+    if mask.any():
+        arrays[f"{prefix}.null"] = mask
+    if texts and joined.count(_SEPARATOR) != len(texts) - 1:
+        # 值中含有分隔符，保存每个值的字符长度用于切分
+        arrays[f"{prefix}.lengths"] = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+
+
+def _decode_strings(archive, prefix: str, rows: int) -> List[Optional[str]]:
+    text = archive[f"{prefix}.data"].tobytes().decode('utf-8')
+    files = archive.files
+    if f"{prefix}.lengths" in files:
+        values = []
+        start = 0
+        for length in archive[f"{prefix}.lengths"].tolist():
+            values.append(text[start:start + length])
+            start += length + 1
+    else:
+        values = text.split(_SEPARATOR) if rows else []
+    if f"{prefix}.null" in files:
+        for position in np.flatnonzero(archive[f"{prefix}.null"]).tolist():
+            values[position] = None
+    return values
+
+
+def save_frames(path: Path, frames: Dict[str, pd.DataFrame]) -> None:
+    """把各工作表的DataFrame写入列式缓存文件（先写临时文件再替换）。"""
+    arrays: Dict[str, np.ndarray] = {}
+    meta = {'sheets': {}}
+    for sheet_name, df in frames.items():
+        columns = []
+        for position, column in enumerate(df.columns):
+            series = df[column]
+            kind = _column_kind(series)
+            prefix = f"{sheet_name}.{position}"
+            if kind == KIND_BOOL:
+                arrays[f"{prefix}.data"] = series.to_numpy(dtype=bool)
+            elif kind == KIND_INT:
+                arrays[f"{prefix}.data"] = series.to_numpy(dtype=np.int64)
+            elif kind == KIND_FLOAT:
+                arrays[f"{prefix}.data"] = series.to_numpy(dtype=np.float64)
+            elif kind == KIND_DATETIME:
+                arrays[f"{prefix}.data"] = series.to_numpy(dtype='datetime64[ns]').view(np.int64)
+            elif kind == KIND_STR:
+                _encode_strings(series.tolist(), series.isna().to_numpy(), arrays, prefix)
+            else:
+                mask = series.isna().to_numpy()
+                values = [None if null else json.dumps(value, ensure_ascii=False, default=str)
+                          for value, null in zip(series.tolist(), mask.tolist())]
+                _encode_strings(values, mask, arrays, prefix)
+            columns.append([str(column), kind])
+        meta['sheets'][sheet_name] = {'rows': len(df), 'columns': columns}
+    arrays[_META_KEY] = np.frombuffer(json.dumps(meta, ensure_ascii=False).encode('utf-8'), dtype=np.uint8)
+
+    with publish_file(Path(path)) as temp_path:
+        with open(temp_path, 'wb') as f:
+            np.savez(f, **arrays)
+
+
+def read_meta(archive) -> Dict[str, Any]:
+    return json.loads(archive[_META_KEY].tobytes().decode('utf-8'))
+
+
+def load_frames(path: Path, sheets: Optional[Iterable[str]] = None,
+                columns: Optional[Iterable[str]] = None) -> Dict[str, pd.DataFrame]:
+    """读取列式缓存；sheets/columns 指定时只解码这些工作表和列，其余数据不会从磁盘读取。"""
+    wanted_columns = set(columns) if columns is not None else None
+    frames: Dict[str, pd.DataFrame] = {}
+    with np.load(path, allow_pickle=False) as archive:
+        meta = read_meta(archive)
+        for sheet_name, sheet in meta['sheets'].items():
+            if sheets is not None and sheet_name not in sheets:
+                continue
+            rows = sheet['rows']
+            data: Dict[str, Any] = {}
+            for position, (column, kind) in enumerate(sheet['columns']):
+                if wanted_columns is not None and column not in wanted_columns:
+                    continue
+                prefix = f"{sheet_name}.{position}"
+                if kind == KIND_STR:
+                    data[column] = pd.Series(_decode_strings(archive, prefix, rows), dtype=object)
+                elif kind == KIND_JSON:
+                    data[column] = pd.Series([None if value is None else json.loads(value)
+                                              for value in _decode_strings(archive, prefix, rows)], dtype=object)
+                elif kind == KIND_DATETIME:
+                    data[column] = pd.Series(archive[f"{prefix}.data"].view('datetime64[ns]'))
+                else:
+                    data[column] = pd.Series(archive[f"{prefix}.data"])
+            frames[sheet_name] = pd.DataFrame(data, index=pd.RangeIndex(rows))
+    logging.debug(f"已从列式缓存 {path} 读取 {len(frames)} 个工作表")
+    return frames
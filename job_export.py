@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+职位数据流式导出
+按CSV、NDJSON、XLSX格式分块生成导出内容，行直接取自职位存储中的记录，
+不先在内存中拼出整个文件或工作簿；XLSX使用只写模式，行数据先落到临时文件
+"""
+
+import csv
+import io
+import json
+import tempfile
+from collections.abc import Sequence
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from excel_export import StreamingWorkbook, column_widths, pd, sample_positions
+
+# 每次向客户端发送的行数
+EXPORT_CHUNK_ROWS = 500
+# XLSX文件分块发送的字节数
+EXPORT_CHUNK_BYTES = 64 * 1024
+# 新职位行高亮的依据字段
+EXPORT_HIGHLIGHT_FIELD = 'highlight_time'
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def export_fields(jobs: Sequence[Dict[str, Any]], requested: str = '') -> List[str]:
+    """导出的字段：请求中逗号分隔的字段，未指定时为抽样职位中出现过的全部字段（保持出现顺序）。"""
+    if requested:
+        fields = [field.strip() for field in requested.split(',') if field.strip()]
+        if fields:
+            return list(dict.fromkeys(fields))
+    fields: Dict[str, None] = {}
+    for position in sample_positions(len(jobs)):
+        fields.update(dict.fromkeys(jobs[position]))
+    return list(fields)
+
+
+def _cell(value: Any) -> Any:
+    """CSV和Excel单元格中的值：列表、字典序列化为JSON文本。"""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_csv(jobs: Iterable[Dict[str, Any]], fields: List[str]) -> Iterator[bytes]:
+    """逐块生成CSV；开头带BOM，Excel直接打开时中文不乱码。"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(fields)
+    for chunk in _chunks(jobs, EXPORT_CHUNK_ROWS):
+        writer.writerows([_cell(job.get(field)) for field in fields] for job in chunk)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def iter_ndjson(jobs: Iterable[Dict[str, Any]], fields: List[str]) -> Iterator[bytes]:
+    """逐块生成NDJSON，每行一个职位。"""
+    for chunk in _chunks(jobs, EXPORT_CHUNK_ROWS):
+        yield ''.join(
+            json.dumps({field: job.get(field) for field in fields}, ensure_ascii=False) + '\n'
+            for job in chunk
+        ).encode('utf-8')
+
+
+def sample_column_widths(jobs: Sequence[Dict[str, Any]], fields: List[str]) -> Optional[List[float]]:
+    """按等间隔抽样的行估算列宽（字符串长度向量化计算）；未安装pandas时不设置列宽。"""
+    if pd is None:
+        return None
+    sample = [[_cell(jobs[position].get(field)) for field in fields] for position in sample_positions(len(jobs))]
+    return column_widths(pd.DataFrame(sample, columns=fields))
+
+
+def iter_xlsx(jobs: Sequence[Dict[str, Any]], fields: List[str], sheet_name: str) -> Iterator[bytes]:
+    """写出只写模式的工作簿到临时文件，再分块读出；有 highlight_time 的职位整行高亮。"""
+    workbook = StreamingWorkbook()
+    workbook.write_sheet(
+        sheet_name, fields,
+        ([_cell(job.get(field)) for field in fields] for job in jobs),
+        highlight=(bool(job.get(EXPORT_HIGHLIGHT_FIELD)) for job in jobs),
+        column_widths=sample_column_widths(jobs, fields)
+    )
+    with tempfile.TemporaryFile() as f:
+        workbook.save(f)
+        f.seek(0)
+        while True:
+            chunk = f.read(EXPORT_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+
+
+class OrderedJobs(Sequence):
+    """按给定下标顺序访问职位列表的只读视图，导出时不复制职位记录。"""
+
+    def __init__(self, jobs: Sequence[Dict[str, Any]], positions: List[int]):
+        self.jobs = jobs
+        self.positions = positions
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.jobs[position] for position in self.positions[index]]
+        return self.jobs[self.positions[index]]
+
+
+def iter_export(export_format: str, jobs: Sequence[Dict[str, Any]], fields: List[str],
+                sheet_name: str = 'jobs') -> Iterator[bytes]:
+    """按格式生成导出内容。"""
+    writers: Dict[str, Callable[[], Iterator[bytes]]] = {
+        'csv': lambda: iter_csv(jobs, fields),
+        'ndjson': lambda: iter_ndjson(jobs, fields),
+        'xlsx': lambda: iter_xlsx(jobs, fields, sheet_name),
+    }
+    if export_format not in writers:
+        raise ValueError(f"不支持的导出格式: {export_format}")
+    return writers[export_format]()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+职位指纹索引
+按列向量化计算职位的64位指纹和排序键，并与数据框的行顺序对齐保存，
+增量合并时只需处理新增或变化的职位，不必对全部历史数据重新哈希和排序
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 参与指纹计算的字段，任一字段变化都视为新职位
+KEY_FIELDS = ['code', 'title', 'description', 'requirement']
+
+# 指纹文件中记录对应数据签名的键名
+_SOURCE_KEY = '__source__'
+
+# 排序键：高32位区分是否新职位（新职位为0排在前），低32位为发布时间的倒序
+_NOT_NEW_FLAG = np.int64(1) << 32
+_MAX_SECONDS = 0xFFFFFFFF
+
+
+def compute_fingerprints(df: pd.DataFrame) -> np.ndarray:
+    """为每一行计算uint64指纹，按列一次性完成，不逐行构造字典。"""
+    if df.empty:
+        return np.empty(0, dtype=np.uint64)
+
+    key_columns = {
+        field: (df[field] if field in df.columns else pd.Series('', index=df.index)).fillna('').astype(str)
+        for field in KEY_FIELDS
+    }
+    return pd.util.hash_pandas_object(pd.DataFrame(key_columns), index=False).to_numpy(dtype=np.uint64)
+
+
+def compute_order_keys(df: pd.DataFrame) -> np.ndarray:
+    """计算升序int64排序键，对应职位表的展示顺序：
+    新职位(is_new=True)在前，同组内按发布时间降序，缺失或无法解析的发布时间排在最后。"""
+    if df.empty:
+        return np.empty(0, dtype=np.int64)
+
+    if 'publish_time' in df.columns:
+        published = pd.to_datetime(df['publish_time'], format='%Y-%m-%d %H:%M:%S', errors='coerce')
+        seconds = np.where(published.isna(), 0, published.to_numpy(dtype='datetime64[s]').astype(np.int64))
+    else:
+        seconds = np.zeros(len(df), dtype=np.int64)
+
+    if 'is_new' in df.columns:
+        is_new = df['is_new'].fillna(False).astype(bool).to_numpy()
+    else:
+        is_new = np.zeros(len(df), dtype=bool)
+
+    return np.where(is_new, 0, _NOT_NEW_FLAG) + (_MAX_SECONDS - np.clip(seconds, 0, _MAX_SECONDS))
+
+
+class JobHashIndex:
+    """与数据框行顺序对齐的职位索引，每行固定占用32字节。
+
+    row_fingerprints/order_keys 的第i个元素对应数据框第i行，数据框按order_keys升序排列；
+    sorted_fingerprints/sorted_rows 是按指纹排序的副本，用于把指纹定位到行。
+    """
+
+    def __init__(self, row_fingerprints: np.ndarray, order_keys: np.ndarray,
+                 sorted_fingerprints: Optional[np.ndarray] = None, sorted_rows: Optional[np.ndarray] = None):
+        self.row_fingerprints = np.asarray(row_fingerprints, dtype=np.uint64)
+        self.order_keys = np.asarray(order_keys, dtype=np.int64)
+        if sorted_fingerprints is None or sorted_rows is None:
+            sorted_rows = np.argsort(self.row_fingerprints, kind='stable')
+            sorted_fingerprints = self.row_fingerprints[sorted_rows]
+        self.sorted_fingerprints = np.asarray(sorted_fingerprints, dtype=np.uint64)
+        self.sorted_rows = np.asarray(sorted_rows, dtype=np.int64)
+
+    @classmethod
+    def empty(cls) -> "JobHashIndex":
+        return cls(np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64))
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "JobHashIndex":
+        return cls(compute_fingerprints(df), compute_order_keys(df))
+
+    def __len__(self) -> int:
+        return len(self.row_fingerprints)
+
+    @property
+    def is_sorted(self) -> bool:
+        """数据框是否已按排序键排列，增量插入依赖这一前提。"""
+        return bool(np.all(self.order_keys[1:] >= self.order_keys[:-1]))
+
+    def lookup(self, fingerprints: np.ndarray) -> np.ndarray:
+        """返回每个指纹所在的行号，不存在的为-1。"""
+        fingerprints = np.asarray(fingerprints, dtype=np.uint64)
+        if not len(self.sorted_fingerprints):
+            return np.full(len(fingerprints), -1, dtype=np.int64)
+        positions = np.searchsorted(self.sorted_fingerprints, fingerprints)
+        positions[positions == len(self.sorted_fingerprints)] = 0
+        found = self.sorted_fingerprints[positions] == fingerprints
+        return np.where(found, self.sorted_rows[positions], -1)
+
+    def contains(self, fingerprints: np.ndarray) -> np.ndarray:
+        """返回与fingerprints等长的布尔数组，标记每个指纹是否已在索引中。"""
+        return self.lookup(fingerprints) >= 0
+
+    def splice(self, remove_rows: np.ndarray, insert_fingerprints: np.ndarray,
+               insert_keys: np.ndarray) -> Tuple[np.ndarray, "JobHashIndex"]:
+        """删除remove_rows对应的行，并按排序键把新行插入到有序位置。
+
+        返回 (取行顺序, 新索引)。取行顺序是针对 concat([旧数据, 插入数据]) 的位置下标，
+        用 take 即可得到已排序的新数据框。只对插入的行排序，旧数据只做整体拷贝。
+        """
+        total = len(self.row_fingerprints)
+        insert_fingerprints = np.asarray(insert_fingerprints, dtype=np.uint64)
+        insert_keys = np.asarray(insert_keys, dtype=np.int64)
+
+        keep = np.ones(total, dtype=bool)
+        keep[np.asarray(remove_rows, dtype=np.int64)] = False
+        kept_rows = np.flatnonzero(keep)
+
+        by_key = np.argsort(insert_keys, kind='stable')
+        positions = np.searchsorted(self.order_keys[kept_rows], insert_keys[by_key], side='right')
+        order = np.insert(kept_rows, positions, total + by_key)
+
+        row_fingerprints = np.concatenate([self.row_fingerprints, insert_fingerprints])[order]
+        order_keys = np.concatenate([self.order_keys, insert_keys])[order]
+
+        # 旧行和插入行在新数据框中的行号
+        new_rows = np.empty(total + len(insert_fingerprints), dtype=np.int64)
+        new_rows[order] = np.arange(len(order))
+
+        sorted_keep = keep[self.sorted_rows]
+        sorted_fingerprints = self.sorted_fingerprints[sorted_keep]
+        sorted_rows = new_rows[self.sorted_rows[sorted_keep]]
+        by_fingerprint = np.argsort(insert_fingerprints, kind='stable')
+        positions = np.searchsorted(sorted_fingerprints, insert_fingerprints[by_fingerprint])
+        sorted_fingerprints = np.insert(sorted_fingerprints, positions, insert_fingerprints[by_fingerprint])
+        sorted_rows = np.insert(sorted_rows, positions, new_rows[total + by_fingerprint])
+
+        return order, JobHashIndex(row_fingerprints, order_keys, sorted_fingerprints, sorted_rows)
+
+
+def save_indexes(path: Path, indexes: Dict[str, JobHashIndex], signature: Optional[Tuple[int, int]]) -> None:
+    """把各工作表的索引写入npz文件，并记录对应数据的签名（见 job_store 的 signature()）。"""
+    if signature is None:
+        return
+    try:
+        arrays = {_SOURCE_KEY: np.array(signature, dtype=np.int64)}
+        for sheet_name, index in indexes.items():
+            arrays[f"{sheet_name}.row_fingerprints"] = index.row_fingerprints
+            arrays[f"{sheet_name}.order_keys"] = index.order_keys
+            arrays[f"{sheet_name}.sorted_fingerprints"] = index.sorted_fingerprints
+            arrays[f"{sheet_name}.sorted_rows"] = index.sorted_rows
+        with open(path, 'wb') as f:
+            np.savez(f, **arrays)
+        logging.info(f"💾 职位指纹索引已保存至: {path}")
+    except Exception as e:
+        logging.error(f"⚠️ 保存职位指纹索引时出错: {e}")
+
+
+def load_indexes(path: Path, signature: Optional[Tuple[int, int]]) -> Optional[Dict[str, JobHashIndex]]:
+    """加载索引；文件缺失、损坏或与数据签名不一致时返回None。"""
+    if signature is None or not Path(path).exists():
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if _SOURCE_KEY not in data.files or tuple(int(v) for v in data[_SOURCE_KEY]) != signature:
+                logging.info("职位指纹索引与缓存数据不一致，将重新计算。")
+                return None
+            sheet_names = {name.rsplit('.', 1)[0] for name in data.files if name != _SOURCE_KEY}
+            return {
+                sheet_name: JobHashIndex(
+                    data[f"{sheet_name}.row_fingerprints"],
+                    data[f"{sheet_name}.order_keys"],
+                    data[f"{sheet_name}.sorted_fingerprints"],
+                    data[f"{sheet_name}.sorted_rows"],
+                )
+                for sheet_name in sheet_names
+            }
+    except Exception as e:
+        logging.warning(f"读取职位指纹索引 {path} 出错: {e}。将重新计算。")
+        return None
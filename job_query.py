@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+职位查询索引
+数据加载时为每个职位类型建立倒排索引，职位列表页的关键词搜索只需求倒排表交集，
+再对少量候选职位做一次子串校验，结果与逐个职位子串匹配完全一致
+"""
+
+import base64
+import bisect
+import json
+import logging
+import re
+import threading
+from array import array
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from job_stats import job_cities
+
+# CJK统一表意文字（含扩展A和兼容区），按单字和相邻双字建立索引，范围与 _gram_postings 一致
+_CJK_CHARS = '㐀-䶿一-鿿豈-﫿'
+_CJK_RUN = re.compile(f'[{_CJK_CHARS}]+')
+# 拉丁文等其他文字按连续的单词字符切词
+_WORD_RUN = re.compile(f'[^\\W{_CJK_CHARS}]+')
+
+# 参与关键词搜索的字段，与原先的子串匹配范围一致
+SEARCH_FIELDS = ('title', 'description')
+
+# 分页排序方式：publish_time按发布时间降序，title按标题升序，is_new新职位在前、其次按发布时间降序
+SORT_KEYS = ('is_new', 'publish_time', 'title')
+DEFAULT_SORT = 'is_new'
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# 各排序方式排序键中每个元素的类型，见 JobQueryIndex._sort_key
+_SORT_KEY_TYPES = {
+    'is_new': (int, int, str, int),
+    'publish_time': (int, str, int),
+    'title': (str, str, int),
+}
+
+
+def encode_cursor(sort: str, key: Tuple) -> str:
+    """把排序方式和最后一条记录的排序键编码为不透明的游标。"""
+    payload = json.dumps([sort, list(key)], ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, Tuple]:
+    """解析游标，格式错误或排序键与排序方式的键结构不符时抛出ValueError。"""
+    try:
+        sort, key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        key = tuple(key)
+    except Exception as e:
+        raise ValueError(f"无效的游标: {cursor}") from e
+    # 排序键与 JobQueryIndex._sort_key 的结构一致，否则二分查找时无法与已有键比较
+    key_types = _SORT_KEY_TYPES.get(sort) if isinstance(sort, str) else None
+    if key_types is None or len(key) != len(key_types) or not all(
+            isinstance(value, expected) and not isinstance(value, bool)
+            for value, expected in zip(key, key_types)):
+        raise ValueError(f"无效的游标: {cursor}")
+    return sort, key
+
+
+def _publish_seconds(job: Dict[str, Any]) -> int:
+    try:
+        return int(datetime.strptime(job.get('publish_time') or '', '%Y-%m-%d %H:%M:%S').timestamp())
+    except ValueError:
+        return 0
+
+
+def _gram_postings(texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """对全部文本一次性编码CJK单字和相邻双字，返回 (编码, 所属文本下标)。
+
+    单字编码为其码位，双字编码为 (前字 << 21) | 后字，二者取值范围不重叠。
+    """
+    code_points = np.frombuffer('\n'.join(texts).encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+    owners = np.repeat(np.arange(len(texts), dtype=np.int64), [len(text) + 1 for text in texts])[:len(code_points)]
+    cjk = (((code_points >= 0x3400) & (code_points <= 0x4DBF))
+           | ((code_points >= 0x4E00) & (code_points <= 0x9FFF))
+           | ((code_points >= 0xF900) & (code_points <= 0xFAFF)))
+    pairs = cjk[:-1] & cjk[1:]
+    codes = np.concatenate([code_points[cjk], (code_points[:-1][pairs] << 21) | code_points[1:][pairs]])
+    owners = np.concatenate([owners[cjk], owners[:-1][pairs]])
+    return codes, owners
+
+
+def _bitmap(positions: List[int], size: int) -> int:
+    """把升序下标列表转换为位图（Python整数，第i位表示第i个职位）。"""
+    bits = bytearray((size + 7) // 8)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def _positions(bitmap: int) -> List[int]:
+    """位图中置位的下标，升序排列。"""
+    positions = []
+    base = 0
+    for byte in bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little'):
+        while byte:
+            low = byte & -byte
+            positions.append(base + low.bit_length() - 1)
+            byte ^= low
+        base += 8
+    return positions
+
+
+def _encode_gram(gram: str) -> int:
+    return ord(gram) if len(gram) == 1 else (ord(gram[0]) << 21) | ord(gram[1])
+
+
+class JobQueryIndex:
+    """单个职位类型的查询索引，职位以其在列表中的下标标识。
+
+    拉丁单词的倒排表按下标升序保存在 array('I') 中；CJK单字和双字编码为整数后，
+    全部倒排表按 (编码, 下标) 排序拼成一个数组，查询时二分查找编码所在区间。
+    """
+
+    def __init__(self, jobs: List[Dict[str, Any]]):
+        self.jobs = jobs
+        # 一次遍历取出搜索字段和分面字段；小写文本只在建索引期间使用，不随索引常驻，
+        # 快照后端的职位记录因此只在映射的页面中保留一份
+        texts: List[str] = []
+        word_postings: Dict[str, List[int]] = defaultdict(list)
+        city_positions: Dict[str, List[int]] = defaultdict(list)
+        department_positions: Dict[str, List[int]] = defaultdict(list)
+        for position, job in enumerate(jobs):
+            fields = self._search_texts(job)
+            words: Set[str] = set()
+            for text in fields:
+                words.update(_WORD_RUN.findall(text))
+            for word in words:
+                word_postings[word].append(position)
+            # 字段之间用换行分隔，不会产生跨字段的双字
+            texts.append('\n'.join(fields))
+            # 城市和部门的分面位图，筛选即位图求交，下拉框计数即交集的置位数
+            for city in dict.fromkeys(job_cities(job)):
+                city_positions[city].append(position)
+            department = job.get('department')
+            if department:
+                department_positions[department].append(position)
+        # 建好后转为紧凑数组，每个下标只占4字节
+        self._word_postings = {word: array('I', p) for word, p in word_postings.items()}
+
+        codes, owners = _gram_postings(texts)
+        del texts
+        # 编码不超过2^37，与下标合成一个int64排序键后去重排序
+        keys = np.unique(codes * max(len(jobs), 1) + owners)
+        codes, owners = np.divmod(keys, max(len(jobs), 1))
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.empty(0, dtype=np.int64)
+        self._gram_codes = codes[starts]
+        self._gram_bounds = np.append(starts, len(codes))
+        self._gram_owners = owners.astype(np.uint32)
+
+        self._all = (1 << len(jobs)) - 1
+        # 各排序方式的顺序，数据版本内不变，按需计算
+        self._orders: Dict[str, Dict[str, Any]] = {}
+        self._unfiltered_counts: Optional[Dict[str, Dict[str, int]]] = None
+        self._city_bitmaps = {city: _bitmap(p, len(jobs)) for city, p in city_positions.items()}
+        self._department_bitmaps = {dept: _bitmap(p, len(jobs)) for dept, p in department_positions.items()}
+        # 选中某个部门时按子串匹配，会同时选中名称包含它的其他部门；下拉框计数使用同样的并集
+        self._department_matches = {dept: self._matching_departments(dept) for dept in self._department_bitmaps}
+
+    @staticmethod
+    def _search_texts(job: Dict[str, Any]) -> Tuple[str, ...]:
+        """转小写后的搜索字段。"""
+        return tuple((job.get(field) or '').lower() for field in SEARCH_FIELDS)
+
+    def _gram_posting(self, gram: str) -> np.ndarray:
+        code = _encode_gram(gram)
+        slot = int(np.searchsorted(self._gram_codes, code))
+        if slot == len(self._gram_codes) or self._gram_codes[slot] != code:
+            return self._gram_owners[:0]
+        return self._gram_owners[self._gram_bounds[slot]:self._gram_bounds[slot + 1]]
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def _word_candidates(self, fragment: str, at_start: bool, at_end: bool) -> Set[int]:
+        """查询中的拉丁单词片段对应的候选职位。
+
+        片段两侧都有分隔符时必须是完整单词；位于查询开头的片段可能是某个单词的后缀，
+        位于结尾的可能是前缀，两者兼有时可能出现在单词任意位置，此时扫描词表取并集。
+        """
+        if not at_start and not at_end:
+            return set(self._word_postings.get(fragment, ()))
+        if at_start and at_end:
+            matches = (word for word in self._word_postings if fragment in word)
+        elif at_start:
+            matches = (word for word in self._word_postings if word.endswith(fragment))
+        else:
+            matches = (word for word in self._word_postings if word.startswith(fragment))
+        candidates: Set[int] = set()
+        for word in matches:
+            candidates.update(self._word_postings[word])
+        return candidates
+
+    def search(self, query: str) -> List[int]:
+        """返回标题或描述包含query（不区分大小写）的职位下标，按原顺序排列。"""
+        query = query.lower()
+        if not query:
+            return list(range(len(self.jobs)))
+
+        # 包含query的文本必然包含这些词元；按倒排表从短到长求交集
+        conditions: List[Any] = []
+        for match in _WORD_RUN.finditer(query):
+            conditions.append((match.group(), match.start() == 0, match.end() == len(query)))
+        for run in _CJK_RUN.findall(query):
+            grams = [run] if len(run) == 1 else [run[i:i + 2] for i in range(len(run) - 1)]
+            conditions.extend(self._gram_posting(gram) for gram in dict.fromkeys(grams))
+
+        candidates: Optional[Set[int]] = None
+        postings = sorted((c for c in conditions if not isinstance(c, tuple)), key=len)
+        for posting in postings:
+            posting = posting.tolist() if isinstance(posting, np.ndarray) else posting
+            candidates = set(posting) if candidates is None else candidates.intersection(posting)
+            if not candidates:
+                return []
+        for fragment, at_start, at_end in (c for c in conditions if isinstance(c, tuple)):
+            matched = self._word_candidates(fragment, at_start, at_end)
+            candidates = matched if candidates is None else candidates & matched
+            if not candidates:
+                return []
+
+        positions = range(len(self.jobs)) if candidates is None else sorted(candidates)
+        # 候选职位的子串校验直接读取职位记录（快照后端只解码候选记录）
+        jobs = self.jobs
+        return [p for p in positions if any(query in text for text in self._search_texts(jobs[p]))]
+
+    def _city_bitmap(self, city: str) -> int:
+        return self._city_bitmaps.get(city, 0) if city else self._all
+
+    def _matching_departments(self, department: str) -> int:
+        """所有名称包含department的部门位图的并集。"""
+        bitmap = 0
+        for name, dept_bitmap in self._department_bitmaps.items():
+            if department in name:
+                bitmap |= dept_bitmap
+        return bitmap
+
+    def _department_bitmap(self, department: str) -> int:
+        """部门筛选沿用子串匹配，已有的部门名直接取预先合并的位图。"""
+        if not department:
+            return self._all
+        bitmap = self._department_matches.get(department)
+        return bitmap if bitmap is not None else self._matching_departments(department)
+
+    def query(self, search: str = '', city: str = '', department: str = '') -> Dict[str, Any]:
+        """按关键词、城市、部门筛选。
+
+        返回匹配的职位下标（没有任何筛选条件时为None，表示全部职位，不逐位展开），
+        以及各城市、部门在其余筛选条件下的职位数，下拉框据此显示选中该项后会有多少结果。
+        """
+        if not (search or city or department):
+            # 无筛选时的计数在数据版本内不变，只计算一次
+            if self._unfiltered_counts is None:
+                self._unfiltered_counts = {
+                    'city_counts': {name: bitmap.bit_count() for name, bitmap in sorted(self._city_bitmaps.items())},
+                    'department_counts': {
+                        name: bitmap.bit_count() for name, bitmap in sorted(self._department_matches.items())
+                    },
+                }
+            return {'positions': None, **self._unfiltered_counts}
+
+        matched = _bitmap(self.search(search), len(self.jobs)) if search else self._all
+        city_bitmap = self._city_bitmap(city)
+        department_bitmap = self._department_bitmap(department)
+
+        without_city = matched & department_bitmap
+        without_department = matched & city_bitmap
+        return {
+            'positions': _positions(without_city & city_bitmap),
+            'city_counts': {
+                name: (bitmap & without_city).bit_count() for name, bitmap in sorted(self._city_bitmaps.items())
+            },
+            'department_counts': {
+                name: (bitmap & without_department).bit_count()
+                for name, bitmap in sorted(self._department_matches.items())
+            },
+        }
+
+    def filter(self, query: str) -> List[Dict[str, Any]]:
+        return [self.jobs[position] for position in self.search(query)]
+
+    def _sort_key(self, sort: str, position: int, job: Dict[str, Any]) -> Tuple:
+        """升序排列的排序键，末尾附加job_id，使游标在数据更新后仍能定位；
+        数据中可能有重复的job_id，最后再以行号区分，保证每个键唯一，游标不会跳过并列的记录。"""
+        job_id = str(job.get('job_id') or '')
+        if sort == 'publish_time':
+            return (-_publish_seconds(job), job_id, position)
+        if sort == 'title':
+            return (job.get('title') or '', job_id, position)
+        return (0 if job.get('is_new') else 1, -_publish_seconds(job), job_id, position)
+
+    def _sort_order(self, sort: str) -> Dict[str, Any]:
+        """某种排序方式下的职位顺序、对应排序键以及每个职位的名次，首次使用时计算并缓存。"""
+        cached = self._orders.get(sort)
+        if cached is None:
+            keys = [self._sort_key(sort, position, job) for position, job in enumerate(self.jobs)]
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            ranks = array('I', bytes(4 * len(order)))
+            for rank, position in enumerate(order):
+                ranks[position] = rank
+            cached = {'order': order, 'keys': [keys[p] for p in order], 'ranks': ranks}
+            self._orders[sort] = cached
+        return cached
+
+    def ordered(self, positions: Optional[List[int]] = None, sort: str = DEFAULT_SORT) -> List[int]:
+        """按排序方式排列的全部职位下标（positions为筛选结果，None表示不筛选），供导出使用。"""
+        if sort not in SORT_KEYS:
+            raise ValueError(f"不支持的排序方式: {sort}")
+        sorted_order = self._sort_order(sort)
+        if positions is None:
+            return list(sorted_order['order'])
+        ranks = sorted(sorted_order['ranks'][p] for p in positions)
+        return [sorted_order['order'][rank] for rank in ranks]
+
+    def page(self, positions: Optional[List[int]] = None, sort: str = DEFAULT_SORT, page: int = 1,
+             page_size: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """按排序方式取一页职位下标。
+
+        positions为筛选结果（None表示不筛选），此时直接切片预先排好的顺序，代价与页大小成正比。
+        传入cursor时从游标记录之后开始，忽略page。
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"不支持的排序方式: {sort}")
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        sorted_order = self._sort_order(sort)
+
+        if cursor:
+            cursor_sort, cursor_key = decode_cursor(cursor)
+            if cursor_sort != sort:
+                raise ValueError("游标与排序方式不一致")
+            start_rank = bisect.bisect_right(sorted_order['keys'], cursor_key)
+        else:
+            start_rank = None
+
+        if positions is None:
+            total = len(self.jobs)
+            start = start_rank if start_rank is not None else (max(page, 1) - 1) * page_size
+            ranked = range(start, min(start + page_size, total))
+            page_positions = [sorted_order['order'][rank] for rank in ranked]
+        else:
+            total = len(positions)
+            ranks = sorted(sorted_order['ranks'][p] for p in positions)
+            start = bisect.bisect_left(ranks, start_rank) if start_rank is not None else (max(page, 1) - 1) * page_size
+            page_positions = [sorted_order['order'][rank] for rank in ranks[start:start + page_size]]
+
+        last_rank = sorted_order['ranks'][page_positions[-1]] if page_positions else None
+        has_more = start + len(page_positions) < total
+        return {
+            'positions': page_positions,
+            'total': total,
+            'page_size': page_size,
+            'next_cursor': encode_cursor(sort, sorted_order['keys'][last_rank]) if has_more else None,
+        }
+
+
+class QueryIndexCache:
+    """Web进程内的查询索引缓存，按职位类型懒加载，数据签名变化时重建。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._signature = None
+        self._indexes: Dict[str, JobQueryIndex] = {}
+
+    def get(self, store, job_type: str) -> JobQueryIndex:
+        signature = store.signature()
+        with self._lock:
+            if signature != self._signature:
+                self._indexes = {}
+                self._signature = signature
+            index = self._indexes.get(job_type)
+            if index is None:
+                jobs = store.get_jobs(job_type) if signature is not None else []
+                index = JobQueryIndex(jobs)
+                self._indexes[job_type] = index
+                logging.info(f"🔎 已为 '{job_type}' 建立查询索引: {len(jobs)} 个职位")
+            return index
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+职位字段抽取规则
+用声明式的字段表描述每个输出字段在接口原始职位中的来源路径和转换函数，
+JobSchema 在创建时把字段表编译为专用的规整函数：每个来源路径（含嵌套路径的各级前缀）只读取一次，
+不再为每个输出字段重复链式 get 和 isinstance 检查。
+by.py、by_simple.py 和纯API版本共用这里的字段定义
+"""
+
+import functools
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+POSITION_URL = "https://jobs.bytedance.com/campus/position/{}"
+
+
+class Field:
+    """输出字段的来源。
+
+    paths为点分路径（如 'recruit_type.parent.name'），中间某级不是字典时取值为None；
+    给出多个顶层字段名时取第一个存在的字段（与 dict.get 的嵌套默认值写法一致）；不给路径时取值为None，
+    用作由调用方填写的占位字段。
+    取到的值不为None时才调用transform；最终为None时使用default。
+    transform返回元组时，字段表中对应的键也应为同样长度的字段名元组，一次取值生成多个输出字段。
+    """
+
+    __slots__ = ('paths', 'transform', 'default')
+
+    def __init__(self, *paths: str, transform: Optional[Callable[[Any], Any]] = None, default: Any = None):
+        if len(paths) > 1 and any('.' in path for path in paths):
+            raise ValueError(f"备选路径只支持顶层字段: {paths}")
+        self.paths = paths
+        self.transform = transform
+        self.default = default
+
+
+FieldSpec = Union[str, Field]
+
+
+# --- 常用转换函数 ---
+
+def name_of(value: Any) -> Any:
+    """字典取其name，其余原样返回。"""
+    return value.get('name') if isinstance(value, dict) else value
+
+
+def localized(value: Any) -> Any:
+    """多语言字典取中文，其余原样返回。"""
+    return value.get('zh_cn') if isinstance(value, dict) else value
+
+
+def format_timestamp_ms(value: Any) -> str:
+    """毫秒时间戳转为 '%Y-%m-%d %H:%M:%S'。"""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(value / 1000))
+
+
+def join_keys(*keys: str) -> Callable[[Any], Tuple[Optional[str], ...]]:
+    """字典列表按各个键分别以逗号拼接，只遍历一次列表；列表为空时各字段均为None。"""
+    empty = (None,) * len(keys)
+
+    def join(items: Any) -> Tuple[Optional[str], ...]:
+        if not items:
+            return empty
+        items = [item for item in items if isinstance(item, dict)]
+        return tuple([", ".join([item.get(key, "") for item in items]) for key in keys])
+
+    return join
+
+
+def join_key(key: str) -> Callable[[Any], Optional[str]]:
+    """字典列表按单个键以逗号拼接。"""
+    join = join_keys(key)
+    return lambda items: join(items)[0]
+
+
+def truncate(length: int, suffix: str = '...') -> Callable[[Any], Any]:
+    """超过length的文本截断并加上suffix。"""
+    def cut(value: Any) -> Any:
+        return value[:length] + suffix if isinstance(value, str) and len(value) > length else value
+    return cut
+
+
+def position_url(job_id: Any) -> str:
+    return POSITION_URL.format(job_id)
+
+
+class JobSchema:
+    """编译后的字段表。
+
+    fields为有序的 输出字段 → 来源（字段名字符串或Field），normalize(job) 返回按字段表顺序排列的记录；
+    drop_empty为True时不输出值为None或空字符串的字段。
+    """
+
+    def __init__(self, fields: Dict[Union[str, Tuple[str, ...]], FieldSpec], drop_empty: bool = False):
+        self.fields = {key: spec if isinstance(spec, Field) else Field(spec) for key, spec in fields.items()}
+        self.drop_empty = drop_empty
+        self.columns: List[str] = []
+        for key in self.fields:
+            self.columns.extend(key if isinstance(key, tuple) else [key])
+        self.source, namespace = self._generate()
+        exec(compile(self.source, f"<job_schema {id(self)}>", 'exec'), namespace)
+        self.normalize: Callable[[Dict[str, Any]], Dict[str, Any]] = namespace['normalize']
+
+    def extend(self, fields: Dict[Union[str, Tuple[str, ...]], FieldSpec]) -> 'JobSchema':
+        """追加或覆盖字段（覆盖的字段保持原位置），返回新的字段表。"""
+        return JobSchema({**self.fields, **fields}, drop_empty=self.drop_empty)
+
+    def normalize_all(self, jobs: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        normalize = self.normalize
+        return [normalize(job) for job in jobs]
+
+    def _generate(self) -> Tuple[str, Dict[str, Any]]:
+        """生成规整函数的源码：先按路径前缀读取来源值，再逐个输出字段转换、填默认值并写入记录。"""
+        namespace: Dict[str, Any] = {}
+        lines = ["def normalize(job):", "    get = job.get", "    record = {}"]
+        path_names: Dict[Tuple[str, ...], str] = {}
+        # 被多个字段（含嵌套路径）引用的顶层字段，读取结果保存在局部变量中共享
+        top_level = Counter(spec.paths[0].split('.')[0] for spec in self.fields.values() if len(spec.paths) == 1)
+        shared = {name for name, count in top_level.items() if count > 1}
+
+        def constant(value: Any) -> str:
+            name = f"_c{len(namespace)}"
+            namespace[name] = value
+            return name
+
+        def read(path: Tuple[str, ...]) -> str:
+            # 嵌套路径的每级前缀只读取一次，多个字段共享
+            name = path_names.get(path)
+            if name is None:
+                if len(path) == 1:
+                    name = f"_v{len(path_names)}"
+                    lines.append(f"    {name} = get({path[0]!r})")
+                else:
+                    parent = read(path[:-1])
+                    name = f"_v{len(path_names)}"
+                    lines.append(f"    {name} = {parent}.get({path[-1]!r}) if isinstance({parent}, dict) else None")
+                path_names[path] = name
+            return name
+
+        def emit(key: str, value: str, default: Any) -> None:
+            if default is not None:
+                lines.append(f"    if {value} is None: {value} = {constant(default)}")
+            if self.drop_empty:
+                lines.append(f"    if {value} is not None and {value} != '': record[{key!r}] = {value}")
+            else:
+                lines.append(f"    record[{key!r}] = {value}")
+
+        for key, spec in self.fields.items():
+            if not spec.paths:
+                lines.append("    value = None")
+            elif len(spec.paths) == 1 and '.' not in spec.paths[0] and spec.paths[0] not in shared:
+                # 只被一个字段使用的顶层字段直接读取
+                lines.append(f"    value = get({spec.paths[0]!r})")
+            elif len(spec.paths) == 1:
+                lines.append(f"    value = {read(tuple(spec.paths[0].split('.')))}")
+            else:
+                for position, path in enumerate(spec.paths):
+                    keyword = 'if' if position == 0 else 'elif'
+                    lines.append(f"    {keyword} {path!r} in job: value = job[{path!r}]")
+                lines.append("    else: value = None")
+
+            if spec.transform is not None:
+                lines.append(f"    if value is not None: value = {constant(spec.transform)}(value)")
+
+            if isinstance(key, tuple):
+                names = [f"value_{position}" for position in range(len(key))]
+                lines.append(f"    {', '.join(names)}, = value if value is not None else {constant((None,) * len(key))}")
+                for output, name in zip(key, names):
+                    emit(output, name, spec.default)
+            else:
+                emit(key, 'value', spec.default)
+
+        lines.append("    return record")
+        return '\n'.join(lines) + '\n', namespace
+
+
+# --- 字段定义 ---
+
+# 接口 /api/v1/search/job/posts 返回的职位，by.py 缓存使用的记录格式
+JOB_SCHEMA = JobSchema({
+    # 基础信息
+    'title': 'title',
+    'sub_title': 'sub_title',
+    'description': 'description',
+    'requirement': 'requirement',
+    'publish_time': Field('publish_time', transform=format_timestamp_ms),
+    'code': 'code',
+
+    # 职位基本信息
+    'job_id': 'id',
+    'job_type': 'job_type',
+    'job_category': Field('job_category', transform=name_of),
+    'job_function': Field('job_function', transform=name_of),
+    'department_id': 'department_id',
+    'job_process_id': 'job_process_id',
+
+    # 招聘类型和项目信息
+    'recruit_type_name': 'recruit_type.name',
+    'recruit_type_parent': 'recruit_type.parent.name',
+    'job_subject_name': Field('job_subject.name', transform=localized),
+
+    # 地理位置信息：城市名称和代码在一次遍历中拼接
+    ('city_list', 'city_codes'): Field('city_list', transform=join_keys('name', 'code')),
+    'address': 'address',
+
+    # 职位要求
+    'degree': 'degree',
+    'experience': 'experience',
+    'min_salary': 'min_salary',
+    'max_salary': 'max_salary',
+    'currency': 'currency',
+    'head_count': 'head_count',
+
+    # 职位状态和标识
+    'job_hot_flag': 'job_hot_flag',
+    'is_urgent': 'is_urgent',
+    'job_active_status': 'job_active_status',
+    'recommend_id': 'recommend_id',
+
+    # 其他信息
+    'team_name': 'team_name',
+    'brand_name': 'brand_name',
+    'ats_online_apply': 'ats_online_apply',
+    'pc_job_url': 'pc_job_url',
+    'wap_job_url': 'wap_job_url',
+    'storefront_mode': 'storefront_mode',
+    'process_type': 'process_type',
+}, drop_empty=True)
+
+
+@functools.lru_cache(maxsize=None)
+def task_schema(extra_fields: Tuple[str, ...] = ()) -> JobSchema:
+    """by.py 的字段表，附加任务配置中的额外字段（字典取其name）；按额外字段组合缓存编译结果。"""
+    if not extra_fields:
+        return JOB_SCHEMA
+    return JOB_SCHEMA.extend({field: Field(field, transform=name_of) for field in extra_fields})
+
+
+# by_simple.py 请求同一接口，缓存使用中文记录格式；更新时间由调用方按本次运行时间填写
+SIMPLE_JOB_SCHEMA = JobSchema({
+    '职位名称': Field('title', default=''),
+    '部门': Field('department', default=''),
+    # 接口返回的是city_list（没有city_info），与 by.py 的城市字段同源
+    '工作地点': Field('city_list', transform=join_key('name'), default=''),
+    '发布时间': Field('publish_time', default=''),
+    '更新时间': Field(),
+    '职位ID': Field('id', default=''),
+    '职位链接': Field('id', transform=position_url, default=POSITION_URL.format('')),
+    '工作性质': Field('job_type', transform=name_of, default=''),
+    '学历要求': Field('requirement', default=''),
+    '职位描述': Field('description', transform=truncate(500), default=''),
+})
+
+# 纯API版本（app_api_only.py）的记录格式，兼容多种接口返回的字段名；更新时间由调用方填写
+API_JOB_SCHEMA = JobSchema({
+    'title': Field('title', 'job_title', 'name', default='未知职位'),
+    'location': Field('location', 'city', 'work_location', default='未知地点'),
+    'department': Field('department', 'team', 'category', default='未知部门'),
+    'update_time': Field(),
+    'source': Field(default='api_direct'),
+    'job_id': Field('id', 'job_id', default=''),
+    'description': Field('description', 'requirement', transform=truncate(200, suffix=''), default=''),
+})
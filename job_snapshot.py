@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享内存映射的职位数据快照
+监控脚本每次保存时发布一个不可变的快照文件，再原子替换指针文件指向新版本；
+多个Web工作进程以只读方式 mmap 同一个快照，物理内存中只有一份数据，
+启动时无需解析，记录在访问时才解码
+
+快照文件布局：
+    8字节魔数 | 8字节头部长度 | JSON头部 | 按8字节对齐的各工作表数据
+每个工作表的数据为 int64 偏移数组（rows+1 个，定长列）加字符串表；
+字符串表是逗号分隔的各条记录的紧凑JSON文本，第i条记录位于 [offsets[i], offsets[i+1]-1)，
+因此任意一段连续记录本身就是合法的JSON数组内容，接口可以不经解码直接输出
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+from collections.abc import Sequence
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from versioned_files import file_lock, writer_id
+
+SNAPSHOT_MAGIC = b'BDJSNAP1'
+# 保留的快照文件数量（含当前版本），仍在使用上一版本的工作进程可以继续读取
+SNAPSHOT_KEEP = int(os.getenv('SNAPSHOT_KEEP', 2))
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def read_pointer(pointer_path: Path) -> Optional[Dict[str, Any]]:
+    """读取指针文件：{version, file, rows}；不存在或损坏时返回None。"""
+    try:
+        with open(pointer_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.warning(f"读取快照指针 {pointer_path} 出错: {e}")
+        return None
+
+
+def _snapshot_path(pointer_path: Path, version: int) -> Path:
+    return pointer_path.with_name(f"{pointer_path.stem}.{version}.snap")
+
+
+def write_snapshot(path: Path, data: Dict[str, Iterable[Dict[str, Any]]], version: int) -> int:
+    """写入快照文件，返回记录总数；快照不可变，目标文件已存在时抛出 FileExistsError。"""
+    sheets = {}
+    blobs = []
+    position = 0
+    for sheet_name, records in data.items():
+        texts = [_encoder.encode(record).encode('utf-8') for record in records]
+        lengths = np.fromiter((len(text) + 1 for text in texts), dtype=np.int64, count=len(texts))
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        table = b','.join(texts)
+        sheets[sheet_name] = {'rows': len(texts), 'offsets': position, 'data': position + offsets.nbytes}
+        blobs.append((offsets.tobytes(), table))
+        position = _align(position + offsets.nbytes + len(table))
+
+    header = json.dumps({
+        'version': version,
+        'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'sheets': sheets,
+    }, ensure_ascii=False).encode('utf-8')
+    base = _align(len(SNAPSHOT_MAGIC) + 8 + len(header))
+
+    temp_path = path.with_name(f"{path.name}.{writer_id()}.tmp")
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC + struct.pack('<Q', len(header)) + header)
+            f.write(b'\0' * (base - f.tell()))
+            for offsets, table in blobs:
+                f.write(offsets)
+                f.write(table)
+                f.write(b'\0' * (_align(f.tell() - base) - (f.tell() - base)))
+            f.flush()
+            os.fsync(f.fileno())
+        # 用硬链接代替 os.replace：已被其他进程映射的同名快照不会被覆盖
+        os.link(temp_path, path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+    return sum(sheet['rows'] for sheet in sheets.values())
+
+
+def publish_snapshot(pointer_path: Path, data: Dict[str, Iterable[Dict[str, Any]]]) -> int:
+    """发布新版本快照：先写完整的快照文件，再原子替换指针文件，返回新版本号。
+
+    版本号的读取、快照写入和指针替换在排他锁内完成；
+    没有文件锁的平台上，版本号冲突时快照文件不会被覆盖，改用下一个版本号重试。
+    """
+    pointer_path = Path(pointer_path)
+    # 排他锁（同目录的 .lock 文件）保证多个监控进程不会选到同一个版本号
+    with file_lock(pointer_path.with_name(pointer_path.name + '.lock')):
+        current = read_pointer(pointer_path)
+        version = (current['version'] if current else 0) + 1
+        while True:
+            snapshot_path = _snapshot_path(pointer_path, version)
+            try:
+                rows = write_snapshot(snapshot_path, data, version)
+                break
+            except FileExistsError:
+                logging.warning(f"快照版本 {version} 已存在，改用下一个版本号")
+                version += 1
+
+        temp_path = pointer_path.with_name(f"{pointer_path.name}.{writer_id()}.tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': version, 'file': snapshot_path.name, 'rows': rows}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, pointer_path)
+    logging.info(f"📸 已发布数据快照版本 {version}: {rows} 条记录")
+
+    # 已映射旧快照的进程不受删除影响（POSIX下文件在解除映射前一直有效）
+    for old_version in range(version - SNAPSHOT_KEEP, 0, -1):
+        old_path = _snapshot_path(pointer_path, old_version)
+        if not old_path.exists():
+            break
+        try:
+            old_path.unlink()
+        except OSError as e:
+            logging.warning(f"删除旧快照 {old_path} 失败: {e}")
+    return version
+
+
+class SnapshotSheet(Sequence):
+    """快照中一个工作表的只读记录序列，按下标访问时才解码对应记录。"""
+
+    def __init__(self, buffer: mmap.mmap, base: int, rows: int, offsets_start: int, data_start: int):
+        self._buffer = buffer
+        self._offsets = np.frombuffer(buffer, dtype=np.int64, count=rows + 1, offset=base + offsets_start)
+        self._data = base + data_start
+        self._rows = rows
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def _release(self) -> None:
+        # 偏移数组引用着映射的内存，必须先释放，mmap才能关闭
+        self._offsets = None
+
+    def _check_open(self) -> None:
+        if self._offsets is None:
+            raise ValueError("快照已关闭")
+
+    def __getitem__(self, index):
+        self._check_open()
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._rows))]
+        if index < 0:
+            index += self._rows
+        if not 0 <= index < self._rows:
+            raise IndexError(index)
+        start = self._data + int(self._offsets[index])
+        end = self._data + int(self._offsets[index + 1]) - 1
+        return json.loads(self._buffer[start:end])
+
+    def __iter__(self):
+        for index in range(self._rows):
+            yield self[index]
+
+    def json_fragment(self, start: int, end: int) -> str:
+        """第start到end条记录（不含end）逗号分隔的JSON文本，直接取自字符串表。"""
+        self._check_open()
+        if start >= end:
+            return ''
+        return self._buffer[self._data + int(self._offsets[start]):
+                            self._data + int(self._offsets[end]) - 1].decode('utf-8')
+
+
+class Snapshot:
+    """以只读方式映射的快照文件，用完后调用 close() 或用 with 语句解除映射。"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._buffer[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            self._buffer.close()
+            raise ValueError(f"不是有效的职位快照文件: {self.path}")
+        header_length, = struct.unpack_from('<Q', self._buffer, len(SNAPSHOT_MAGIC))
+        header_start = len(SNAPSHOT_MAGIC) + 8
+        header = json.loads(self._buffer[header_start:header_start + header_length])
+        base = _align(header_start + header_length)
+        self.version: int = header['version']
+        self.created_at: Optional[str] = header.get('created_at')
+        self.sheets: Dict[str, SnapshotSheet] = {
+            sheet_name: SnapshotSheet(self._buffer, base, sheet['rows'], sheet['offsets'], sheet['data'])
+            for sheet_name, sheet in header['sheets'].items()
+        }
+
+    @classmethod
+    def open_current(cls, pointer_path: Path) -> Optional['Snapshot']:
+        """打开指针文件指向的当前快照；尚未发布过快照时返回None。"""
+        pointer = read_pointer(pointer_path)
+        if pointer is None:
+            return None
+        return cls(Path(pointer_path).with_name(pointer['file']))
+
+    def close(self) -> None:
+        """解除映射；之后访问各工作表会抛出 ValueError。重复调用无副作用。"""
+        if self._buffer.closed:
+            return
+        for sheet in self.sheets.values():
+            sheet._release()
+        self._buffer.close()
+
+    def __enter__(self) -> 'Snapshot':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def materialize(self) -> Dict[str, List[Dict[str, Any]]]:
+        """解码全部记录，供需要完整数据的监控脚本使用。"""
+        return {sheet_name: list(sheet) for sheet_name, sheet in self.sheets.items()}
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+职位统计快照
+监控脚本保存数据时顺带计算一次统计结果并写入小文件，
+Web应用直接读取快照，数据版本变化时才重新计算
+"""
+
+import json
+import logging
+import threading
+from collections import Counter
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from versioned_files import publish_text
+
+RECENT_DAYS = 7  # 最近发布职位的统计天数
+TOP_N = 10  # 热门城市和部门的数量
+
+
+def job_cities(job: Dict[str, Any]) -> List[str]:
+    """取出职位的城市列表，兼容逗号拼接的字符串和旧版的 [{'name': ...}] 列表。"""
+    city_list = job.get('city_list')
+    if isinstance(city_list, str):
+        return [city.strip() for city in city_list.split(',') if city.strip()]
+    if isinstance(city_list, list):
+        return [city['name'] for city in city_list if isinstance(city, dict) and city.get('name')]
+    return []
+
+
+def compute_statistics(data: Dict[str, Iterable[Dict[str, Any]]]) -> Dict[str, Any]:
+    """遍历一次全部职位，生成与时间无关的统计快照。
+
+    最近职位数依赖当前日期，快照里只保存按发布日期的计数，读取时再汇总。
+    """
+    by_type: Dict[str, int] = {}
+    cities: Counter = Counter()
+    departments: Counter = Counter()
+    publish_days: Counter = Counter()
+
+    for job_type, jobs in data.items():
+        count = 0
+        for job in jobs:
+            count += 1
+            cities.update(job_cities(job))
+            department = job.get('department')
+            if department:
+                departments[department] += 1
+            publish_time = job.get('publish_time')
+            if isinstance(publish_time, str) and len(publish_time) >= 10:
+                # 发布时间格式为 '%Y-%m-%d %H:%M:%S'，前10位即日期
+                publish_days[publish_time[:10]] += 1
+        by_type[job_type] = count
+
+    return {
+        'total': sum(by_type.values()),
+        'by_type': by_type,
+        'cities': dict(cities.most_common()),
+        'departments': dict(departments.most_common()),
+        'publish_days': dict(sorted(publish_days.items())),
+        'computed_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def summarize(snapshot: Dict[str, Any], today: Optional[date] = None) -> Dict[str, Any]:
+    """把快照转换为页面和 /api/stats 使用的统计结果。"""
+    today = today or date.today()
+    week_ago = (today - timedelta(days=RECENT_DAYS)).strftime('%Y-%m-%d')
+    return {
+        'total': snapshot['total'],
+        'by_type': snapshot['by_type'],
+        'recent_jobs': sum(count for day, count in snapshot['publish_days'].items() if day >= week_ago),
+        'cities': snapshot['cities'],
+        'departments': snapshot['departments'],
+        'top_cities': list(snapshot['cities'].items())[:TOP_N],
+        'top_departments': list(snapshot['departments'].items())[:TOP_N],
+        'computed_at': snapshot.get('computed_at'),
+    }
+
+
+def save_stats(path: Path, snapshot: Dict[str, Any], signature: Optional[Tuple[int, int]]) -> None:
+    """写入统计快照，并记录对应数据的签名（见 job_store 的 signature()）。"""
+    if signature is None:
+        return
+    try:
+        with publish_text(path) as f:
+            json.dump({'signature': list(signature), **snapshot}, f, ensure_ascii=False)
+        logging.info(f"📊 统计快照已保存至: {path}")
+    except Exception as e:
+        logging.error(f"⚠️ 保存统计快照时出错: {e}")
+
+
+def load_stats(path: Path, signature: Optional[Tuple[int, int]]) -> Optional[Dict[str, Any]]:
+    """读取统计快照；文件缺失、损坏或与当前数据签名不一致时返回None。"""
+    if signature is None or not Path(path).exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except Exception as e:
+        logging.warning(f"读取统计快照 {path} 出错: {e}")
+        return None
+    if tuple(snapshot.pop('signature', ())) != tuple(signature):
+        return None
+    return snapshot
+
+
+class StatsCache:
+    """Web进程内的统计缓存：数据签名和日期都不变时直接返回上次结果。"""
+
+    def __init__(self, stats_path: Path):
+        self.stats_path = Path(stats_path)
+        self._lock = threading.Lock()
+        self._key = None
+        self._stats: Optional[Dict[str, Any]] = None
+
+    def get(self, store) -> Dict[str, Any]:
+        signature = store.signature()
+        key = (signature, date.today())
+        with self._lock:
+            if self._stats is None or key != self._key:
+                snapshot = load_stats(self.stats_path, signature)
+                if snapshot is None:
+                    # 快照缺失或过期（例如数据由其他程序写入），从缓存数据重新计算
+                    snapshot = compute_statistics(store.cached() if signature is not None else {})
+                self._stats = summarize(snapshot)
+                self._key = key
+            return self._stats
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+职位数据存储层
+监控脚本写入、Web应用读取都经过这里，后端可选：
+- json:   沿用 bytedance_jobs_cache.json 整文件读写（默认）
+- sqlite: WAL模式的SQLite数据库，每次运行在一个事务内只写入变化的行，
+          按工作表读取走索引查询，写入期间Web进程仍可并发读取
+- columnar: 列式 .npz 文件（见 job_columns），DataFrame直接往返，可按列读取
+- snapshot: 内存映射的不可变快照（见 job_snapshot），多个Web工作进程共享同一份数据
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import pandas as pd
+    from job_columns import frame_records, load_frames, save_frames
+    from job_snapshot import Snapshot, publish_snapshot, read_pointer
+except ImportError:  # 纯API版本不安装pandas/numpy，只能使用json和sqlite后端
+    pd = None
+
+from json_stream import write_json
+from versioned_files import file_signature, publish_text
+
+# 存储后端：json、sqlite 或 columnar
+JOB_STORE_BACKEND = os.getenv('JOB_STORE', 'json').lower()
+# SQLite数据库和列式缓存的文件名，与JSON缓存放在同一目录
+SQLITE_FILENAME = 'bytedance_jobs.db'
+COLUMNAR_FILENAME = 'bytedance_jobs_cache.npz'
+SNAPSHOT_POINTER_FILENAME = 'bytedance_jobs_snapshot.current'
+# 其他程序无法直接读取的后端，监控脚本保存时可同时导出JSON缓存
+BINARY_BACKENDS = ('columnar', 'snapshot')
+
+Records = Dict[str, List[Dict[str, Any]]]
+
+
+def _record_field(record: Dict[str, Any], *names: str) -> Optional[str]:
+    """按候选字段名取值，兼容 by.py 的英文字段和 by_simple.py 的中文字段。"""
+    for name in names:
+        value = record.get(name)
+        if value is not None:
+            return str(value)
+    return None
+
+
+class _CachedReadsMixin:
+    """进程内缓存解析后的数据，只有数据签名变化时才重新读取。
+
+    cached() 缓存完整数据集；get_jobs() 只取一个工作表，能按工作表读取的后端
+    （实现了 _load_sheet）只读取该工作表并单独缓存。缓存后请求只需一次 stat（JSON）
+    或一次版本号查询（SQLite）。返回的数据在进程内共享，调用方不得修改。
+    """
+
+    def _init_cache(self) -> None:
+        self._cache_lock = threading.Lock()
+        self._cached_data: Optional[Any] = None
+        self._cached_signature: Optional[Tuple[int, int]] = None
+        self._sheet_cache: Dict[str, Any] = {}
+        self._sheet_signature: Optional[Tuple[int, int]] = None
+
+    def get_jobs(self, sheet_name: str) -> List[Dict[str, Any]]:
+        """单个工作表的职位，工作表不存在时返回空列表。"""
+        load_sheet = getattr(self, '_load_sheet', None)
+        if load_sheet is None:
+            return self.cached().get(sheet_name, [])
+        with self._cache_lock:
+            signature = self.signature()
+            if signature is None:
+                return []
+            if self._cached_data is not None and signature == self._cached_signature:
+                return self._cached_data.get(sheet_name, [])
+            if signature != self._sheet_signature:
+                self._sheet_cache = {}
+                self._sheet_signature = signature
+            jobs = self._sheet_cache.get(sheet_name)
+            if jobs is None:
+                jobs = self._sheet_cache[sheet_name] = load_sheet(sheet_name)
+                logging.info(f"🔄 已重新加载{self.backend}存储工作表 '{sheet_name}': {len(jobs)} 个职位")
+            return jobs
+
+    def cached(self) -> Any:
+        with self._cache_lock:
+            signature = self.signature()
+            if signature is None:
+                return {}
+            if self._cached_data is None or signature != self._cached_signature:
+                try:
+                    data = self._load_shared()
+                except Exception as e:
+                    # 数据正在被改写或已损坏：有旧数据时继续使用，下次请求再尝试
+                    if self._cached_data is None:
+                        raise
+                    logging.warning(f"重新加载 {self.path} 失败，继续使用上一版本数据: {e}")
+                    return self._cached_data
+                self._cached_data = data
+                self._cached_signature = signature
+                logging.info(f"🔄 已重新加载{self.backend}存储数据: {self.path}")
+            return self._cached_data
+
+    def _load_shared(self) -> Any:
+        """cached() 读取数据的方式，默认读取完整数据。"""
+        return self.load()
+
+
+class JsonJobStore(_CachedReadsMixin):
+    """整文件JSON存储，与原有缓存格式完全一致。"""
+
+    backend = 'json'
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._init_cache()
+
+    def load(self) -> Records:
+        """读取全部工作表；文件不存在时返回空字典，读取失败时抛出异常由调用方处理。"""
+        if not self.path.exists():
+            return {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save(self, data: Records) -> None:
+        # 按记录分块编码写入，每条记录一行；json.dump(indent=2) 会逐个token生成，慢且无必要。
+        # 先写临时文件再原子替换，读取方不会读到写了一半的缓存
+        with publish_text(self.path) as f:
+            write_json(f, data)
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def signature(self) -> Optional[Tuple[int, int]]:
+        """数据签名 (发布版本号, size)，每次 save() 发布后版本号递增；无数据时返回None。"""
+        return file_signature(self.path)
+
+
+class SqliteJobStore(_CachedReadsMixin):
+    """SQLite存储：每个职位一行，原始记录以JSON文本保存在record列。
+
+    (sheet, content_hash, occurrence) 为主键，occurrence 区分同一工作表内内容完全相同的记录；
+    另有工作表内顺序索引，按工作表读取时使用。
+    每次 save() 在单个事务内与已有的行比较，只插入新记录、删除消失的记录并更新位置变化的行，
+    版本号和总行数写入meta表，读取方据此判断数据是否变化。
+    """
+
+    backend = 'sqlite'
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            sheet TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            occurrence INTEGER NOT NULL,
+            job_id TEXT,
+            publish_time TEXT,
+            position INTEGER NOT NULL,
+            record TEXT NOT NULL,
+            PRIMARY KEY (sheet, content_hash, occurrence)
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_sheet_position ON jobs (sheet, position);
+        DROP INDEX IF EXISTS idx_jobs_job_id;
+        DROP INDEX IF EXISTS idx_jobs_publish_time;
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+    """
+
+    # 早期版本以 (sheet, content_hash) 为主键，同一内容的记录只有一行，迁移时occurrence均为0
+    _MIGRATE = """
+        BEGIN;
+        ALTER TABLE jobs RENAME TO jobs_old;
+        CREATE TABLE jobs (
+            sheet TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            occurrence INTEGER NOT NULL,
+            job_id TEXT,
+            publish_time TEXT,
+            position INTEGER NOT NULL,
+            record TEXT NOT NULL,
+            PRIMARY KEY (sheet, content_hash, occurrence)
+        );
+        INSERT INTO jobs (sheet, content_hash, occurrence, job_id, publish_time, position, record)
+            SELECT sheet, content_hash, 0, job_id, publish_time, position, record FROM jobs_old;
+        DROP TABLE jobs_old;
+        COMMIT;
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        # sqlite3连接不能跨线程共享，Flask的每个工作线程各用一个连接
+        self._local = threading.local()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+        self._init_cache()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    columns = [row[1] for row in conn.execute('PRAGMA table_info(jobs)')]
+                    if columns and 'occurrence' not in columns:
+                        conn.executescript(self._MIGRATE)
+                        logging.info(f"💾 SQLite存储已迁移到新的主键: {self.path}")
+                    conn.executescript(self._SCHEMA)
+                    self._initialized = True
+        return conn
+
+    def version(self) -> int:
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else 0
+
+    def load(self) -> Records:
+        data: Records = {}
+        rows = self._connect().execute('SELECT sheet, record FROM jobs ORDER BY sheet, position')
+        for sheet_name, record in rows:
+            data.setdefault(sheet_name, []).append(json.loads(record))
+        return data
+
+    def _load_sheet(self, sheet_name: str) -> List[Dict[str, Any]]:
+        rows = self._connect().execute(
+            'SELECT record FROM jobs WHERE sheet = ? ORDER BY position', (sheet_name,)
+        )
+        return [json.loads(record) for (record,) in rows]
+
+    @staticmethod
+    def _keyed_rows(records: List[Dict[str, Any]]) -> Dict[Tuple[str, int], Tuple[int, str]]:
+        """(content_hash, occurrence) → (position, JSON文本)。"""
+        rows = {}
+        occurrences: Dict[str, int] = {}
+        for position, record in enumerate(records):
+            text = json.dumps(record, ensure_ascii=False)
+            content_hash = hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+            occurrence = occurrences.get(content_hash, 0)
+            occurrences[content_hash] = occurrence + 1
+            rows[content_hash, occurrence] = (position, text)
+        return rows
+
+    def save(self, data: Records) -> None:
+        conn = self._connect()
+        inserted = deleted = moved = 0
+        with conn:
+            # 立即获取写锁，避免并发写入读到相同的版本号
+            conn.execute('BEGIN IMMEDIATE')
+            run_id = self.version() + 1
+            existing_sheets = [sheet for (sheet,) in conn.execute('SELECT DISTINCT sheet FROM jobs')]
+            for sheet_name in set(existing_sheets) - set(data):
+                deleted += conn.execute('DELETE FROM jobs WHERE sheet = ?', (sheet_name,)).rowcount
+            
+            total = 0
+            for sheet_name, records in data.items():
+                rows = self._keyed_rows(records)
+                total += len(rows)
+                existing = {
+                    (content_hash, occurrence): position
+                    for content_hash, occurrence, position in conn.execute(
+                        'SELECT content_hash, occurrence, position FROM jobs WHERE sheet = ?', (sheet_name,)
+                    )
+                }
+                # 本次数据中没有的行即已从数据集中移除
+                removed = [(sheet_name, *key) for key in existing.keys() - rows.keys()]
+                conn.executemany(
+                    'DELETE FROM jobs WHERE sheet = ? AND content_hash = ? AND occurrence = ?', removed
+                )
+                added = []
+                shifted = []
+                for (content_hash, occurrence), (position, text) in rows.items():
+                    old_position = existing.get((content_hash, occurrence))
+                    if old_position is None:
+                        record = records[position]
+                        added.append((
+                            sheet_name, content_hash, occurrence,
+                            _record_field(record, 'job_id', '职位ID'),
+                            _record_field(record, 'publish_time', '发布时间'),
+                            position, text,
+                        ))
+                    elif old_position != position:
+                        shifted.append((position, sheet_name, content_hash, occurrence))
+                conn.executemany(
+                    'INSERT INTO jobs (sheet, content_hash, occurrence, job_id, publish_time, position, record) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)', added
+                )
+                conn.executemany(
+                    'UPDATE jobs SET position = ? WHERE sheet = ? AND content_hash = ? AND occurrence = ?', shifted
+                )
+                inserted += len(added)
+                deleted += len(removed)
+                moved += len(shifted)
+            
+            conn.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                [('version', run_id), ('rows', total)]
+            )
+        # 本连接自己的提交不会改变 data_version，清除本线程缓存的签名
+        self._local.signature_key = None
+        logging.info(f"💾 SQLite存储已更新至版本 {run_id}: 新增 {inserted} 条，移除 {deleted} 条，调整位置 {moved} 条")
+
+    def exists(self) -> bool:
+        return self.path.exists() and self.version() > 0
+
+    def signature(self) -> Optional[Tuple[int, int]]:
+        """数据签名 (版本号, 总行数)，均由 save() 在同一事务内写入meta表。
+
+        WAL模式下文件mtime不可靠；PRAGMA data_version 在其他连接提交后才会变化，
+        未变化时沿用本线程上次读取的签名，每个请求不必查询meta表。
+        """
+        if not self.path.exists():
+            return None
+        conn = self._connect()
+        data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+        if getattr(self._local, 'signature_key', None) != data_version:
+            meta = dict(conn.execute("SELECT key, value FROM meta WHERE key IN ('version', 'rows')"))
+            version = meta.get('version')
+            if not version:
+                signature = None
+            elif 'rows' in meta:
+                signature = (version, meta['rows'])
+            else:
+                # 旧版本写入的数据库没有记录总行数
+                signature = (version, conn.execute('SELECT COUNT(*) FROM jobs').fetchone()[0])
+            self._local.signature = signature
+            self._local.signature_key = data_version
+        return self._local.signature
+
+
+class ColumnarJobStore(_CachedReadsMixin):
+    """列式缓存文件：监控脚本直接保存和读取DataFrame，Web应用读取时再转换为记录。"""
+
+    backend = 'columnar'
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._init_cache()
+
+    def load_frames(self, sheets: Optional[List[str]] = None,
+                    columns: Optional[List[str]] = None) -> Dict[str, 'pd.DataFrame']:
+        """读取DataFrame，可只读取部分工作表和列；文件不存在时返回空字典。"""
+        if not self.path.exists():
+            return {}
+        return load_frames(self.path, sheets=sheets, columns=columns)
+
+    def save_frames(self, frames: Dict[str, 'pd.DataFrame']) -> None:
+        save_frames(self.path, frames)
+
+    def load(self) -> Records:
+        return {sheet_name: frame_records(df) for sheet_name, df in self.load_frames().items()}
+
+    def _load_sheet(self, sheet_name: str) -> List[Dict[str, Any]]:
+        frames = self.load_frames(sheets=[sheet_name])
+        return frame_records(frames[sheet_name]) if sheet_name in frames else []
+
+    def save(self, data: Records) -> None:
+        self.save_frames({sheet_name: pd.DataFrame(records) for sheet_name, records in data.items()})
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def signature(self) -> Optional[Tuple[int, int]]:
+        """数据签名 (发布版本号, size)，与JSON存储相同。"""
+        return file_signature(self.path)
+
+
+class SnapshotJobStore(_CachedReadsMixin):
+    """内存映射快照：path为指针文件，save() 发布新版本快照后原子替换指针。
+
+    cached() 返回按需解码的 SnapshotSheet，各工作进程共享映射的页面；
+    load() 解码全部记录，供监控脚本使用。
+    换入新快照时只丢弃对旧快照的引用：每个 SnapshotSheet 都持有其映射，且没有循环引用，
+    缓存、查询索引和正在流式输出的请求都不再引用旧快照时映射随即释放，
+    仍在读取旧数据的请求可以读完。
+    """
+
+    backend = 'snapshot'
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._pointer_stat = None
+        self._pointer = None
+        self._init_cache()
+
+    def _read_pointer(self) -> Optional[Dict[str, Any]]:
+        # 指针文件通过 os.replace 更新，inode或mtime不变时沿用上次读取的内容
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if key != self._pointer_stat:
+            self._pointer = read_pointer(self.path)
+            self._pointer_stat = key
+        return self._pointer
+
+    def _load_shared(self) -> Dict[str, Any]:
+        snapshot = Snapshot.open_current(self.path)
+        return snapshot.sheets if snapshot is not None else {}
+
+    def load(self) -> Records:
+        snapshot = Snapshot.open_current(self.path)
+        if snapshot is None:
+            return {}
+        with snapshot:
+            return snapshot.materialize()
+
+    def save(self, data: Records) -> None:
+        publish_snapshot(self.path, data)
+
+    def exists(self) -> bool:
+        return self._read_pointer() is not None
+
+    def signature(self) -> Optional[Tuple[int, int]]:
+        """数据签名 (快照版本号, 总记录数)。"""
+        pointer = self._read_pointer()
+        if pointer is None:
+            return None
+        return pointer['version'], pointer['rows']
+
+
+_stores: Dict[Tuple[str, str], Any] = {}
+_stores_lock = threading.Lock()
+
+
+def get_job_store(json_path: Path, backend: Optional[str] = None):
+    """返回与JSON缓存路径对应的存储实例（进程内共享）。
+
+    sqlite、columnar和snapshot后端的数据文件放在JSON缓存同一目录下。
+    """
+    backend = (backend or JOB_STORE_BACKEND).lower()
+    key = (str(json_path), backend)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            if backend == 'sqlite':
+                store = SqliteJobStore(Path(json_path).with_name(SQLITE_FILENAME))
+            elif backend == 'columnar':
+                store = ColumnarJobStore(Path(json_path).with_name(COLUMNAR_FILENAME))
+            elif backend == 'snapshot':
+                store = SnapshotJobStore(Path(json_path).with_name(SNAPSHOT_POINTER_FILENAME))
+            else:
+                store = JsonJobStore(json_path)
+            _stores[key] = store
+        return store
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+职位描述文本处理
+把职位的description拆分为团队介绍和岗位细节两部分。
+拆分在抓取入库时完成，结果与描述内容哈希一起保存在职位记录中，
+描述未变化的职位直接沿用上次的结果，Excel导出只读取保存的字段
+"""
+
+import hashlib
+import re
+from typing import Any, Dict, Optional, Tuple
+
+NO_TEAM_INTRO = "暂无团队介绍"
+# 截取描述开头作为团队介绍时的最大长度
+TEAM_INTRO_FALLBACK_LENGTH = 200
+
+# 职位记录中保存拆分结果的字段
+DESCRIPTION_HASH_FIELD = 'description_hash'
+TEAM_INTRO_FIELD = 'team_intro'
+JOB_DETAILS_FIELD = 'job_details'
+
+# 数字编号，如 "1、"
+_ITEM = re.compile(r'[1-9]、')
+# 团队介绍：...\n\n
+_INTRO_UNTIL_BLANK_LINE = re.compile(r'团队介绍[：:][^\n]*\n\n')
+# 团队介绍：...直到数字编号开始
+_INTRO_UNTIL_ITEM = re.compile(r'团队介绍[：:][^1-9]*(?=[1-9]、)')
+# 某一行开头到第一个数字编号
+_LINE_UNTIL_ITEM = re.compile(r'^[^1-9]*?(?=[1-9]、)', re.MULTILINE)
+# 双换行+数字
+_BLANK_LINE_ITEM = re.compile(r'\n\n[1-9]')
+_DUTIES = re.compile(r'职责[：:]')
+_WORK_CONTENT = re.compile(r'工作内容[：:]')
+
+
+def description_hash(description: str) -> str:
+    """描述内容哈希，用于判断拆分结果能否沿用。"""
+    return hashlib.blake2b(description.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _team_intro(text: str, item: Optional[re.Match]) -> str:
+    # 如果直接以数字编号开始，说明没有团队介绍
+    if item is not None and item.start() == 0:
+        return NO_TEAM_INTRO
+
+    # 按优先级寻找团队介绍的结束标志，依赖数字编号或标题的规则在文本中没有对应内容时直接跳过
+    match = None
+    if '团队介绍' in text:
+        match = _INTRO_UNTIL_BLANK_LINE.search(text)
+        if match is None and item is not None:
+            match = _INTRO_UNTIL_ITEM.search(text)
+    if match is None and item is not None:
+        match = _LINE_UNTIL_ITEM.search(text)
+    if match is not None:
+        return match.group(0).strip() or NO_TEAM_INTRO
+    match = _BLANK_LINE_ITEM.search(text)
+    if match is not None:
+        return text[:match.start()].strip() or NO_TEAM_INTRO
+
+    # 没有找到明确的分割点，取前面的部分
+    if len(text) > TEAM_INTRO_FALLBACK_LENGTH:
+        return text[:TEAM_INTRO_FALLBACK_LENGTH] + '...'
+    return text if text else NO_TEAM_INTRO
+
+
+def segment_description(description: Any) -> Tuple[str, str]:
+    """把description拆分为（团队介绍，岗位细节）。
+
+    预编译的规则在同一次调用中共用数字编号的查找结果，团队介绍只计算一次。
+    """
+    if not description or not isinstance(description, str):
+        return "", ""
+
+    text = description.strip()
+    item = _ITEM.search(text)
+    team_intro = _team_intro(text, item)
+
+    # 岗位细节从第一个数字编号、"职责："或"工作内容："开始
+    start = item or _DUTIES.search(text) or _WORK_CONTENT.search(text)
+    if start is not None:
+        return team_intro, text[start.start():].strip()
+
+    # 没有找到明确的开始点，从团队介绍后开始
+    if len(team_intro) < len(text):
+        return team_intro, text[len(team_intro):].strip() or text
+
+    # 默认返回后面的部分
+    return team_intro, text[TEAM_INTRO_FALLBACK_LENGTH:] if len(text) > TEAM_INTRO_FALLBACK_LENGTH else text
+
+
+def extract_team_intro(description: str) -> str:
+    """从description中提取团队介绍部分。"""
+    return segment_description(description)[0]
+
+
+def extract_job_details(description: str) -> str:
+    """从description中提取岗位细节部分。"""
+    return segment_description(description)[1]
+
+
+def segment_frame(df, previous=None):
+    """为职位数据框添加描述哈希、团队介绍和岗位细节三列，返回新的数据框。
+
+    previous中（可以是df本身）已保存的拆分结果按描述哈希复用，描述未变化的职位不再重新拆分；
+    同一批次中描述相同的职位也只拆分一次。
+    """
+    if 'description' not in df.columns:
+        return df
+
+    known: Dict[str, Tuple[str, str]] = {}
+    stored_fields = [DESCRIPTION_HASH_FIELD, TEAM_INTRO_FIELD, JOB_DETAILS_FIELD]
+    if previous is not None and all(field in previous.columns for field in stored_fields):
+        stored = previous[stored_fields].dropna()
+        known = dict(zip(stored[DESCRIPTION_HASH_FIELD], zip(stored[TEAM_INTRO_FIELD], stored[JOB_DETAILS_FIELD])))
+
+    hashes, team_intros, job_details = [], [], []
+    for description in df['description'].tolist():
+        text = description if isinstance(description, str) else ''
+        key = description_hash(text)
+        segments = known.get(key)
+        if segments is None:
+            segments = known[key] = segment_description(text)
+        hashes.append(key)
+        team_intros.append(segments[0])
+        job_details.append(segments[1])
+
+    return df.assign(**{
+        DESCRIPTION_HASH_FIELD: hashes,
+        TEAM_INTRO_FIELD: team_intros,
+        JOB_DETAILS_FIELD: job_details,
+    })
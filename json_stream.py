@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式JSON编码
+按工作表和职位分块生成JSON文本，接口响应和缓存文件写入不再需要先拼出完整字符串，
+内存占用只与分块大小有关；每条职位记录用C实现的编码器整体编码，
+比 json.dump 的逐个token生成快得多
+"""
+
+import json
+from typing import Any, IO, Iterator
+
+# 每次编码的职位记录数
+STREAM_CHUNK_RECORDS = 500
+# 合并后每次输出的目标字节数
+STREAM_CHUNK_BYTES = 64 * 1024
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def iter_json(value: Any, record_separator: str = ',', chunk_records: int = STREAM_CHUNK_RECORDS) -> Iterator[str]:
+    """逐段生成value的JSON文本。
+
+    字典逐个字段展开，列表每chunk_records条记录编码一次，其他值整体编码。
+    record_separator 为列表元素之间的分隔符，写文件时可用 ',\\n' 让每条记录单独一行。
+    """
+    if isinstance(value, dict):
+        yield '{'
+        for i, (key, item) in enumerate(value.items()):
+            yield f"{',' if i else ''}{_encoder.encode(str(key))}:"
+            yield from iter_json(item, record_separator, chunk_records)
+        yield '}'
+    elif hasattr(value, 'json_fragment'):
+        # 自带JSON文本的记录序列（如内存映射快照），直接输出原文
+        yield '['
+        for start in range(0, len(value), chunk_records):
+            yield (',' if start else '') + value.json_fragment(start, min(start + chunk_records, len(value)))
+        yield ']'
+    elif isinstance(value, (list, tuple)):
+        newline = '\n' if record_separator.endswith('\n') else ''
+        yield '[' + newline
+        for start in range(0, len(value), chunk_records):
+            chunk = record_separator.join(_encoder.encode(item) for item in value[start:start + chunk_records])
+            yield (record_separator if start else '') + chunk
+        yield newline + ']'
+    else:
+        yield _encoder.encode(value)
+
+
+def iter_json_bytes(value: Any, chunk_bytes: int = STREAM_CHUNK_BYTES, **kwargs) -> Iterator[bytes]:
+    """与 iter_json 相同，但输出UTF-8字节，并把小片段合并到约chunk_bytes后再输出。"""
+    buffer = []
+    size = 0
+    for piece in iter_json(value, **kwargs):
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_bytes:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def write_json(f: IO[str], value: Any) -> None:
+    """把value分块写入文本文件，每条记录单独一行。"""
+    for piece in iter_json(value, record_separator=',\n'):
+        f.write(piece)
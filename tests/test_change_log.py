@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+change_log 按索引偏移读取的结果与从头扫描整个日志一致，压缩后仍然一致
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+from change_log import EVENT_ADDED, EVENT_MODIFIED, EVENT_REMOVED, ChangeLog
+
+
+def scan_all(path: Path, after_run_id: int) -> List[Dict[str, Any]]:
+    """不用索引，逐行读取整个日志并按运行ID过滤。"""
+    events = []
+    with open(path, 'rb') as f:
+        for line in f:
+            event = json.loads(line)
+            if event['run_id'] > after_run_id:
+                events.append(event)
+    return events
+
+
+def record_runs(log: ChangeLog, runs: int, start: int = 0) -> None:
+    for run in range(start, start + runs):
+        events = [
+            {'type': kind, 'job_id': f"{run}-{i}", 'title': f"职位{run}-{i}", 'publish_time': None}
+            for i, kind in enumerate([EVENT_ADDED, EVENT_MODIFIED, EVENT_REMOVED][:run % 3 + 1])
+        ]
+        log.stage('intern', events, {event['job_id'] for event in events})
+        assert log.commit() == log.last_run_id
+
+
+def test_since_matches_full_scan(tmp_path):
+    log = ChangeLog(tmp_path / 'changes.ndjson', retention_runs=100)
+    record_runs(log, 12)
+
+    for run_id in range(0, 14):
+        assert log.since(run_id) == scan_all(log.path, run_id)
+    assert log.since(3, limit=2) == scan_all(log.path, 3)[:2]
+
+
+def test_index_offsets_point_at_run_starts(tmp_path):
+    log = ChangeLog(tmp_path / 'changes.ndjson', retention_runs=100)
+    record_runs(log, 6)
+
+    data = log.path.read_bytes()
+    index = json.loads(log.index_path.read_text(encoding='utf-8'))
+    assert index['end'] == len(data)
+    for run_id, offset, count, _ in index['runs']:
+        assert offset == 0 or data[offset - 1:offset] == b'\n'
+        lines = data[offset:].splitlines()[:count]
+        assert [json.loads(line)['run_id'] for line in lines] == [run_id] * count
+
+
+def test_compaction_keeps_recent_runs(tmp_path):
+    log = ChangeLog(tmp_path / 'changes.ndjson', retention_runs=8)
+    # 超过保留次数的25%后自动压缩到8次
+    record_runs(log, 11)
+
+    assert log.oldest_run_id == 4
+    assert log.since(0) == scan_all(log.path, 0)
+    assert {event['run_id'] for event in log.since(0)} == set(range(4, 12))
+    for run_id in range(0, 12):
+        assert log.since(run_id) == scan_all(log.path, run_id)
+
+    # 压缩后继续追加，偏移仍然正确
+    record_runs(log, 3, start=11)
+    assert log.since(9) == scan_all(log.path, 9)
+
+
+def test_reader_with_stale_index_after_compaction(tmp_path):
+    path = tmp_path / 'changes.ndjson'
+    writer = ChangeLog(path, retention_runs=100)
+    record_runs(writer, 10)
+    reader = ChangeLog(path)
+    expected = scan_all(path, 6)
+
+    # 另一个进程压缩日志后，读取方持有的旧索引偏移已经失效
+    writer.compact(5)
+    assert reader.since(6) == expected
+    assert reader.oldest_run_id == 6
+
+
+def test_torn_tail_is_ignored_and_dropped_on_next_commit(tmp_path):
+    log = ChangeLog(tmp_path / 'changes.ndjson', retention_runs=100)
+    record_runs(log, 3)
+    expected = scan_all(log.path, 0)
+    # 上次写入中途退出，留下未登记到索引的半行
+    with open(log.path, 'ab') as f:
+        f.write(b'{"run_id": 4, "type": "add')
+
+    assert log.since(0) == expected
+    record_runs(log, 1, start=3)
+    assert log.since(0) == scan_all(log.path, 0)
+
+
+def test_index_is_rebuilt_from_log(tmp_path):
+    log = ChangeLog(tmp_path / 'changes.ndjson', retention_runs=100)
+    record_runs(log, 5)
+    expected = log.since(2)
+    log.index_path.unlink()
+
+    rebuilt = ChangeLog(log.path)
+    assert rebuilt.last_run_id == 5
+    assert rebuilt.since(2) == expected
+    # 在线职位ID无法从日志重建，下次运行不判断下线
+    assert rebuilt.live_ids('intern') is None
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+job_index 的指纹和排序键与改造前逐行 md5 哈希、sort_values 排序的结果一致
+"""
+
+import hashlib
+import random
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from job_index import KEY_FIELDS, JobHashIndex, compute_fingerprints, compute_order_keys
+
+
+def legacy_job_hash(job: Dict[str, Any]) -> str:
+    """改造前 JobMonitor._generate_job_hash 的写法。"""
+    hash_string = ''.join(str(job.get(field, '')) for field in KEY_FIELDS)
+    return hashlib.md5(hash_string.encode('utf-8')).hexdigest()
+
+
+def legacy_sort(df: pd.DataFrame) -> pd.DataFrame:
+    """改造前 JobMonitor._sort_jobs_dataframe 的写法。"""
+    if 'is_new' in df.columns:
+        return df.sort_values(by=['is_new', 'publish_time'], ascending=[False, False])
+    return df.sort_values(by='publish_time', ascending=False)
+
+
+def make_jobs(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """生成职位记录，其中混有完全重复的记录和只差一个字段的记录。"""
+    rng = random.Random(seed)
+    jobs = []
+    for i in range(count):
+        job = {
+            'code': f"A{rng.randint(0, count // 3):06d}",
+            'title': rng.choice(['后端开发', '前端开发', '算法工程师', '测试开发']),
+            'description': rng.choice(['负责核心业务', '参与系统设计', '']),
+            'requirement': rng.choice(['本科及以上', '硕士', '熟悉Python']),
+            'is_new': rng.random() < 0.3,
+            'publish_time': f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} "
+                            f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00",
+        }
+        if rng.random() < 0.1:
+            job = dict(jobs[rng.randrange(len(jobs))]) if jobs else job
+        if rng.random() < 0.05:
+            job.pop('requirement', None)
+        jobs.append(job)
+    return jobs
+
+
+def test_fingerprints_group_rows_like_md5():
+    jobs = make_jobs(2000)
+    fingerprints = compute_fingerprints(pd.DataFrame(jobs))
+    assert fingerprints.dtype == np.uint64
+
+    by_md5: Dict[str, int] = {}
+    by_fingerprint: Dict[int, int] = {}
+    for position, (job, fingerprint) in enumerate(zip(jobs, fingerprints.tolist())):
+        # 两种哈希下，每一行第一次出现的位置相同，说明相等关系完全一致
+        assert by_md5.setdefault(legacy_job_hash(job), position) == by_fingerprint.setdefault(fingerprint, position)
+    assert len(by_md5) < len(jobs)
+
+
+def test_fingerprint_separates_field_boundaries():
+    # 原先直接拼接字段，('ab', 'c') 与 ('a', 'bc') 的哈希相同；按列哈希能区分
+    jobs = [{'code': 'ab', 'title': 'c'}, {'code': 'a', 'title': 'bc'}]
+    assert legacy_job_hash(jobs[0]) == legacy_job_hash(jobs[1])
+    fingerprints = compute_fingerprints(pd.DataFrame(jobs))
+    assert fingerprints[0] != fingerprints[1]
+
+
+def test_order_keys_match_legacy_sort():
+    jobs = make_jobs(1000)
+    jobs[3]['publish_time'] = None
+    jobs[11]['publish_time'] = None
+    df = pd.DataFrame(jobs)
+
+    order = np.argsort(compute_order_keys(df), kind='stable')
+    ours = df.take(order)[['is_new', 'publish_time']]
+    legacy = legacy_sort(df)[['is_new', 'publish_time']]
+    # 并列记录的先后原先依赖不稳定排序，只比较排序字段的序列
+    assert ours.fillna('').values.tolist() == legacy.fillna('').values.tolist()
+
+
+def test_lookup_finds_rows_and_reports_missing():
+    df = pd.DataFrame(make_jobs(300))
+    index = JobHashIndex.from_dataframe(df)
+    rows = index.lookup(index.row_fingerprints)
+    # 重复记录命中同一指纹的任一行即可
+    assert np.array_equal(index.row_fingerprints[rows], index.row_fingerprints)
+
+    unseen = compute_fingerprints(pd.DataFrame([{'code': 'X', 'title': '从未出现', 'description': '', 'requirement': ''}]))
+    assert index.lookup(unseen).tolist() == [-1]
+    assert JobHashIndex.empty().lookup(unseen).tolist() == [-1]
+
+
+def _unique_jobs(jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """去掉重复记录，并补齐缺失字段（原先对数据框行哈希时缺失值会变成'nan'，与字典记录的哈希不一致）。"""
+    seen = set()
+    unique = []
+    for job in jobs:
+        job.setdefault('requirement', '')
+        key = legacy_job_hash(job)
+        if key not in seen:
+            seen.add(key)
+            unique.append(job)
+    return unique
+
+
+def _merge_with_splice(existing_df: pd.DataFrame, batch: List[Dict[str, Any]]) -> pd.DataFrame:
+    """按 JobMonitor._process_results 的步骤合并：索引查找、splice，再按取行顺序拼接。"""
+    order = np.argsort(compute_order_keys(existing_df), kind='stable')
+    existing_df = existing_df.take(order).reset_index(drop=True)
+    index = JobHashIndex.from_dataframe(existing_df)
+
+    new_df = pd.DataFrame(batch)
+    fingerprints = compute_fingerprints(new_df)
+    _, last_positions = np.unique(fingerprints[::-1], return_index=True)
+    keep = np.sort(len(fingerprints) - 1 - last_positions)
+    new_df = new_df.iloc[keep].reset_index(drop=True)
+    fingerprints = fingerprints[keep]
+
+    matched_rows = index.lookup(fingerprints)
+    new_df['is_new'] = matched_rows < 0
+    take, final_index = index.splice(matched_rows[matched_rows >= 0], fingerprints, compute_order_keys(new_df))
+    final_df = pd.concat([existing_df, new_df], ignore_index=True).take(take).reset_index(drop=True)
+
+    # splice 增量维护的索引与对结果整体重建的索引一致
+    rebuilt = JobHashIndex.from_dataframe(final_df)
+    assert np.array_equal(final_index.row_fingerprints, rebuilt.row_fingerprints)
+    assert np.array_equal(final_index.order_keys, rebuilt.order_keys)
+    assert final_index.is_sorted
+    assert np.array_equal(final_index.row_fingerprints[final_index.sorted_rows], final_index.sorted_fingerprints)
+    assert np.all(final_index.sorted_fingerprints[1:] >= final_index.sorted_fingerprints[:-1])
+    return final_df
+
+
+def _merge_legacy(existing_df: pd.DataFrame, batch: List[Dict[str, Any]]) -> pd.DataFrame:
+    """改造前 _process_results 的合并方式：全部行重新哈希去重（保留最后一条）后整体排序。"""
+    previous = {legacy_job_hash(job) for job in existing_df.to_dict('records')}
+    batch = [dict(job, is_new=legacy_job_hash(job) not in previous) for job in batch]
+    combined = pd.concat([existing_df, pd.DataFrame(batch)], ignore_index=True)
+    combined['job_hash'] = [legacy_job_hash(job) for job in combined.to_dict('records')]
+    combined = combined.drop_duplicates(subset=['job_hash'], keep='last').drop(columns=['job_hash'])
+    return legacy_sort(combined)
+
+
+def _rows(df: pd.DataFrame) -> List[tuple]:
+    columns = ['code', 'title', 'description', 'requirement', 'is_new', 'publish_time']
+    return sorted(tuple(row) for row in df.reindex(columns=columns).fillna('').astype(str).values.tolist())
+
+
+def test_splice_matches_legacy_merge():
+    rng = random.Random(11)
+    existing = _unique_jobs(make_jobs(1500, seed=1))
+    for job in existing:
+        job['is_new'] = False
+    existing_df = pd.DataFrame(existing)
+
+    batch = []
+    for job in rng.sample(existing, 400):
+        job = {key: value for key, value in job.items() if key != 'is_new'}
+        if rng.random() < 0.2:
+            # 内容变化的职位视为新职位
+            job['description'] = job['description'] + '（更新）'
+        batch.append(job)
+    batch += [{key: value for key, value in job.items() if key != 'is_new'} for job in _unique_jobs(make_jobs(300, seed=2))]
+    batch.append(dict(batch[0]))
+    rng.shuffle(batch)
+
+    ours = _merge_with_splice(existing_df, batch)
+    legacy = _merge_legacy(existing_df, batch)
+    assert _rows(ours) == _rows(legacy)
+    assert (ours[['is_new', 'publish_time']].fillna('').values.tolist()
+            == legacy[['is_new', 'publish_time']].fillna('').values.tolist())
+
+
+def test_splice_into_empty_index():
+    batch = _unique_jobs(make_jobs(50, seed=3))
+    final_df = _merge_with_splice(pd.DataFrame(), batch)
+    assert len(final_df) == len(batch)
+    assert final_df['is_new'].all()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+job_query 索引查询的结果与改造前逐个职位扫描的结果一致
+"""
+
+import base64
+import json
+import random
+from typing import Any, Dict, List
+
+import pytest
+
+from job_query import JobQueryIndex, decode_cursor, encode_cursor
+
+TITLE_WORDS = ['后端开发', '前端', '算法工程师', '测试开发', 'Java', 'Golang', 'C++', 'iOS', 'Android', 'AI Lab', '数据挖掘']
+DESCRIPTION_WORDS = ['负责核心业务', '参与系统设计', 'Python/Go', '熟悉Linux', '大模型', 'TikTok直播', '推荐系统',
+                     '抖音电商', 'machine learning', '分布式存储', 'K8s', '（实习）', '—', 'Flink、Spark']
+CITIES = ['北京', '上海', '深圳', '杭州', '成都', '新加坡']
+DEPARTMENTS = ['抖音', '抖音电商', '飞书', '火山引擎', '基础架构', 'TikTok']
+
+
+def make_jobs(count: int, seed: int = 3) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    jobs = []
+    for i in range(count):
+        job = {
+            'job_id': str(7000 + i),
+            'title': '-'.join(rng.sample(TITLE_WORDS, rng.randint(1, 2))) + f" {i % 17}",
+            'description': ' '.join(rng.sample(DESCRIPTION_WORDS, rng.randint(1, 4))),
+            'city_list': [{'name': city} for city in rng.sample(CITIES, rng.randint(0, 2))],
+            'department': rng.choice(DEPARTMENTS + ['']),
+            'is_new': rng.random() < 0.2,
+            'publish_time': f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 10:00:00",
+        }
+        if i % 29 == 0:
+            del job['description']
+        jobs.append(job)
+    return jobs
+
+
+def legacy_search(jobs: List[Dict[str, Any]], search: str) -> List[int]:
+    """改造前 /jobs/<job_type> 的关键词过滤。"""
+    return [position for position, job in enumerate(jobs)
+            if search.lower() in job.get('title', '').lower()
+            or search.lower() in job.get('description', '').lower()]
+
+
+def sample_queries(jobs: List[Dict[str, Any]], count: int, seed: int = 5) -> List[str]:
+    """从职位文本中截取的子串（可能跨越单词和字段边界、改变大小写），以及不会命中的查询。"""
+    rng = random.Random(seed)
+    queries = ['', ' ', 'c++', 'GO', 'ai l', 'tiktok直', '—', '（实', '不存在的职位', 'zzz', '电商 ']
+    for _ in range(count):
+        job = rng.choice(jobs)
+        text = rng.choice([job['title'], job.get('description', '')]) or job['title']
+        start = rng.randrange(len(text))
+        query = text[start:start + rng.randint(1, 8)]
+        queries.append(query.upper() if rng.random() < 0.2 else query)
+    return queries
+
+
+def test_search_matches_legacy_scan():
+    jobs = make_jobs(1500)
+    index = JobQueryIndex(jobs)
+    for query in sample_queries(jobs, 400):
+        assert index.search(query) == legacy_search(jobs, query), query
+
+
+def legacy_filter(jobs: List[Dict[str, Any]], search: str = '', city: str = '', department: str = '') -> List[int]:
+    """改造前 /jobs/<job_type> 依次按关键词、城市、部门过滤。"""
+    positions = legacy_search(jobs, search) if search else list(range(len(jobs)))
+    if city:
+        positions = [p for p in positions if any(c.get('name', '') == city for c in jobs[p].get('city_list', []))]
+    if department:
+        positions = [p for p in positions if department in jobs[p].get('department', '')]
+    return positions
+
+
+def test_facet_filters_match_legacy_filter():
+    jobs = make_jobs(800)
+    index = JobQueryIndex(jobs)
+    cases = [(search, city, department)
+             for search in ['', '开发', 'java', '电商']
+             for city in ['', '北京', '新加坡', '不存在']
+             for department in ['', '抖音', 'TikTok', '引擎', '不存在']]
+    for search, city, department in cases:
+        result = index.query(search, city, department)
+        positions = result['positions'] if result['positions'] is not None else list(range(len(jobs)))
+        assert positions == legacy_filter(jobs, search, city, department), (search, city, department)
+
+
+def test_facet_counts_equal_result_sizes():
+    jobs = make_jobs(800)
+    index = JobQueryIndex(jobs)
+    for search, city, department in [('', '', ''), ('开发', '', ''), ('', '上海', ''), ('', '', '抖音'), ('go', '深圳', '飞书')]:
+        result = index.query(search, city, department)
+        # 下拉框中每一项的计数等于在其余条件不变时选中该项得到的结果数
+        for name, count in result['city_counts'].items():
+            assert count == len(legacy_filter(jobs, search, name, department)), name
+        for name, count in result['department_counts'].items():
+            assert count == len(legacy_filter(jobs, search, city, name)), name
+        assert set(result['city_counts']) == {c['name'] for job in jobs for c in job['city_list']}
+        assert set(result['department_counts']) == {job['department'] for job in jobs if job['department']}
+
+
+def reference_order(jobs: List[Dict[str, Any]], positions: List[int], sort: str) -> List[int]:
+    """直接对筛选结果整体排序：新职位在前/发布时间降序/标题升序，再依次按job_id和行号。"""
+    def key(position: int):
+        job = jobs[position]
+        tail = (job['job_id'], position)
+        if sort == 'publish_time':
+            return (_negated(job['publish_time']),) + tail
+        if sort == 'title':
+            return (job['title'],) + tail
+        return (not job['is_new'], _negated(job['publish_time'])) + tail
+    return sorted(positions, key=key)
+
+
+def _negated(publish_time: str) -> str:
+    # 固定格式的时间字符串逐字符取反后升序，即原时间降序
+    return ''.join(chr(0x10FFFF - ord(ch)) for ch in publish_time)
+
+
+def walk_cursor(index: JobQueryIndex, positions, sort: str, page_size: int) -> List[int]:
+    seen: List[int] = []
+    cursor = None
+    while True:
+        result = index.page(positions, sort=sort, page_size=page_size, cursor=cursor)
+        seen += result['positions']
+        cursor = result['next_cursor']
+        if cursor is None:
+            return seen
+
+
+def walk_pages(index: JobQueryIndex, positions, sort: str, page_size: int) -> List[int]:
+    seen: List[int] = []
+    page = 1
+    while True:
+        result = index.page(positions, sort=sort, page=page, page_size=page_size)
+        if not result['positions']:
+            return seen
+        seen += result['positions']
+        page += 1
+
+
+def test_cursor_paging_matches_full_sort():
+    jobs = make_jobs(500)
+    # 重复的job_id在同一排序键下并列，游标不能跳过或重复其中任何一条
+    for position in range(0, 500, 7):
+        jobs[position]['job_id'] = '7000'
+        jobs[position]['publish_time'] = '2024-06-01 10:00:00'
+    index = JobQueryIndex(jobs)
+    filtered = index.query('开发', '', '')['positions']
+
+    for sort in ('is_new', 'publish_time', 'title'):
+        for positions in (None, filtered):
+            expected = reference_order(jobs, positions if positions is not None else list(range(len(jobs))), sort)
+            assert index.ordered(positions, sort) == expected
+            for page_size in (1, 13, 50):
+                assert walk_cursor(index, positions, sort, page_size) == expected, (sort, page_size)
+                assert walk_pages(index, positions, sort, page_size) == expected, (sort, page_size)
+
+
+def test_malformed_cursors_are_rejected():
+    index = JobQueryIndex(make_jobs(30))
+    cursor = index.page(sort='title', page_size=5)['next_cursor']
+    assert decode_cursor(cursor)[0] == 'title'
+    with pytest.raises(ValueError):
+        index.page(sort='publish_time', cursor=cursor)
+
+    # 缺少行号的旧格式排序键、类型不符的键、非JSON内容
+    legacy_key = base64.urlsafe_b64encode(json.dumps(['title', ['后端', '7001']]).encode()).decode()
+    for bad in (legacy_key, encode_cursor('title', ('后端', 7001, 3)), encode_cursor('nope', ('a', 'b', 1)), 'zz'):
+        with pytest.raises(ValueError):
+            decode_cursor(bad)
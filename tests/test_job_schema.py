@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+job_schema 编译出的规整函数与改造前 by.py、by_simple.py、app_api_only.py 手写的字段映射输出一致
+"""
+
+import random
+from datetime import datetime
+from typing import Any, Dict, List
+
+import pytest
+
+from job_schema import API_JOB_SCHEMA, JOB_SCHEMA, SIMPLE_JOB_SCHEMA, Field, JobSchema, task_schema
+
+CITIES = [('北京', 'CT_11'), ('上海', 'CT_125'), ('深圳', 'CT_128'), ('杭州', 'CT_52')]
+
+
+def legacy_job_info(job: Dict[str, Any], extra_fields: List[str]) -> Dict[str, Any]:
+    """改造前 JobMonitor._parse_job_list 中单个职位的写法。"""
+    publish_time = datetime.fromtimestamp(job["publish_time"] / 1000)
+    job_info = {
+        "title": job.get("title"),
+        "sub_title": job.get("sub_title"),
+        "description": job.get("description"),
+        "requirement": job.get("requirement"),
+        "publish_time": publish_time.strftime("%Y-%m-%d %H:%M:%S"),
+        "code": job.get("code"),
+        "job_id": job.get("id"),
+        "job_type": job.get("job_type"),
+        "job_category": job.get("job_category", {}).get("name") if isinstance(job.get("job_category"), dict) else job.get("job_category"),
+        "job_function": job.get("job_function", {}).get("name") if isinstance(job.get("job_function"), dict) else job.get("job_function"),
+        "department_id": job.get("department_id"),
+        "job_process_id": job.get("job_process_id"),
+        "recruit_type_name": job.get("recruit_type", {}).get("name") if isinstance(job.get("recruit_type"), dict) else None,
+        "recruit_type_parent": job.get("recruit_type", {}).get("parent", {}).get("name") if isinstance(job.get("recruit_type"), dict) and job.get("recruit_type", {}).get("parent") else None,
+        "job_subject_name": job.get("job_subject", {}).get("name", {}).get("zh_cn") if isinstance(job.get("job_subject"), dict) and isinstance(job.get("job_subject", {}).get("name"), dict) else job.get("job_subject", {}).get("name") if isinstance(job.get("job_subject"), dict) else None,
+        "city_list": ", ".join([city.get("name", "") for city in job.get("city_list", []) if isinstance(city, dict)]) if job.get("city_list") else None,
+        "city_codes": ", ".join([city.get("code", "") for city in job.get("city_list", []) if isinstance(city, dict)]) if job.get("city_list") else None,
+        "address": job.get("address"),
+        "degree": job.get("degree"),
+        "experience": job.get("experience"),
+        "min_salary": job.get("min_salary"),
+        "max_salary": job.get("max_salary"),
+        "currency": job.get("currency"),
+        "head_count": job.get("head_count"),
+        "job_hot_flag": job.get("job_hot_flag"),
+        "is_urgent": job.get("is_urgent"),
+        "job_active_status": job.get("job_active_status"),
+        "recommend_id": job.get("recommend_id"),
+        "team_name": job.get("team_name"),
+        "brand_name": job.get("brand_name"),
+        "ats_online_apply": job.get("ats_online_apply"),
+        "pc_job_url": job.get("pc_job_url"),
+        "wap_job_url": job.get("wap_job_url"),
+        "storefront_mode": job.get("storefront_mode"),
+        "process_type": job.get("process_type"),
+    }
+    for field in extra_fields:
+        value = job.get(field)
+        job_info[field] = value.get('name') if isinstance(value, dict) else value
+    return {k: v for k, v in job_info.items() if v is not None and v != ''}
+
+
+def legacy_simple_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """改造前 SimpleJobMonitor.process_job_data 中单个职位的写法（不含更新时间）。"""
+    return {
+        '职位名称': job.get('title', ''),
+        '部门': job.get('department', ''),
+        '发布时间': job.get('publish_time', ''),
+        '职位ID': job.get('id', ''),
+        '职位链接': f"https://jobs.bytedance.com/campus/position/{job.get('id', '')}",
+        '工作性质': job.get('job_type', {}).get('name', ''),
+        '学历要求': job.get('requirement', ''),
+        '职位描述': job.get('description', '')[:500] + '...' if len(job.get('description', '')) > 500 else job.get('description', ''),
+    }
+
+
+def legacy_api_job(item: Dict[str, Any]) -> Dict[str, Any]:
+    """改造前 app_api_only.fetch_jobs_api 中单个职位的写法（不含更新时间）。"""
+    return {
+        'title': item.get('title', item.get('job_title', item.get('name', '未知职位'))),
+        'location': item.get('location', item.get('city', item.get('work_location', '未知地点'))),
+        'department': item.get('department', item.get('team', item.get('category', '未知部门'))),
+        'source': 'api_direct',
+        'job_id': item.get('id', item.get('job_id', '')),
+        'description': item.get('description', item.get('requirement', ''))[:200],
+    }
+
+
+def make_job_post_list(count: int, seed: int = 9) -> List[Dict[str, Any]]:
+    """按接口 job_post_list 的结构生成职位，各字段随机取字典、字符串、None、空值或缺失。"""
+    rng = random.Random(seed)
+    jobs = []
+    for i in range(count):
+        cities = rng.sample(CITIES, rng.randint(0, 3))
+        job = {
+            'id': str(7000000000000000000 + i),
+            'title': rng.choice([f"后端开发工程师-{i}", '', None]),
+            'sub_title': rng.choice([None, '', '副标题']),
+            'description': '负责核心业务\n参与系统设计',
+            'requirement': rng.choice(['计算机相关专业', None]),
+            'publish_time': 1717200000000 + i * 61000,
+            'code': f"A{i:08d}",
+            'job_type': rng.choice([None, '实习', {'name': '实习'}]),
+            'job_category': rng.choice([{'id': '1', 'name': '研发'}, {'id': '2'}, '研发', None]),
+            'job_function': rng.choice([None, {'name': '后端'}, '']),
+            'recruit_type': rng.choice([{'name': '实习', 'parent': {'name': '校招'}}, {'name': '社招', 'parent': None},
+                                        {'name': '实习', 'parent': {}}, '实习', None]),
+            'job_subject': rng.choice([{'name': {'zh_cn': '日常实习', 'en_us': 'Intern'}}, {'name': '暑期实习'},
+                                       {'id': '3'}, None]),
+            'city_list': [{'code': code, 'name': name} for name, code in cities] + rng.choice([[], ['非字典']]),
+            'head_count': rng.choice([0, 3, None]),
+            'is_urgent': rng.random() < 0.1,
+            'ats_online_apply': True,
+            'pc_job_url': '',
+            'storefront_mode': 2,
+            'location': rng.choice([{'code': 'CT_11', 'name': '北京'}, '北京', None]),
+            'department': rng.choice([None, {'name': '抖音'}, '飞书']),
+        }
+        for key in rng.sample(sorted(job), 3):
+            if key not in ('publish_time', 'id'):
+                del job[key]
+        jobs.append(job)
+    return jobs
+
+
+@pytest.mark.parametrize('extra_fields', [(), ('location', 'department')])
+def test_job_schema_matches_legacy_job_info(extra_fields):
+    normalize = task_schema(extra_fields).normalize
+    for job in make_job_post_list(1000):
+        assert normalize(job) == legacy_job_info(job, list(extra_fields)), job
+    # 字段顺序也与原先一致，Excel和缓存中的列顺序不变
+    job = make_job_post_list(1)[0]
+    assert list(normalize(job)) == list(legacy_job_info(job, list(extra_fields)))
+
+
+def test_simple_schema_matches_legacy_mapping():
+    rng = random.Random(4)
+    for i in range(300):
+        job = {
+            'id': str(i),
+            'title': f"职位{i}",
+            'department': rng.choice(['抖音', '']),
+            'publish_time': 1717200000000 + i,
+            'job_type': {'name': rng.choice(['实习', '全职'])},
+            'requirement': '本科',
+            'description': 'x' * rng.choice([0, 10, 500, 501, 900]),
+            'city_list': [{'name': '北京'}, {'name': '上海'}],
+        }
+        if i % 5 == 0:
+            for key in ('title', 'department', 'description', 'requirement'):
+                del job[key]
+        record = SIMPLE_JOB_SCHEMA.normalize(job)
+        # 工作地点改为取自接口实际返回的 city_list（原先读取不存在的 city_info，总是空字符串）
+        assert record.pop('工作地点') == '北京, 上海'
+        assert record.pop('更新时间') is None
+        assert record == legacy_simple_job(job)
+
+    # 原先 job_type 不是字典时整条职位会因异常被丢弃，现在原样保留
+    assert SIMPLE_JOB_SCHEMA.normalize({'id': '1', 'job_type': '实习'})['工作性质'] == '实习'
+
+
+def test_api_schema_matches_legacy_mapping():
+    items = [
+        {'title': '后端', 'location': '北京', 'department': '抖音', 'id': 1, 'description': 'd' * 300},
+        {'job_title': '前端', 'city': '上海', 'team': '飞书', 'job_id': 'j2', 'requirement': '本科'},
+        {'name': '算法', 'work_location': '深圳', 'category': '研发'},
+        {'title': '', 'job_title': '不会取到', 'description': ''},
+        {},
+    ]
+    for item in items:
+        record = API_JOB_SCHEMA.normalize(item)
+        assert record.pop('update_time') is None
+        assert record == legacy_api_job(item)
+    assert list(API_JOB_SCHEMA.normalize({})) == ['title', 'location', 'department', 'update_time', 'source',
+                                                  'job_id', 'description']
+
+
+def test_generated_source_reads_shared_prefixes_once():
+    # recruit_type 被两个字段引用，生成的函数只读取一次
+    assert JOB_SCHEMA.source.count("get('recruit_type')") == 1
+    schema = JobSchema({'a': 'x.y', 'b': 'x.z', 'c': Field('x', transform=lambda value: bool(value))})
+    assert schema.source.count("get('x')") == 1
+    assert schema.normalize({'x': {'y': 1}}) == {'a': 1, 'b': None, 'c': True}
+    assert schema.normalize({'x': 'not a dict'}) == {'a': None, 'b': None, 'c': True}
+    with pytest.raises(ValueError):
+        Field('a.b', 'c')
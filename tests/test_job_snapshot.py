@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+job_snapshot 的文件布局、按需解码和 json_fragment 与原先JSON缓存读出的数据一致
+"""
+
+import json
+import struct
+from typing import Any, Dict, List
+
+import numpy as np
+import pytest
+
+from job_snapshot import SNAPSHOT_KEEP, SNAPSHOT_MAGIC, Snapshot, publish_snapshot, read_pointer
+from job_store import JsonJobStore, SnapshotJobStore
+from json_stream import iter_json
+
+
+def make_data() -> Dict[str, List[Dict[str, Any]]]:
+    return {
+        'intern': [
+            {'job_id': str(i), 'title': f"后端开发 {i}", 'description': '负责"核心"业务\n参与设计' * (i % 3),
+             'city_list': '北京, 上海', 'is_new': i % 4 == 0, 'head_count': i, 'salary': None, 'score': i / 8}
+            for i in range(257)
+        ],
+        'campus': [{'job_id': 'c1', 'title': 'Emoji 🎉 与 \\ 反斜杠', 'tags': ['a', {'b': 1}]}],
+        'experienced': [],
+    }
+
+
+def json_roundtrip(data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+    """原先的读取结果：整份数据经JSON编码再解析。"""
+    return json.loads(json.dumps(data, ensure_ascii=False, default=str))
+
+
+def test_layout(tmp_path):
+    data = make_data()
+    pointer_path = tmp_path / 'jobs.current'
+    publish_snapshot(pointer_path, data)
+    pointer = read_pointer(pointer_path)
+    raw = (tmp_path / pointer['file']).read_bytes()
+
+    assert raw[:8] == SNAPSHOT_MAGIC
+    header_length, = struct.unpack_from('<Q', raw, 8)
+    header = json.loads(raw[16:16 + header_length])
+    assert header['version'] == pointer['version'] == 1
+    assert pointer['rows'] == sum(len(records) for records in data.values())
+    base = (16 + header_length + 7) & ~7
+
+    for sheet_name, records in data.items():
+        sheet = header['sheets'][sheet_name]
+        assert sheet['rows'] == len(records)
+        # 偏移数组按8字节对齐，可以直接映射为int64数组
+        assert (base + sheet['offsets']) % 8 == 0
+        offsets = np.frombuffer(raw, dtype=np.int64, count=len(records) + 1, offset=base + sheet['offsets'])
+        table = raw[base + sheet['data']:base + sheet['data'] + int(offsets[-1]) - 1] if records else b''
+        # 字符串表是逗号分隔的各条记录的紧凑JSON，第i条位于 [offsets[i], offsets[i+1]-1)
+        assert offsets[0] == 0
+        assert json.loads(b'[' + table + b']') == json_roundtrip({sheet_name: records})[sheet_name]
+        for i in range(len(records)):
+            start, end = base + sheet['data'] + int(offsets[i]), base + sheet['data'] + int(offsets[i + 1]) - 1
+            assert json.loads(raw[start:end]) == json_roundtrip({'s': [records[i]]})['s'][0]
+
+
+def test_records_and_fragments_match_json(tmp_path):
+    data = make_data()
+    expected = json_roundtrip(data)
+    publish_snapshot(tmp_path / 'jobs.current', data)
+
+    with Snapshot.open_current(tmp_path / 'jobs.current') as snapshot:
+        assert snapshot.materialize() == expected
+        sheet = snapshot.sheets['intern']
+        records = expected['intern']
+        assert len(sheet) == len(records)
+        assert sheet[-1] == records[-1]
+        assert sheet[10:20] == records[10:20]
+        with pytest.raises(IndexError):
+            sheet[len(records)]
+
+        for start, end in [(0, 1), (0, len(records)), (5, 133), (256, 257)]:
+            assert json.loads('[' + sheet.json_fragment(start, end) + ']') == records[start:end]
+        assert sheet.json_fragment(7, 7) == ''
+        assert snapshot.sheets['experienced'].json_fragment(0, 0) == ''
+
+        # 流式输出直接拼接原文，结果与整体编码相同
+        assert json.loads(''.join(iter_json(snapshot.sheets, chunk_records=50))) == expected
+
+    with pytest.raises(ValueError):
+        sheet[0]
+
+
+def test_snapshot_store_reads_like_json_store(tmp_path):
+    data = make_data()
+    json_store = JsonJobStore(tmp_path / 'jobs.json')
+    snapshot_store = SnapshotJobStore(tmp_path / 'jobs.current')
+    json_store.save(data)
+    snapshot_store.save(data)
+
+    assert snapshot_store.load() == json_store.load()
+    for sheet_name in data:
+        assert list(snapshot_store.get_jobs(sheet_name)) == list(json_store.get_jobs(sheet_name))
+
+
+def test_held_snapshot_survives_newer_versions(tmp_path):
+    pointer_path = tmp_path / 'jobs.current'
+    publish_snapshot(pointer_path, {'intern': [{'job_id': 'old'}]})
+    held = Snapshot.open_current(pointer_path).sheets['intern']
+
+    for version in range(2, SNAPSHOT_KEEP + 4):
+        assert publish_snapshot(pointer_path, {'intern': [{'job_id': f"v{version}"}]}) == version
+    # 旧版本文件已被清理，但仍被引用的映射继续有效
+    assert not (tmp_path / 'jobs.1.snap').exists()
+    assert held[0] == {'job_id': 'old'}
+    assert len(list(tmp_path.glob('*.snap'))) == SNAPSHOT_KEEP
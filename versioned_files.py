@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+输出文件的原子发布与版本号
+JSON缓存、Excel等输出先完整写入带版本号的临时文件，落盘后再用 os.replace 原子替换目标文件，
+读取方要么读到完整的旧版本，要么读到完整的新版本，不会读到写了一半的文件；
+每次发布在同目录的清单文件中为该文件递增版本号（多个进程之间用文件锁串行），
+存储签名和接口ETag以版本号为准，读取方据此判断数据是否更新
+"""
+
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows没有fcntl，只能在进程内加锁
+    fcntl = None
+
+# 版本清单文件名，放在被发布文件的同一目录
+MANIFEST_FILENAME = 'bytedance_jobs_manifest.json'
+
+_manifest_lock = threading.Lock()
+# 目录 → (清单文件的 inode/mtime/大小, 清单内容)，清单未变化时不重新解析
+_manifest_cache: Dict[str, Tuple[Tuple[int, int, int], Dict[str, Dict[str, Any]]]] = {}
+
+
+def writer_id() -> str:
+    """当前进程号和线程号，用于区分并发写入方的临时文件名。"""
+    return f"{os.getpid()}-{threading.get_ident()}"
+
+
+@contextmanager
+def file_lock(lock_path: Path) -> Iterator[None]:
+    """跨进程的排他锁（lock_path 为锁文件）；没有fcntl的平台上不加锁。"""
+    if fcntl is None:
+        yield
+        return
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _fsync(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_json_atomic(path: Path, value: Any) -> None:
+    temp_path = path.with_name(f"{path.name}.{writer_id()}.tmp")
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(value, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def read_manifest(directory: Path) -> Dict[str, Dict[str, Any]]:
+    """读取目录下的版本清单：{文件名: {version, updated_at}}。
+
+    清单文件通过 os.replace 更新，inode、mtime和大小不变时沿用上次解析的内容；
+    返回的字典在进程内共享，调用方不得修改。
+    """
+    manifest_path = Path(directory) / MANIFEST_FILENAME
+    try:
+        stat = manifest_path.stat()
+    except OSError:
+        return {}
+    key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    cached = _manifest_cache.get(str(directory))
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logging.warning(f"读取版本清单出错: {e}")
+        return {}
+    _manifest_cache[str(directory)] = (key, manifest)
+    return manifest
+
+
+def file_version(path: Path) -> int:
+    """文件当前发布的版本号；从未通过 publish_file 发布过时返回0。"""
+    path = Path(path)
+    return read_manifest(path.parent).get(path.name, {}).get('version', 0)
+
+
+def file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """文件的数据签名 (版本号, 大小)；文件不存在时返回None。
+
+    从未通过 publish_file 发布过的文件（例如由其他程序写入）没有版本号，改用 (mtime_ns, 大小)。
+    """
+    path = Path(path)
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    version = file_version(path)
+    return (version if version else stat.st_mtime_ns), stat.st_size
+
+
+@contextmanager
+def publish_file(path: Path) -> Iterator[Path]:
+    """原子发布path：with块内向返回的临时路径写入完整内容，正常退出后替换目标文件并递增版本号。
+
+    with块内出错时删除临时文件，目标文件保持原样。临时文件保留原扩展名，
+    openpyxl 等按扩展名判断格式的库可以直接读写。
+    """
+    path = Path(path)
+    version = file_version(path) + 1
+    # 临时文件名包含进程号和线程号，同一进程内多个线程同时发布同一文件时互不覆盖
+    temp_path = path.with_name(f".{path.stem}.v{version}.{writer_id()}.tmp{path.suffix}")
+    try:
+        yield temp_path
+        _fsync(temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            temp_path.unlink()
+        except OSError:
+            pass
+        raise
+
+    # 进程内的锁串行本进程的线程，文件锁串行多个监控进程，读取、递增和写回之间不会丢失其他进程的更新
+    with _manifest_lock, file_lock(path.parent / f"{MANIFEST_FILENAME}.lock"):
+        manifest = dict(read_manifest(path.parent))
+        # 清单在写入期间可能已被其他进程更新，版本号始终取较大者加一
+        version = max(version, manifest.get(path.name, {}).get('version', 0) + 1)
+        manifest[path.name] = {'version': version, 'updated_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+        try:
+            _write_json_atomic(path.parent / MANIFEST_FILENAME, manifest)
+        except Exception as e:
+            logging.warning(f"更新版本清单出错: {e}")
+    logging.debug(f"已发布 {path.name} 版本 {version}")
+
+
+@contextmanager
+def publish_text(path: Path, encoding: str = 'utf-8') -> Iterator[Any]:
+    """publish_file 的文本文件版本，with块内直接得到打开的文件对象。"""
+    with publish_file(path) as temp_path:
+        with open(temp_path, 'w', encoding=encoding) as f:
+            yield f